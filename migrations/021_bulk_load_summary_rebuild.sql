@@ -0,0 +1,390 @@
+-- ============================================================================
+-- StrengthWise - 大量匯入：暫停統計觸發器 + 批次重建彙總
+-- ============================================================================
+-- 建立時間：2025-01-20
+-- 目標：大量寫入已完成的訓練記錄時，不再逐筆執行彙總觸發器
+-- 說明：
+--   - 019 的 trigger_update_daily_summary / trigger_update_pr 每筆訓練記錄
+--     都會用 PL/pgSQL 迴圈走訪 exercises JSONB，匯入數萬筆時成本很高
+--   - 匯入期間暫停指定用戶的觸發器（或整個交易，供 COPY 使用），
+--     匯入完成後用一次 set-based 查詢重建這些用戶的
+--     daily_workout_summary 與 personal_records
+--   - 重建結果是依目前 workout_plans 重新計算，不會重複累加
+-- 使用方式：
+--   -- REST（跨多個請求）：
+--   SELECT begin_bulk_load(ARRAY['<user_id>']::UUID[]);
+--   -- ... 批次寫入 workout_plans ...
+--   SELECT * FROM finish_bulk_load(ARRAY['<user_id>']::UUID[]);
+--
+--   -- COPY（同一個交易）：
+--   SET LOCAL strengthwise.bulk_load = 'on';
+--   \copy workout_plans ...
+--   SELECT * FROM rebuild_workout_summaries(ARRAY['<user_id>']::UUID[]);
+-- ============================================================================
+
+-- ============================================================================
+-- 1. 暫停觸發器的用戶清單
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS bulk_load_paused_users (
+  user_id UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+  started_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- 只有 service role 使用（RLS 啟用且不建立策略）
+ALTER TABLE bulk_load_paused_users ENABLE ROW LEVEL SECURITY;
+
+-- 觸發器是否暫停：交易內設定了 strengthwise.bulk_load，或用戶在暫停清單中
+CREATE OR REPLACE FUNCTION summary_triggers_paused(user_id_param UUID)
+RETURNS BOOLEAN AS $$
+  SELECT COALESCE(current_setting('strengthwise.bulk_load', TRUE), '') = 'on'
+    OR EXISTS (
+      SELECT 1 FROM bulk_load_paused_users WHERE user_id = user_id_param
+    );
+$$ LANGUAGE sql STABLE;
+
+DO $$ BEGIN
+  RAISE NOTICE '暫停清單 bulk_load_paused_users 建立完成 ✓';
+END $$;
+
+-- ============================================================================
+-- 2. 觸發器函式：暫停時直接跳過（其餘邏輯與 019 相同）
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION update_daily_workout_summary()
+RETURNS TRIGGER AS $$
+DECLARE
+  training_date DATE;
+  v_resistance_count INT := 0;
+  v_cardio_count INT := 0;
+  v_mobility_count INT := 0;
+  exercise_item JSONB;
+BEGIN
+  -- 大量匯入中：完成後由 rebuild_workout_summaries() 重建
+  IF summary_triggers_paused(NEW.trainee_id) THEN
+    RETURN NEW;
+  END IF;
+
+  -- 取得訓練日期
+  IF NEW.completed_date IS NOT NULL THEN
+    training_date := NEW.completed_date::DATE;
+  ELSE
+    training_date := NEW.updated_at::DATE;
+  END IF;
+
+  -- 如果不是已完成的訓練，跳過
+  IF NEW.completed = FALSE THEN
+    RETURN NEW;
+  END IF;
+
+  -- 計算訓練類型分布（遍歷 JSONB 陣列）
+  FOR exercise_item IN SELECT * FROM jsonb_array_elements(NEW.exercises)
+  LOOP
+    CASE (exercise_item->>'trainingType')
+      WHEN '阻力訓練' THEN v_resistance_count := v_resistance_count + 1;
+      WHEN '心肺適能訓練' THEN v_cardio_count := v_cardio_count + 1;
+      WHEN '活動度與伸展' THEN v_mobility_count := v_mobility_count + 1;
+      ELSE NULL;
+    END CASE;
+  END LOOP;
+
+  -- 插入或更新彙總記錄
+  INSERT INTO daily_workout_summary (
+    user_id,
+    date,
+    workout_count,
+    total_exercises,
+    total_sets,
+    total_volume,
+    resistance_training_count,
+    cardio_count,
+    mobility_count,
+    updated_at
+  ) VALUES (
+    NEW.trainee_id,
+    training_date,
+    1,
+    COALESCE(NEW.total_exercises, 0)::INT,
+    COALESCE(NEW.total_sets, 0)::INT,
+    COALESCE(NEW.total_volume, 0)::DECIMAL(10,2),
+    v_resistance_count,
+    v_cardio_count,
+    v_mobility_count,
+    NOW()
+  )
+  ON CONFLICT (user_id, date)
+  DO UPDATE SET
+    workout_count = daily_workout_summary.workout_count + 1,
+    total_exercises = daily_workout_summary.total_exercises + COALESCE(NEW.total_exercises, 0)::INT,
+    total_sets = daily_workout_summary.total_sets + COALESCE(NEW.total_sets, 0)::INT,
+    total_volume = daily_workout_summary.total_volume + COALESCE(NEW.total_volume, 0)::DECIMAL(10,2),
+    resistance_training_count = daily_workout_summary.resistance_training_count + v_resistance_count,
+    cardio_count = daily_workout_summary.cardio_count + v_cardio_count,
+    mobility_count = daily_workout_summary.mobility_count + v_mobility_count,
+    updated_at = NOW();
+
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION update_personal_records()
+RETURNS TRIGGER AS $$
+DECLARE
+  exercise_item JSONB;
+  exercise_id_val TEXT;
+  exercise_name_val TEXT;
+  max_weight_val DECIMAL;
+  max_reps_val INT;
+  set_item JSONB;
+  current_weight DECIMAL;
+  current_reps INT;
+BEGIN
+  -- 大量匯入中：完成後由 rebuild_workout_summaries() 重建
+  IF summary_triggers_paused(NEW.trainee_id) THEN
+    RETURN NEW;
+  END IF;
+
+  -- 如果不是已完成的訓練，跳過
+  IF NEW.completed = FALSE THEN
+    RETURN NEW;
+  END IF;
+
+  -- 遍歷所有動作
+  FOR exercise_item IN SELECT * FROM jsonb_array_elements(NEW.exercises)
+  LOOP
+    exercise_id_val := exercise_item->>'exerciseId';
+    exercise_name_val := exercise_item->>'exerciseName';
+    max_weight_val := 0;
+    max_reps_val := 0;
+
+    -- 遍歷所有組數，找出最大重量和次數
+    FOR set_item IN SELECT * FROM jsonb_array_elements(exercise_item->'sets')
+    LOOP
+      -- 只統計已完成的組
+      IF (set_item->>'completed')::BOOLEAN = TRUE THEN
+        current_weight := COALESCE((set_item->>'weight')::DECIMAL, 0);
+        current_reps := COALESCE((set_item->>'reps')::INT, 0);
+
+        IF current_weight > max_weight_val THEN
+          max_weight_val := current_weight;
+        END IF;
+
+        IF current_reps > max_reps_val THEN
+          max_reps_val := current_reps;
+        END IF;
+      END IF;
+    END LOOP;
+
+    -- 更新 PR 記錄（只在新記錄更高時更新）
+    IF max_weight_val > 0 OR max_reps_val > 0 THEN
+      INSERT INTO personal_records (
+        user_id,
+        exercise_id,
+        exercise_name,
+        max_weight,
+        max_reps,
+        achieved_date,
+        workout_plan_id,
+        updated_at
+      ) VALUES (
+        NEW.trainee_id,
+        exercise_id_val,
+        exercise_name_val,
+        max_weight_val,
+        max_reps_val,
+        COALESCE(NEW.completed_date::DATE, NEW.updated_at::DATE),
+        NEW.id,
+        NOW()
+      )
+      ON CONFLICT (user_id, exercise_id)
+      DO UPDATE SET
+        max_weight = GREATEST(personal_records.max_weight, max_weight_val),
+        max_reps = GREATEST(personal_records.max_reps, max_reps_val),
+        achieved_date = CASE
+          WHEN max_weight_val > personal_records.max_weight
+            OR max_reps_val > personal_records.max_reps
+          THEN COALESCE(NEW.completed_date::DATE, NEW.updated_at::DATE)
+          ELSE personal_records.achieved_date
+        END,
+        workout_plan_id = CASE
+          WHEN max_weight_val > personal_records.max_weight
+            OR max_reps_val > personal_records.max_reps
+          THEN NEW.id
+          ELSE personal_records.workout_plan_id
+        END,
+        updated_at = NOW();
+    END IF;
+  END LOOP;
+
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$ BEGIN
+  RAISE NOTICE '觸發器函式已加入暫停判斷 ✓';
+END $$;
+
+-- ============================================================================
+-- 3. RPC 函數：set-based 重建彙總
+-- ============================================================================
+
+-- 依目前的 workout_plans 重新計算指定用戶的每日彙總與 PR
+CREATE OR REPLACE FUNCTION rebuild_workout_summaries(user_ids_param UUID[])
+RETURNS TABLE (
+  summary_count INT,
+  record_count INT
+) AS $$
+DECLARE
+  v_summary_count INT := 0;
+  v_record_count INT := 0;
+BEGIN
+  -- 每日彙總：一次聚合所有已完成的訓練
+  DELETE FROM daily_workout_summary WHERE user_id = ANY(user_ids_param);
+
+  INSERT INTO daily_workout_summary (
+    user_id,
+    date,
+    workout_count,
+    total_exercises,
+    total_sets,
+    total_volume,
+    resistance_training_count,
+    cardio_count,
+    mobility_count,
+    updated_at
+  )
+  SELECT
+    wp.trainee_id,
+    COALESCE(wp.completed_date, wp.updated_at)::DATE,
+    COUNT(*)::INT,
+    SUM(COALESCE(wp.total_exercises, 0))::INT,
+    SUM(COALESCE(wp.total_sets, 0))::INT,
+    SUM(COALESCE(wp.total_volume, 0))::DECIMAL(10,2),
+    SUM(types.resistance_count)::INT,
+    SUM(types.cardio_count)::INT,
+    SUM(types.mobility_count)::INT,
+    NOW()
+  FROM workout_plans wp
+  CROSS JOIN LATERAL (
+    SELECT
+      COUNT(*) FILTER (WHERE item->>'trainingType' = '阻力訓練') AS resistance_count,
+      COUNT(*) FILTER (WHERE item->>'trainingType' = '心肺適能訓練') AS cardio_count,
+      COUNT(*) FILTER (WHERE item->>'trainingType' = '活動度與伸展') AS mobility_count
+    FROM jsonb_array_elements(
+      CASE WHEN jsonb_typeof(wp.exercises) = 'array' THEN wp.exercises ELSE '[]'::JSONB END
+    ) AS item
+  ) types
+  WHERE wp.trainee_id = ANY(user_ids_param)
+    AND wp.completed = TRUE
+  GROUP BY wp.trainee_id, COALESCE(wp.completed_date, wp.updated_at)::DATE;
+
+  GET DIAGNOSTICS v_summary_count = ROW_COUNT;
+
+  -- PR：先算每筆訓練每個動作的最大值，再取每個動作的最佳訓練
+  DELETE FROM personal_records WHERE user_id = ANY(user_ids_param);
+
+  WITH plan_bests AS (
+    SELECT
+      wp.trainee_id AS user_id,
+      wp.id AS plan_id,
+      COALESCE(wp.completed_date, wp.updated_at)::DATE AS achieved_date,
+      item->>'exerciseId' AS exercise_id,
+      MIN(item->>'exerciseName') AS exercise_name,
+      MAX(COALESCE((set_item->>'weight')::DECIMAL, 0)) AS max_weight,
+      MAX(COALESCE((set_item->>'reps')::INT, 0)) AS max_reps
+    FROM workout_plans wp
+    CROSS JOIN LATERAL jsonb_array_elements(
+      CASE WHEN jsonb_typeof(wp.exercises) = 'array' THEN wp.exercises ELSE '[]'::JSONB END
+    ) AS item
+    CROSS JOIN LATERAL jsonb_array_elements(
+      CASE WHEN jsonb_typeof(item->'sets') = 'array' THEN item->'sets' ELSE '[]'::JSONB END
+    ) AS set_item
+    WHERE wp.trainee_id = ANY(user_ids_param)
+      AND wp.completed = TRUE
+      AND item->>'exerciseId' IS NOT NULL
+      AND (set_item->>'completed')::BOOLEAN = TRUE
+    GROUP BY wp.trainee_id, wp.id, COALESCE(wp.completed_date, wp.updated_at)::DATE, item->>'exerciseId'
+  )
+  INSERT INTO personal_records (
+    user_id,
+    exercise_id,
+    exercise_name,
+    max_weight,
+    max_reps,
+    achieved_date,
+    workout_plan_id,
+    updated_at
+  )
+  SELECT DISTINCT ON (user_id, exercise_id)
+    user_id,
+    exercise_id,
+    exercise_name,
+    MAX(max_weight) OVER exercise_window,
+    MAX(max_reps) OVER exercise_window,
+    achieved_date,
+    plan_id,
+    NOW()
+  FROM plan_bests
+  WHERE max_weight > 0 OR max_reps > 0
+  WINDOW exercise_window AS (PARTITION BY user_id, exercise_id)
+  -- 達成日期：最早達到最大重量（同重量取次數較多）的訓練
+  ORDER BY user_id, exercise_id, max_weight DESC, max_reps DESC, achieved_date ASC;
+
+  GET DIAGNOSTICS v_record_count = ROW_COUNT;
+
+  RETURN QUERY SELECT v_summary_count, v_record_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 開始大量匯入：暫停這些用戶的觸發器（跨多個 REST 請求有效）
+CREATE OR REPLACE FUNCTION begin_bulk_load(user_ids_param UUID[])
+RETURNS INT AS $$
+DECLARE
+  paused_count INT;
+BEGIN
+  INSERT INTO bulk_load_paused_users (user_id)
+  SELECT DISTINCT unnest(user_ids_param)
+  ON CONFLICT (user_id) DO UPDATE SET started_at = NOW();
+
+  GET DIAGNOSTICS paused_count = ROW_COUNT;
+  RETURN paused_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 結束大量匯入：重建彙總並恢復觸發器（同一個交易，不會漏算）
+CREATE OR REPLACE FUNCTION finish_bulk_load(user_ids_param UUID[])
+RETURNS TABLE (
+  summary_count INT,
+  record_count INT
+) AS $$
+BEGIN
+  RETURN QUERY SELECT * FROM rebuild_workout_summaries(user_ids_param);
+  DELETE FROM bulk_load_paused_users WHERE user_id = ANY(user_ids_param);
+END;
+$$ LANGUAGE plpgsql;
+
+-- 只開放給 service role（避免一般用戶暫停或重建他人的統計）
+REVOKE EXECUTE ON FUNCTION rebuild_workout_summaries(UUID[]) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION begin_bulk_load(UUID[]) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION finish_bulk_load(UUID[]) FROM PUBLIC, anon, authenticated;
+
+DO $$ BEGIN
+  RAISE NOTICE 'RPC 函數 rebuild_workout_summaries() / begin_bulk_load() / finish_bulk_load() 建立完成 ✓';
+END $$;
+
+-- ============================================================================
+-- ✅ 完成
+-- ============================================================================
+
+DO $$ BEGIN
+  RAISE NOTICE '';
+  RAISE NOTICE '====================================================================';
+  RAISE NOTICE '✅ 大量匯入模式建立完成！';
+  RAISE NOTICE '====================================================================';
+  RAISE NOTICE '';
+  RAISE NOTICE '測試指令：';
+  RAISE NOTICE '  SELECT * FROM rebuild_workout_summaries(ARRAY[''your_user_id''::UUID]);';
+  RAISE NOTICE '';
+  RAISE NOTICE '生成腳本加上 --bulk-load 即可使用（見 scripts/README.md）';
+  RAISE NOTICE '';
+END $$;
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+非同步批次寫入（bulk_insert.insert_batches 使用）
+
+用 asyncio + httpx 直接呼叫 PostgREST（與 supabase-py 相同的 /rest/v1 端點），
+同時最多 --concurrency 個請求在途中：
+- 429 / 408 / 5xx 與連線錯誤會以指數退避重試（有 Retry-After 時照它等），
+  最多 --retries 次
+- 其他錯誤（例如 400 欄位錯誤、409 主鍵衝突）不重試
+- 逾時、408、5xx 時伺服器可能已經寫入，之後的重試改用 resolution=ignore-duplicates，
+  已寫入的資料不會變成 409 失敗
+- 重試用盡仍失敗的批次會保留原始資料，由呼叫端寫成失敗報告
+- 指定 on_conflict 時改為 upsert（resolution=merge-duplicates）
+
+事件迴圈在背景執行緒中執行，呼叫端用 submit() 逐批送入；
+佇列滿時 submit() 會等待，生成速度不會超過寫入速度。
+
+使用方式:
+    from async_writer import AsyncBatchWriter
+
+    with AsyncBatchWriter(rest_url, key, 'workout_plans', concurrency=8) as writer:
+        for batch in batches:
+            writer.submit(batch, span="2025-01-01 ~ 2025-01-31")
+    print(writer.inserted, writer.failures)
+"""
+
+import asyncio
+import random
+import threading
+from typing import Dict, List, Optional
+
+from cli_options import get_int_option
+
+# 同時在途中的請求數
+DEFAULT_CONCURRENCY = 4
+# 每批最多重試次數
+DEFAULT_RETRIES = 5
+# 退避：0.5s、1s、2s ... 最多 30s（再加上隨機抖動）
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+REQUEST_TIMEOUT = 60.0
+
+def _httpx():
+    """載入 httpx（supabase-py 的相依套件）"""
+    try:
+        import httpx
+    except ImportError:
+        raise RuntimeError("非同步寫入需要 httpx 套件（pip install httpx）")
+    return httpx
+
+def get_concurrency(default: int = DEFAULT_CONCURRENCY) -> int:
+    """讀取 --concurrency=N"""
+    return get_int_option('--concurrency', default)
+
+def get_retries(default: int = DEFAULT_RETRIES) -> int:
+    """讀取 --retries=N"""
+    return get_int_option('--retries', default)
+
+def is_retryable(status: int) -> bool:
+    """暫時性錯誤：逾時、限流、伺服器錯誤"""
+    return status in (408, 429) or status >= 500
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """第 attempt 次重試前要等待的秒數"""
+    if retry_after:
+        try:
+            return min(float(retry_after), BACKOFF_MAX)
+        except ValueError:
+            pass
+    delay = min(BACKOFF_BASE * (2 ** attempt), BACKOFF_MAX)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+class AsyncBatchWriter:
+    """背景事件迴圈 + 有上限的並行寫入"""
+
+    def __init__(self, rest_url: str, key: str, table: str,
+                 concurrency: int = DEFAULT_CONCURRENCY, retries: int = DEFAULT_RETRIES,
+                 on_conflict: Optional[str] = None):
+        self.endpoint = f"{rest_url.rstrip('/')}/{table}"
+        prefer = "return=minimal"
+        if on_conflict:
+            self.endpoint += f"?on_conflict={on_conflict}"
+            prefer = "resolution=merge-duplicates,return=minimal"
+        self.headers = {
+            "apikey": key,
+            "Authorization": f"Bearer {key}",
+            "Content-Type": "application/json",
+            "Prefer": prefer,
+        }
+        # 結果不確定後的重試：insert 改為忽略已存在的資料（upsert 本身已可重複執行）
+        self.retry_headers = None if on_conflict else {
+            "Prefer": "resolution=ignore-duplicates,return=minimal",
+        }
+        self.table = table
+        self.concurrency = concurrency
+        self.retries = retries
+        self.inserted = 0
+        self.retried = 0
+        self.failures: List[Dict] = []
+        self._batches = 0
+        self._loop = asyncio.new_event_loop()
+        self._queue: Optional[asyncio.Queue] = None
+        self._ready = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            self._thread.join()
+            raise self._error
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._main())
+        except BaseException as e:
+            # 例如缺少 httpx：交給 __enter__ 重新丟出，不讓呼叫端一直等待
+            self._error = e
+        finally:
+            self._ready.set()
+            self._loop.close()
+
+    async def _main(self):
+        httpx = _httpx()
+        # 佇列只多留一輪，讓生成端不會跑得比寫入快太多
+        self._queue = asyncio.Queue(maxsize=self.concurrency)
+        limits = httpx.Limits(max_connections=self.concurrency)
+        async with httpx.AsyncClient(headers=self.headers, limits=limits,
+                                     timeout=REQUEST_TIMEOUT) as client:
+            self._ready.set()
+            workers = [asyncio.create_task(self._worker(client)) for _ in range(self.concurrency)]
+            await asyncio.gather(*workers)
+
+    async def _worker(self, client):
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            await self._send(client, *item)
+
+    async def _send(self, client, index: int, batch: List[Dict], span: str):
+        httpx = _httpx()
+        status, error = None, None
+        uncertain = False  # 之前的嘗試可能已經寫入
+        for attempt in range(self.retries + 1):
+            retry_after = None
+            try:
+                headers = self.retry_headers if uncertain else None
+                response = await client.post(self.endpoint, json=batch, headers=headers)
+                status = response.status_code
+                if response.is_success:
+                    self.inserted += len(batch)
+                    note = f"，重試 {attempt} 次" if attempt else ""
+                    print(f"  📦 {self.table} 第 {index} 批: {len(batch)} 筆（{span}）{note}")
+                    return
+                error = response.text[:500]
+                if not is_retryable(status):
+                    break
+                retry_after = response.headers.get("retry-after")
+                uncertain = uncertain or status != 429
+            except httpx.TransportError as e:
+                status, error = None, f"{type(e).__name__}: {e}"
+                uncertain = True
+            except Exception as e:
+                # 序列化失敗等非網路錯誤，重試也不會成功
+                status, error = None, f"{type(e).__name__}: {e}"
+                break
+            if attempt < self.retries:
+                self.retried += 1
+                delay = backoff_delay(attempt, retry_after)
+                print(f"  ⏳ {self.table} 第 {index} 批: {status or error}，{delay:.1f} 秒後重試（{attempt + 1}/{self.retries}）")
+                await asyncio.sleep(delay)
+
+        self.failures.append({
+            "batch": index,
+            "count": len(batch),
+            "span": span,
+            "status": status,
+            "error": error,
+            "rows": batch,
+        })
+        print(f"  ❌ {self.table} 第 {index} 批: {len(batch)} 筆寫入失敗（{span}）- {status or ''} {error}")
+
+    def submit(self, batch: List[Dict], span: str = ""):
+        """送入一批（佇列滿時等待）"""
+        self._batches += 1
+        future = asyncio.run_coroutine_threadsafe(
+            self._queue.put((self._batches, batch, span)), self._loop
+        )
+        future.result()
+
+    def close(self):
+        """等待所有批次完成"""
+        if not self._thread.is_alive():
+            return
+        for _ in range(self.concurrency):
+            asyncio.run_coroutine_threadsafe(self._queue.put(None), self._loop).result()
+        self._thread.join()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多用戶批次刪除（reset_* 腳本與 reset_users.py 共用）
+
+每個表格用 in_() 一次刪除一段用戶（--chunk-size，預設 100 位），
+各表格同時進行，同一個表格內最多 --concurrency 個刪除請求並行。
+刪除時只要求回傳筆數（count=exact, returning=minimal），最後列出每個表格刪除的筆數。
+
+使用方式:
+    from bulk_delete import delete_users, print_summary
+
+    results = delete_users(supabase, user_ids, ['workout_plans', 'workout_templates'])
+    print_summary(results)
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from async_writer import get_concurrency
+from cli_options import get_int_option
+
+# 表格 → 對應用戶的欄位（任一欄位符合就刪除）
+USER_TABLES: Dict[str, Sequence[str]] = {
+    'workout_plans': ('user_id',),
+    'workout_templates': ('user_id',),
+    'exercises': ('user_id',),
+    'appointments': ('coach_id', 'trainee_id'),
+}
+
+# 每次 in_() 的用戶數（UUID 約 37 字元，100 位約 4 KB 網址）
+DEFAULT_CHUNK_SIZE = 100
+
+def get_chunk_size(default: int = DEFAULT_CHUNK_SIZE) -> int:
+    """讀取 --chunk-size=N"""
+    return get_int_option('--chunk-size', default)
+
+def load_user_ids(args: Iterable[str], path: Optional[str] = None) -> List[str]:
+    """合併命令列的用戶 ID（可用逗號分隔）與檔案中的 ID（每行一個，# 開頭為註解），去除重複"""
+    user_ids = []
+    for arg in args:
+        user_ids.extend(part.strip() for part in arg.split(',') if part.strip())
+    if path:
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            user_ids.extend(line.strip() for line in f if line.strip() and not line.startswith('#'))
+    return list(dict.fromkeys(user_ids))
+
+def is_missing_table(error: Exception, table: str) -> bool:
+    """表格不存在（PostgREST PGRST205）"""
+    message = str(error)
+    return 'PGRST205' in message or (f"'{table}'" in message and 'schema cache' in message)
+
+def delete_chunk(client, table: str, column: str, user_ids: List[str]) -> int:
+    """刪除一段用戶的資料，回傳筆數"""
+    response = client.table(table)\
+        .delete(count='exact', returning='minimal')\
+        .in_(column, user_ids)\
+        .execute()
+    if response.count is not None:
+        return response.count
+    return len(response.data or [])
+
+def delete_table(client, table: str, user_ids: List[str], chunk_size: int,
+                 concurrency: int) -> Dict:
+    """刪除一個表格中所有指定用戶的資料
+
+    回傳 {"deleted": 筆數, "errors": [...], "missing": 表格是否不存在}。
+    """
+    columns = USER_TABLES[table]
+    chunks = [user_ids[i:i + chunk_size] for i in range(0, len(user_ids), chunk_size)]
+    result = {"deleted": 0, "errors": [], "missing": False}
+
+    def run(column: str, chunk: List[str]):
+        try:
+            return delete_chunk(client, table, column, chunk), None
+        except Exception as e:
+            return 0, e
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(run, column, chunk) for column in columns for chunk in chunks]
+        for future in futures:
+            count, error = future.result()
+            result["deleted"] += count
+            if error is None:
+                continue
+            if is_missing_table(error, table):
+                result["missing"] = True
+            else:
+                result["errors"].append(str(error))
+    return result
+
+def delete_users(client, user_ids: List[str], tables: Sequence[str],
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 concurrency: Optional[int] = None) -> Dict[str, Dict]:
+    """各表格同時刪除，回傳 {表格: delete_table 的結果}"""
+    concurrency = concurrency or get_concurrency()
+    unknown = [table for table in tables if table not in USER_TABLES]
+    if unknown:
+        raise ValueError(f"不支援的表格: {', '.join(unknown)}（可用: {', '.join(USER_TABLES)}）")
+    if not user_ids:
+        return {table: {"deleted": 0, "errors": [], "missing": False} for table in tables}
+
+    with ThreadPoolExecutor(max_workers=len(tables)) as executor:
+        futures = {
+            table: executor.submit(delete_table, client, table, user_ids, chunk_size, concurrency)
+            for table in tables
+        }
+        return {table: future.result() for table, future in futures.items()}
+
+def print_summary(results: Dict[str, Dict], optional: Sequence[str] = ()) -> bool:
+    """列出每個表格刪除的筆數，全部成功時回傳 True
+
+    optional 中的表格刪除失敗只顯示警告，不影響回傳值。
+    """
+    ok = True
+    for table, result in results.items():
+        if result["missing"]:
+            print(f"  ⚠️  {table} 表不存在，跳過")
+        elif result["errors"] and table in optional:
+            print(f"  ⚠️  {table}: 刪除失敗（可能沒有）- {result['errors'][0]}")
+        elif result["errors"]:
+            ok = False
+            print(f"  ❌ {table}: 已刪除 {result['deleted']} 筆，{len(result['errors'])} 段失敗 - {result['errors'][0]}")
+        else:
+            print(f"  ✅ {table}: 已刪除 {result['deleted']} 筆")
+    return ok
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批次寫入工具（假資料生成腳本共用）
+
+把資料收集成固定大小的批次，每批只呼叫一次 insert（PostgREST 批次新增），
+並以 returning=minimal 省去回傳整批資料。批次由 async_writer 並行送出
+（--concurrency=N，預設 4），429 / 5xx 會退避重試（--retries=N，預設 5）。
+重試後仍失敗的批次只影響該批：列出筆數與範圍，並把原始資料寫到
+data/failed_rows/<table>-<時間>.ndjson，其他批次照常寫入。
+
+使用方式:
+    from bulk_insert import get_batch_size, insert_batches
+
+    inserted, failures = insert_batches(
+        supabase, 'workout_plans', records, get_batch_size(),
+        describe=lambda r: r['scheduled_date'][:10]
+    )
+"""
+
+import os
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from async_writer import AsyncBatchWriter, get_concurrency, get_retries
+from cli_options import get_int_option
+from snapshot_io import write_records
+
+# 每批筆數（workout_plans 一筆約 5-10 KB，500 筆約數 MB 的請求）
+DEFAULT_BATCH_SIZE = 500
+# 失敗資料報告目錄
+FAILED_ROWS_DIR = os.path.join('data', 'failed_rows')
+
+def get_batch_size(default: int = DEFAULT_BATCH_SIZE) -> int:
+    """讀取 --batch-size=N"""
+    return get_int_option('--batch-size', default)
+
+def iter_batches(records: Iterable[Dict], batch_size: int) -> Iterator[List[Dict]]:
+    """把資料切成每批 batch_size 筆"""
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def rest_endpoint(client) -> Tuple[str, str]:
+    """supabase client 的 PostgREST 網址與金鑰"""
+    rest_url = getattr(client, 'rest_url', None) or f"{client.supabase_url}/rest/v1"
+    return str(rest_url), client.supabase_key
+
+def write_failure_report(table: str, failures: List[Dict]) -> str:
+    """把失敗批次的原始資料寫成 NDJSON（可修正後重新匯入），回傳路徑"""
+    os.makedirs(FAILED_ROWS_DIR, exist_ok=True)
+    path = os.path.join(FAILED_ROWS_DIR, f"{table}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.ndjson")
+    write_records(path, (row for failure in failures for row in failure['rows']))
+    return path
+
+def insert_batches(client, table: str, records: Iterable[Dict],
+                   batch_size: int = DEFAULT_BATCH_SIZE,
+                   describe: Optional[Callable[[Dict], Any]] = None,
+                   concurrency: Optional[int] = None,
+                   on_conflict: Optional[str] = None) -> Tuple[int, List[Dict]]:
+    """分批並行寫入 table，回傳 (成功筆數, 失敗批次清單)
+
+    records 可以是 generator，會邊讀邊送出；指定 on_conflict（例如 'id'）時改為 upsert。失敗批次記錄批次編號、筆數、
+    範圍（第一筆與最後一筆的 describe 結果，預設為 id）、HTTP 狀態、
+    錯誤訊息與原始資料（rows），並寫入失敗報告。
+    """
+    describe = describe or (lambda record: record.get('id'))
+    rest_url, key = rest_endpoint(client)
+    writer = AsyncBatchWriter(rest_url, key, table,
+                              concurrency=concurrency or get_concurrency(),
+                              retries=get_retries(),
+                              on_conflict=on_conflict)
+
+    with writer:
+        for batch in iter_batches(records, batch_size):
+            writer.submit(batch, f"{describe(batch[0])} ~ {describe(batch[-1])}")
+
+    failures = sorted(writer.failures, key=lambda failure: failure['batch'])
+    if writer.retried:
+        print(f"  🔁 {table}: 共重試 {writer.retried} 次")
+    if failures:
+        path = write_failure_report(table, failures)
+        print(f"  📄 {table}: {sum(f['count'] for f in failures)} 筆失敗資料已寫入 {path}")
+    return writer.inserted, failures
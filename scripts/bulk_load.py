@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+大量匯入模式（生成腳本的 --bulk-load 共用，需要 migration 021）
+
+大量寫入已完成的訓練記錄時，migration 019 的 trigger_update_daily_summary /
+trigger_update_pr 每筆都會走訪一次 exercises JSONB。--bulk-load 時：
+1. 寫入前呼叫 begin_bulk_load()，暫停這些用戶的彙總觸發器
+2. 照常批次寫入 workout_plans（REST 或 COPY）
+3. 寫入後呼叫 finish_bulk_load()，一次 set-based 重建這些用戶的
+   daily_workout_summary 與 personal_records，並恢復觸發器
+
+寫入中途失敗也會重建並恢復觸發器。資料庫尚未執行 migration 021 時，
+會提示並改用一般的逐筆觸發器。
+
+COPY 模式（--emit-copy）在 load.sql 的交易內以 SET LOCAL 暫停觸發器，
+\\copy 之後呼叫 rebuild_workout_summaries()（defer_copy_summaries）。
+
+使用方式:
+    from bulk_load import deferred_summaries, is_bulk_load
+
+    with deferred_summaries(supabase, user_ids, enabled=is_bulk_load()):
+        insert_batches(supabase, 'workout_plans', records)
+"""
+
+import sys
+from contextlib import contextmanager
+from typing import Dict, Sequence
+
+from copy_output import sql_literal
+
+# 每次重建的用戶數（避免單一查詢超過 statement timeout）
+REBUILD_CHUNK_SIZE = 500
+
+def is_bulk_load() -> bool:
+    """是否加上 --bulk-load"""
+    return '--bulk-load' in sys.argv
+
+def is_missing_function(error: Exception) -> bool:
+    """RPC 函數不存在（PostgREST PGRST202，migration 021 尚未執行）"""
+    message = str(error)
+    return 'PGRST202' in message or 'Could not find the function' in message
+
+def iter_user_chunks(user_ids: Sequence[str], size: int = REBUILD_CHUNK_SIZE):
+    """去除重複後分段"""
+    unique = list(dict.fromkeys(user_ids))
+    for start in range(0, len(unique), size):
+        yield unique[start:start + size]
+
+def begin_bulk_load(client, user_ids: Sequence[str]) -> bool:
+    """暫停這些用戶的彙總觸發器，migration 021 不存在時回傳 False"""
+    try:
+        for chunk in iter_user_chunks(user_ids):
+            client.rpc('begin_bulk_load', {'user_ids_param': chunk}).execute()
+    except Exception as e:
+        if not is_missing_function(e):
+            raise
+        print("  ⚠️  資料庫沒有 begin_bulk_load()（請執行 migrations/021_bulk_load_summary_rebuild.sql），改用逐筆觸發器")
+        return False
+    print(f"  ⏸️  已暫停 {len(set(user_ids))} 位用戶的統計觸發器")
+    return True
+
+def finish_bulk_load(client, user_ids: Sequence[str]) -> Dict[str, int]:
+    """重建這些用戶的彙總並恢復觸發器，回傳 {"summaries", "records"}"""
+    totals = {"summaries": 0, "records": 0}
+    for chunk in iter_user_chunks(user_ids):
+        response = client.rpc('finish_bulk_load', {'user_ids_param': chunk}).execute()
+        for row in response.data or []:
+            totals["summaries"] += row.get('summary_count') or 0
+            totals["records"] += row.get('record_count') or 0
+    print(f"  🔁 已重建 {totals['summaries']} 筆每日彙總、{totals['records']} 筆個人記錄，觸發器已恢復")
+    return totals
+
+@contextmanager
+def deferred_summaries(client, user_ids: Sequence[str], enabled: bool = True):
+    """with 區塊內暫停統計觸發器，結束時（包含發生錯誤）重建彙總"""
+    paused = enabled and bool(user_ids) and begin_bulk_load(client, user_ids)
+    try:
+        yield paused
+    finally:
+        if paused:
+            finish_bulk_load(client, user_ids)
+
+def defer_copy_summaries(writer, user_ids: Sequence[str]):
+    """COPY 模式：load.sql 交易內暫停觸發器，\\copy 之後重建這些用戶的彙總"""
+    writer.execute("SET LOCAL strengthwise.bulk_load = 'on'")
+    for chunk in iter_user_chunks(user_ids):
+        ids = ', '.join(sql_literal(user_id) for user_id in chunk)
+        writer.execute(f"SELECT * FROM rebuild_workout_summaries(ARRAY[{ids}]::UUID[])", after_copy=True)
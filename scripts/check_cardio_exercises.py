@@ -1,27 +1,55 @@
 #!/usr/bin/env python3
-"""檢查心肺適能訓練動作的 body_part 欄位"""
+"""檢查心肺適能訓練動作的 body_part 欄位
+
+加上 --local 改查本機副本 database_export/database.sqlite（不需連線 Supabase）；
+否則使用動作目錄快取 database_export/exercises.catalog（--offline 時不連線）
+"""
 import os
+import sys
+import json
 from dotenv import load_dotenv
 from supabase import create_client
+from local_replica import open_replica
+from exercise_catalog import load_catalog
+
+LOCAL_MODE = '--local' in sys.argv
 
-# 載入環境變數
-load_dotenv()
-SUPABASE_URL = os.getenv('SUPABASE_URL')
-SUPABASE_ANON_KEY = os.getenv('SUPABASE_ANON_KEY')
+if LOCAL_MODE:
+    replica = open_replica()
+else:
+    # 載入環境變數
+    load_dotenv()
+    SUPABASE_URL = os.getenv('SUPABASE_URL')
+    SUPABASE_ANON_KEY = os.getenv('SUPABASE_ANON_KEY')
+    
+    # 連接 Supabase（動作目錄只確認一次版本，之後在本機篩選）
+    supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+    catalog = load_catalog(supabase)
 
-# 連接 Supabase
-supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+def exercises_by_training_type(training_type: str) -> list:
+    """查詢指定訓練類型的動作"""
+    if LOCAL_MODE:
+        rows = replica.execute(
+            "SELECT id, name, body_part, body_parts, training_type FROM exercises "
+            "WHERE training_type = ?", (training_type,)
+        ).fetchall()
+        return [
+            dict(row, body_parts=json.loads(row['body_parts']) if row['body_parts'] else [])
+            for row in rows
+        ]
+    return [
+        {column: row.get(column) for column in ('id', 'name', 'body_part', 'body_parts', 'training_type')}
+        for row in catalog.rows if row.get('training_type') == training_type
+    ]
 
 # 查詢心肺適能訓練動作
 print("📊 檢查心肺適能訓練動作的 body_part 欄位...")
-response = supabase.table('exercises').select(
-    'id, name, body_part, body_parts, training_type'
-).eq('training_type', '心肺適能訓練').execute()
+cardio = exercises_by_training_type('心肺適能訓練')
 
-print(f"\n找到 {len(response.data)} 個心肺適能訓練動作：\n")
+print(f"\n找到 {len(cardio)} 個心肺適能訓練動作：\n")
 
 empty_count = 0
-for exercise in response.data[:10]:  # 只顯示前 10 個
+for exercise in cardio[:10]:  # 只顯示前 10 個
     body_part = exercise.get('body_part', '')
     body_parts = exercise.get('body_parts', [])
     
@@ -33,22 +61,20 @@ for exercise in response.data[:10]:  # 只顯示前 10 個
     print(f"    - body_parts: {body_parts}")
     print()
 
-print(f"統計：{empty_count}/{len(response.data)} 個動作的 body_part 欄位為空\n")
+print(f"統計：{empty_count}/{len(cardio)} 個動作的 body_part 欄位為空\n")
 
 # 檢查活動度與伸展
 print("\n📊 檢查活動度與伸展動作的 body_part 欄位...")
-response2 = supabase.table('exercises').select(
-    'id, name, body_part, body_parts, training_type'
-).eq('training_type', '活動度與伸展').execute()
+stretch = exercises_by_training_type('活動度與伸展')
 
-print(f"找到 {len(response2.data)} 個活動度與伸展動作")
+print(f"找到 {len(stretch)} 個活動度與伸展動作")
 
 empty_count2 = 0
-for exercise in response2.data[:5]:
+for exercise in stretch[:5]:
     body_part = exercise.get('body_part', '')
     if not body_part:
         empty_count2 += 1
     print(f"  {exercise['name']}: body_part='{body_part}' {'❌' if not body_part else '✅'}")
 
-print(f"\n統計：{empty_count2}/{len(response2.data)} 個動作的 body_part 欄位為空")
+print(f"\n統計：{empty_count2}/{len(stretch)} 個動作的 body_part 欄位為空")
 
@@ -6,6 +6,7 @@ import sys
 import os
 from dotenv import load_dotenv
 from supabase import create_client, Client
+from exercise_catalog import load_catalog
 import json
 
 # 設置 UTF-8 輸出
@@ -89,6 +90,7 @@ def main():
             .execute()
         
         custom_exercise_ids = set()
+        catalog = load_catalog(supabase)
         
         for plan in response.data:
             exercises = plan.get('exercises', [])
@@ -98,13 +100,8 @@ def main():
                 
                 # 檢查是否為自訂動作（ID 以 custom_ 開頭或在 custom_exercises 表中）
                 if ex_id:
-                    # 檢查是否在系統動作中
-                    sys_response = supabase.table('exercises')\
-                        .select('id')\
-                        .eq('id', ex_id)\
-                        .execute()
-                    
-                    if not sys_response.data:
+                    # 檢查是否在系統動作中（本機動作目錄）
+                    if not catalog.get(ex_id):
                         custom_exercise_ids.add(ex_id)
                         print(f"\n找到自訂動作: {ex_name} (ID: {ex_id})")
                         print(f"  出現在訓練: {plan['title']}")
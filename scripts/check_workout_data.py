@@ -1,12 +1,20 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-"""檢查訓練計劃中的動作數據"""
+"""檢查訓練計劃中的動作數據
+
+使用方式:
+    python scripts/check_workout_data.py [--local]
+
+--local 改查本機副本 database_export/database.sqlite（不需連線 Supabase，
+先執行 download_complete_database.py --sqlite）
+"""
 
 import sys
 import os
 from dotenv import load_dotenv
 from supabase import create_client, Client
 import json
+from local_replica import open_replica
 
 # 設置 UTF-8 輸出
 sys.stdout.reconfigure(encoding='utf-8')
@@ -26,19 +34,45 @@ if os.path.exists(ENV_FILE):
     load_dotenv(temp_env)
     os.remove(temp_env)
 
+# 查詢本機副本
+LOCAL_MODE = '--local' in sys.argv
+
 # Supabase 配置
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 
-if not SUPABASE_URL or not SUPABASE_KEY:
+if not LOCAL_MODE and (not SUPABASE_URL or not SUPABASE_KEY):
     print("[ERROR] 請設置 SUPABASE_URL 和 SUPABASE_SERVICE_ROLE_KEY 環境變數")
     sys.exit(1)
 
 # 初始化 Supabase Client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+supabase: Client = None if LOCAL_MODE else create_client(SUPABASE_URL, SUPABASE_KEY)
 
 USER_ID = 'd1798674-0b96-4c47-a7c7-ee20a5372a03'
 
+def latest_plan() -> dict:
+    """最近一筆訓練計劃（沒有則為 None）"""
+    if LOCAL_MODE:
+        row = open_replica().execute(
+            "SELECT id, title, completed, exercises FROM workout_plans "
+            "WHERE user_id = ? ORDER BY scheduled_date IS NULL DESC, scheduled_date DESC LIMIT 1",
+            (USER_ID,)
+        ).fetchone()
+        if row is None:
+            return None
+        plan = dict(row)
+        plan['completed'] = bool(plan['completed'])
+        plan['exercises'] = json.loads(plan['exercises']) if plan['exercises'] else None
+        return plan
+    
+    response = supabase.table('workout_plans')\
+        .select('id, title, completed, exercises')\
+        .eq('user_id', USER_ID)\
+        .order('scheduled_date', desc=True)\
+        .limit(1)\
+        .execute()
+    return response.data[0] if response.data else None
+
 def main():
     print("=" * 80)
     print("檢查訓練計劃數據")
@@ -46,19 +80,12 @@ def main():
     
     try:
         # 查詢最近一筆訓練計劃
-        response = supabase.table('workout_plans')\
-            .select('id, title, completed, exercises')\
-            .eq('user_id', USER_ID)\
-            .order('scheduled_date', desc=True)\
-            .limit(1)\
-            .execute()
+        plan = latest_plan()
         
-        if not response.data:
+        if not plan:
             print("❌ 沒有找到訓練計劃")
             return
         
-        plan = response.data[0]
-        
         print(f"\n📋 訓練計劃 ID: {plan['id']}")
         print(f"📝 標題: {plan['title']}")
         print(f"✅ 完成狀態: {plan['completed']}")
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+命令列選項讀取（所有腳本共用）
+
+各腳本原本各自複製一份 get_option，整數與「可省略值」的選項也各寫一次。
+這裡統一讀取 sys.argv 中的 --name=value 形式：
+- get_option           --name=value，未指定時回傳預設值
+- get_int_option       --name=N（至少為 1）
+- get_optional_option  --name 或 --name=value，未指定時回傳 None
+
+使用方式:
+    from cli_options import get_option, get_int_option
+
+    formats = get_option('--formats', 'json')
+    workers = get_int_option('--workers', 4)
+"""
+
+import sys
+from typing import Optional
+
+def get_option(name: str, default: str) -> str:
+    """讀取 --name=value"""
+    for arg in sys.argv:
+        if arg.startswith(name + '='):
+            return arg.split('=', 1)[1]
+    return default
+
+def get_int_option(name: str, default: int) -> int:
+    """讀取 --name=N（至少為 1）"""
+    value = get_option(name, '')
+    return max(1, int(value)) if value else default
+
+def get_optional_option(name: str, default: str) -> Optional[str]:
+    """讀取 --name 或 --name=value（值為空時用 default），未指定時回傳 None"""
+    for arg in sys.argv:
+        if arg == name:
+            return default
+        if arg.startswith(name + '='):
+            return arg.split('=', 1)[1] or default
+    return None
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PostgreSQL COPY 輸出（假資料生成腳本共用）
+
+加上 --emit-copy 時，生成腳本不透過 REST API 寫入，而是把資料寫成
+COPY 用的 CSV 檔案（每個表格一個），並產生 load.sql：
+
+    psql "$DATABASE_URL" -f data/copy/load.sql
+
+load.sql 在同一個交易裡依序執行前置 SQL（例如刪除舊資料）、\\copy
+與後續 SQL（例如重建彙總），任何一步失敗就整個回滾。
+
+CSV 格式：
+- NULL 為未加引號的空欄位，字串一律加引號（空字串為 ""）
+- dict / list 轉成精簡 JSON（JSONB 欄位）
+- 布林值為 true / false
+- 欄位以第一筆資料的鍵為準，沒列出的欄位使用資料庫預設值
+
+使用方式:
+    from copy_output import CopyWriter, get_copy_dir
+
+    writer = CopyWriter(get_copy_dir())
+    writer.write('workout_plans', records)
+    writer.close()
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+from cli_options import get_optional_option
+
+# --emit-copy 未指定目錄時的輸出位置
+DEFAULT_COPY_DIR = os.path.join('data', 'copy')
+LOAD_SCRIPT = 'load.sql'
+
+def get_copy_dir(default: str = DEFAULT_COPY_DIR) -> Optional[str]:
+    """讀取 --emit-copy 或 --emit-copy=DIR，未指定時回傳 None"""
+    return get_optional_option('--emit-copy', default)
+
+def copy_value(value: Any) -> str:
+    """單一欄位 → COPY CSV 文字"""
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+    return '"' + str(value).replace('"', '""') + '"'
+
+def sql_literal(value: str) -> str:
+    """SQL 字串常值"""
+    return "'" + value.replace("'", "''") + "'"
+
+class CopyWriter:
+    """把多個表格的資料寫成 COPY CSV，close() 時產生 load.sql"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.columns: Dict[str, List[str]] = {}
+        self.counts: Dict[str, int] = {}
+        self.statements: List[str] = []
+        self.after_statements: List[str] = []
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, table: str) -> str:
+        """表格的 CSV 檔案路徑"""
+        return os.path.join(self.directory, f"{table}.csv")
+
+    def execute(self, statement: str, after_copy: bool = False):
+        """加入在 \\copy 之前（after_copy=True 時為之後）執行的 SQL"""
+        target = self.after_statements if after_copy else self.statements
+        target.append(statement.rstrip().rstrip(';') + ';')
+
+    def write(self, table: str, records: Iterable[Dict]) -> int:
+        """附加資料到 <table>.csv，回傳本次筆數
+
+        同一個表格可以寫入多次；第一次寫入決定欄位，之後出現的新欄位視為錯誤，
+        缺少的欄位寫入 NULL。
+        """
+        count = 0
+        mode = 'a' if table in self.columns else 'w'
+        with open(self.path(table), mode, encoding='utf-8', newline='') as f:
+            for record in records:
+                columns = self.columns.get(table)
+                if columns is None:
+                    columns = self.columns[table] = list(record)
+                    self.counts[table] = 0
+                    f.write(','.join(columns) + '\n')
+                extra = [key for key in record if key not in columns]
+                if extra:
+                    raise ValueError(f"{table} 的資料出現未宣告的欄位: {', '.join(extra)}")
+                f.write(','.join(copy_value(record.get(column)) for column in columns) + '\n')
+                count += 1
+        if table in self.counts:
+            self.counts[table] += count
+        return count
+
+    def close(self) -> str:
+        """產生 load.sql，回傳路徑"""
+        lines = [
+            f"-- 載入方式: psql \"$DATABASE_URL\" -f {os.path.join(self.directory, LOAD_SCRIPT)}",
+            "\\set ON_ERROR_STOP on",
+            "BEGIN;",
+        ]
+        lines.extend(self.statements)
+        for table, columns in self.columns.items():
+            source = os.path.abspath(self.path(table)).replace(os.sep, '/')
+            lines.append(
+                f"\\copy {table} ({', '.join(columns)}) FROM {sql_literal(source)} "
+                "WITH (FORMAT csv, HEADER true)"
+            )
+        lines.extend(self.after_statements)
+        lines.append("COMMIT;")
+        path = os.path.join(self.directory, LOAD_SCRIPT)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        return path
+
+    def summary(self) -> List[str]:
+        """每個表格的筆數與檔案"""
+        return [f"{table}: {count} 筆 → {self.path(table)}" for table, count in self.counts.items()]
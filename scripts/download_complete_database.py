@@ -6,34 +6,110 @@ Download Complete Supabase Database
 This script will:
 1. Connect to Supabase
 2. Download all table data (9 tables)
-3. Save as JSON format
-4. Generate database structure report
+3. Stream each table to disk page by page as NDJSON (one row per line)
+4. Generate database structure report from statistics accumulated while
+   the pages arrive (no second pass over the downloaded data)
+
+Tables are fetched with keyset pagination (id > last id, ordered by primary
+key), so exports are no longer truncated at the PostgREST max-rows limit and
+peak memory stays at one page regardless of table size. Up to --workers
+tables are downloaded at the same time, each worker with its own client.
+
+After every page a <table>.checkpoint.json is written next to the partial
+<table>.ndjson.tmp file. If a download is interrupted, the next run resumes
+after the last checkpointed id instead of starting the table over.
+
+With --partition=workout_plans:4, a large table is split into 4 disjoint
+created_at ranges fetched by parallel workers; the per-range files are then
+stitched into one <table>.ndjson in range order (id order within a range).
+If the ranges cannot be computed (no created_at column, failed min/max
+probe), the table is downloaded as a single keyset range instead.
+
+With --delta, only rows whose updated_at is at or after the watermark stored
+in database_export/manifest.json are fetched and merged into the existing
+snapshot files; deleted rows are found by diffing an id-only listing. Tables
+without a watermark or snapshot fall back to a full download, and an
+interrupted full or partitioned download is finished before delta is used.
+
+With --parquet, workout_plans is also flattened to one row per set and
+written as database_export/workout_sets.parquet (requires pyarrow), so
+volume and PR analysis can read columns instead of re-parsing the nested
+exercises -> sets JSON.
+
+With --formats=csv,parquet,sqlite (or json), every downloaded
+snapshot is converted locally through export_engine into <table>.csv,
+<table>.parquet and database_export/database.sqlite, so all formats cost a
+single network pass.
+
+With --verify, each table is first checked with a HEAD request
+(count='exact') plus its latest watermark (order desc, limit 1), and the
+result is compared with manifest.json. Only tables whose count, watermark
+or column selection changed (or whose snapshot is missing) are fetched
+again, combined with --delta when given; the rest keep their snapshot.
+Tables without a watermark column are compared by count only.
+
+With --profile=catalog-min (or lite) and --exclude=drawing_points, only
+the needed columns are selected instead of select('*'). The id and watermark
+columns are always kept; the projection is stored in the manifest, and a
+table whose projection changed is downloaded in full instead of delta-merged.
+Statistics and --parquet only see the selected columns.
+
+With --sqlite (same as adding sqlite to --formats), database.sqlite becomes
+a local replica for offline queries: indexes on user_id, training_type,
+completed_date and friends, plus a workout_sets table flattened from
+workout_plans.exercises with JSON1 (see local_replica.py). The check_*
+scripts query it with --local instead of calling Supabase.
+
+With --compress=gzip (or zstd, requires zstandard), snapshots are written
+as compact <table>.ndjson.gz / .ndjson.zst, one compressed block per page.
+Tools that read database_export/ pick up any format through snapshot_io.
 
 Usage:
-    python scripts/download_complete_database.py
+    python scripts/download_complete_database.py [--page-size=1000] [--workers=4] [--delta] [--verify]
+                                                 [--partition=workout_plans:4,notes:2]
+                                                 [--parquet] [--compress=gzip|zstd]
+                                                 [--formats=csv,parquet,sqlite] [--sqlite]
+                                                 [--profile=catalog-min|lite] [--exclude=drawing_points]
 
 Output:
     - database_export/
-        |- users.json                (User data)
-        |- exercises.json            (System exercises - 794 records)
-        |- custom_exercises.json     (User custom exercises)
-        |- workout_plans.json        (Workout plans and records)
-        |- workout_templates.json    (Workout templates)
-        |- body_data.json            (Body measurements)
-        |- notes.json                (User notes)
-        |- body_parts.json           (Metadata: body parts)
-        |- exercise_types.json       (Metadata: exercise types)
+        |- users.ndjson                (User data)
+        |- exercises.ndjson            (System exercises - 794 records)
+        |- custom_exercises.ndjson     (User custom exercises)
+        |- workout_plans.ndjson        (Workout plans and records)
+        |- workout_templates.ndjson    (Workout templates)
+        |- body_data.ndjson            (Body measurements)
+        |- notes.ndjson                (User notes)
+        |- body_parts.ndjson           (Metadata: body parts)
+        |- exercise_types.ndjson       (Metadata: exercise types)
+        |- manifest.json               (Per-table count and updated_at watermark)
+        |- workout_sets.parquet        (--parquet: one row per set of workout_plans)
+        |- <table>.csv / .parquet      (--formats)
+        |- database.sqlite             (--sqlite: one table per downloaded table + workout_sets)
     
     - docs/DATABASE_SUPABASE.md      (Updated with latest statistics)
 """
 
 import sys
 import os
+import glob
 import json
-from datetime import datetime
-from typing import List, Dict, Any
+import time
+import shutil
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, date
+from typing import List, Dict, Any, Iterator, Optional, Callable
 from dotenv import load_dotenv
 from supabase import create_client, Client
+from cli_options import get_option
+from snapshot_io import NDJSON_SUFFIXES, check_compression, encode_rows, iter_records, write_records
+from local_replica import REPLICA_FILE, build_replica
+from export_engine import (
+    iter_pages, open_sinks, export_snapshot, parse_formats,
+    parse_profile, parse_exclude, select_columns,
+)
 
 # Set UTF-8 output
 sys.stdout.reconfigure(encoding='utf-8')
@@ -65,35 +141,774 @@ if not SUPABASE_URL or not SUPABASE_KEY:
     print("        Make sure .env file exists and contains correct values")
     sys.exit(1)
 
-# Initialize Supabase Client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+EXPORT_DIR = "database_export"
+
+# Rows per request (PostgREST default max-rows is 1000)
+DEFAULT_PAGE_SIZE = 1000
+
+# Primary key used to give pages a stable order
+PRIMARY_KEY = "id"
+
+# Tables downloaded at the same time
+DEFAULT_WORKERS = 4
+
+MANIFEST_FILE = os.path.join(EXPORT_DIR, "manifest.json")
+
+# Timestamp columns used as delta watermarks (None = always full download)
+WATERMARK_COLUMNS = {
+    "users": ["profile_updated_at"],
+    "exercises": ["updated_at"],
+    "custom_exercises": None,  # No updated_at column
+    "workout_plans": ["updated_at"],
+    "workout_templates": ["updated_at"],
+    "body_data": ["updated_at", "created_at"],  # updated_at is only set on edit
+    "notes": ["updated_at"],
+    "body_parts": ["updated_at"],
+    "exercise_types": ["updated_at"],
+}
+
+# Column used to split a single table into parallel ranges
+PARTITION_COLUMN = "created_at"
+
+# Sets buffered before each Parquet row group is written
+PARQUET_BATCH_SIZE = 50000
+
+PAGE_SIZE = int(get_option("--page-size", str(DEFAULT_PAGE_SIZE)))
+WORKERS = max(1, int(get_option("--workers", str(DEFAULT_WORKERS))))
+DELTA_MODE = '--delta' in sys.argv
+VERIFY_MODE = '--verify' in sys.argv
+
+def parse_partitions(value: str) -> Dict[str, int]:
+    """Parse `table:N[,table:N...]` into range counts per table"""
+    partitions = {}
+    for item in value.split(","):
+        if ":" in item:
+            table_name, count = item.split(":", 1)
+            partitions[table_name.strip()] = max(1, int(count))
+    return partitions
+
+PARTITIONS = parse_partitions(get_option("--partition", ""))
+PARQUET_MODE = '--parquet' in sys.argv
+FORMATS = parse_formats(get_option("--formats", ""))
+if '--sqlite' in sys.argv and "sqlite" not in FORMATS:
+    FORMATS.append("sqlite")
+PROFILE = parse_profile(get_option("--profile", "full"))
+EXCLUDE = parse_exclude(get_option("--exclude", ""))
+COMPRESSION = check_compression(get_option("--compress", "none"))
+
+# Supabase clients are created per worker thread
+_thread_local = threading.local()
+_print_lock = threading.Lock()
+
+def get_client() -> Client:
+    """Get the Supabase client of the current thread"""
+    client = getattr(_thread_local, "client", None)
+    if client is None:
+        client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        _thread_local.client = client
+    return client
+
+def log(message: str):
+    """Print without interleaving lines from worker threads"""
+    with _print_lock:
+        print(message)
 
 def ensure_export_dir():
     """Ensure export directory exists"""
-    os.makedirs("database_export", exist_ok=True)
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+
+def table_file(table_name: str) -> str:
+    """Path of the NDJSON snapshot for a table (suffix follows --compress)"""
+    return os.path.join(EXPORT_DIR, table_name + NDJSON_SUFFIXES[COMPRESSION])
+
+def load_manifest() -> Dict[str, Any]:
+    """Load the snapshot manifest (empty if no snapshot was taken yet)"""
+    if not os.path.exists(MANIFEST_FILE):
+        return {"tables": {}}
+    with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_manifest(manifest: Dict[str, Any]):
+    """Save the snapshot manifest"""
+    manifest["exported_at"] = datetime.now().isoformat()
+    with open(MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    print(f"  Saved: {MANIFEST_FILE}")
+
+def row_watermark(row: Dict, columns: Optional[List[str]]) -> Optional[str]:
+    """Latest watermark timestamp of a row"""
+    values = [row[c] for c in (columns or []) if row.get(c)]
+    return max(values) if values else None
+
+def max_watermark(a: Optional[str], b: Optional[str]) -> Optional[str]:
+    """Later of two ISO timestamps, ignoring missing values"""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return max(a, b)
+
+def checkpoint_file(table_name: str) -> str:
+    """Path of the resume checkpoint for a table download"""
+    return os.path.join(EXPORT_DIR, f"{table_name}.checkpoint.json")
 
-def download_table(table_name: str) -> list:
-    """Download all data from specified table"""
-    print(f"Downloading {table_name}...")
+def load_checkpoint(table_name: str) -> Optional[Dict]:
+    """Load the checkpoint of an interrupted download, if it can be resumed"""
+    filepath = checkpoint_file(table_name)
+    if not os.path.exists(filepath) or not os.path.exists(table_file(table_name) + ".tmp"):
+        return None
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_checkpoint(table_name: str, checkpoint: Dict):
+    """Atomically write the checkpoint of a table download"""
+    filepath = checkpoint_file(table_name)
+    with open(filepath + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+    os.replace(filepath + ".tmp", filepath)
+
+def iter_table_pages(table_name: str, page_size: int = DEFAULT_PAGE_SIZE,
+                     columns: str = "*", since: Optional[str] = None,
+                     after: Optional[str] = None,
+                     where: Optional[Callable] = None) -> Iterator[List[Dict]]:
+    """Yield a table page by page using keyset pagination on the primary key
+
+    Each request asks for rows with id greater than the last id seen and
+    stops on an empty page, so a server-side max-rows smaller than page_size
+    cannot end the export early. With `since`, only rows whose watermark
+    columns are at or after that timestamp are returned; with `after`, the
+    listing starts after that id; `where` adds extra filters to the query.
+    """
+    def make_query():
+        query = get_client().table(table_name).select(columns)
+        if where:
+            query = where(query)
+        if since:
+            query = query.or_(",".join(
+                f'{column}.gte."{since}"' for column in WATERMARK_COLUMNS[table_name]
+            ))
+        return query
+    
+    return iter_pages(make_query, page_size, after)
+
+def table_columns(table_name: str) -> str:
+    """select list of a table for --profile / --exclude ('*' without projection)"""
+    required = [PRIMARY_KEY] + (WATERMARK_COLUMNS.get(table_name) or [])
+    return select_columns(get_client(), table_name, PROFILE, EXCLUDE, required)
+
+class RangeStats:
+    """Running min / max / mean of a numeric column"""
+    
+    def __init__(self):
+        self.n = 0
+        self.total = 0.0
+        self.low = None
+        self.high = None
+    
+    def add(self, value: Any):
+        if not value:
+            return
+        self.n += 1
+        self.total += value
+        self.low = value if self.low is None else min(self.low, value)
+        self.high = value if self.high is None else max(self.high, value)
+    
+    def merge(self, other: "RangeStats"):
+        if not other.n:
+            return
+        self.n += other.n
+        self.total += other.total
+        self.low = other.low if self.low is None else min(self.low, other.low)
+        self.high = other.high if self.high is None else max(self.high, other.high)
+
+class TableStats:
+    """Statistics of one table for the structure report, fed page by page
+
+    Only counters and ranges are kept (plus the name lists of the small
+    metadata tables), so the report does not need the table in memory.
+    """
+    
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+        self.count = 0
+        self.sample = None
+        self.categories = Counter()   # exercises.training_type / custom_exercises.body_part
+        self.completed = 0
+        self.completed_volume = 0.0
+        self.weight = RangeStats()
+        self.body_fat = RangeStats()
+        self.names = []               # body_parts / exercise_types
+    
+    def add_rows(self, rows):
+        """Accumulate an iterable of rows"""
+        for item in rows:
+            self.count += 1
+            if self.sample is None:
+                self.sample = item
+            
+            if self.table_name == "exercises":
+                self.categories[item.get('training_type', 'Unknown')] += 1
+            elif self.table_name == "custom_exercises":
+                self.categories[item.get('body_part', 'Unknown')] += 1
+            elif self.table_name == "workout_plans":
+                if item.get('completed'):
+                    self.completed += 1
+                    self.completed_volume += item.get('total_volume') or 0
+            elif self.table_name == "body_data":
+                self.weight.add(item.get('weight'))
+                self.body_fat.add(item.get('body_fat'))
+            elif self.table_name in ("body_parts", "exercise_types"):
+                self.names.append(item.get('name', 'Unknown'))
+    
+    def merge(self, other: "TableStats"):
+        """Combine the statistics of another range of the same table"""
+        self.count += other.count
+        if self.sample is None:
+            self.sample = other.sample
+        self.categories.update(other.categories)
+        self.completed += other.completed
+        self.completed_volume += other.completed_volume
+        self.weight.merge(other.weight)
+        self.body_fat.merge(other.body_fat)
+        self.names.extend(other.names)
+    
+    def report_lines(self) -> List[str]:
+        """Markdown section of this table"""
+        doc = [f"\n## Table: {self.table_name}", f"\n**Record Count**: {self.count}"]
+        if not self.count:
+            return doc
+        
+        # Columns of the first row
+        doc.append(f"\n### Columns ({len(self.sample.keys())})")
+        doc.append("\n| Column | Type | Sample Value |")
+        doc.append("|--------|------|--------------|")
+        for key, value in self.sample.items():
+            value_type = type(value).__name__
+            sample_value = str(value)[:50] + "..." if len(str(value)) > 50 else str(value)
+            doc.append(f"| {key} | {value_type} | {sample_value} |")
+        
+        doc.append(f"\n### Statistics")
+        doc.append(f"- Total records: {self.count}")
+        
+        if self.table_name == "exercises":
+            doc.append("\n**Training Types:**")
+            for t_type, count in self.categories.most_common():
+                doc.append(f"- {t_type}: {count}")
+        
+        elif self.table_name == "custom_exercises":
+            doc.append("\n**Body Parts Distribution:**")
+            for bp, count in self.categories.most_common():
+                doc.append(f"- {bp}: {count}")
+        
+        elif self.table_name == "workout_plans":
+            doc.append(f"- Completed: {self.completed}")
+            doc.append(f"- Pending: {self.count - self.completed}")
+            doc.append(f"- Total training volume: {self.completed_volume:.1f} kg")
+        
+        elif self.table_name == "workout_templates":
+            doc.append(f"- User templates: {self.count}")
+        
+        elif self.table_name == "body_data":
+            if self.weight.n:
+                doc.append(f"- Weight range: {self.weight.low:.1f} - {self.weight.high:.1f} kg")
+                doc.append(f"- Average weight: {self.weight.total / self.weight.n:.1f} kg")
+            if self.body_fat.n:
+                doc.append(f"- Body fat range: {self.body_fat.low:.1f}% - {self.body_fat.high:.1f}%")
+        
+        elif self.table_name == "body_parts":
+            doc.append(f"\n**Body Parts:**")
+            for name in sorted(self.names):
+                doc.append(f"- {name}")
+        
+        elif self.table_name == "exercise_types":
+            doc.append(f"\n**Exercise Types:**")
+            for name in sorted(self.names):
+                doc.append(f"- {name}")
+        
+        return doc
+
+def stats_from_file(table_name: str, filepath: str) -> TableStats:
+    """Statistics of an existing snapshot file (local read, no download)"""
+    stats = TableStats(table_name)
+    if os.path.exists(filepath):
+        stats.add_rows(iter_records(filepath))
+    return stats
+
+def download_table(table_name: str, page_size: int = DEFAULT_PAGE_SIZE,
+                   part: Optional[int] = None, where: Optional[Callable] = None,
+                   columns: str = "*") -> Optional[Dict]:
+    """Stream all rows of a table to its NDJSON file, resuming from a checkpoint
+
+    With `part`, only the rows matching `where` are written to the range
+    file <table>.part<N>.ndjson. Returns the manifest entry (count,
+    watermark and selected columns) with the table statistics under "stats",
+    or None on failure. On failure the partial file and checkpoint are kept
+    for the next run.
+    """
+    name = table_name if part is None else f"{table_name}.part{part}"
+    filepath = table_file(name)
+    temp_path = filepath + ".tmp"
+    watermark_columns = WATERMARK_COLUMNS.get(table_name)
+    
+    checkpoint = load_checkpoint(name)
+    if checkpoint and checkpoint.get("columns", "*") != columns:
+        log(f"  {name}: column selection changed, restarting download")
+        checkpoint = None
     
     try:
-        response = supabase.table(table_name).select("*").execute()
-        data = response.data
-        print(f"  {table_name}: {len(data)} records")
-        return data
+        if checkpoint:
+            log(f"Resuming {name} after id {checkpoint['last_id']} "
+                f"({checkpoint['count']} records already saved)...")
+            # Drop anything written after the last complete page
+            with open(temp_path, 'r+b') as f:
+                f.truncate(checkpoint["bytes"])
+            mode = 'ab'
+            # Rows saved before the interruption are only counted, not re-fetched
+            stats = stats_from_file(table_name, temp_path)
+        else:
+            log(f"Downloading {name}...")
+            checkpoint = {"last_id": None, "count": 0, "watermark": None, "bytes": 0,
+                          "columns": columns}
+            mode = 'wb'
+            stats = TableStats(table_name)
+        
+        with open(temp_path, mode) as f:
+            for rows in iter_table_pages(table_name, page_size, columns=columns,
+                                         after=checkpoint["last_id"], where=where):
+                # One self-contained (compressed) block per page
+                f.write(encode_rows(rows, COMPRESSION))
+                stats.add_rows(rows)
+                for row in rows:
+                    checkpoint["watermark"] = max_watermark(
+                        checkpoint["watermark"], row_watermark(row, watermark_columns)
+                    )
+                f.flush()
+                os.fsync(f.fileno())
+                
+                checkpoint["last_id"] = rows[-1][PRIMARY_KEY]
+                checkpoint["count"] += len(rows)
+                checkpoint["bytes"] = os.path.getsize(temp_path)
+                save_checkpoint(name, checkpoint)
+                log(f"  [{name}] {checkpoint['count']} records...")
+        
+        # Only replace the previous snapshot once the table is complete
+        os.replace(temp_path, filepath)
+        if os.path.exists(checkpoint_file(name)):
+            os.remove(checkpoint_file(name))
+        log(f"  {name}: {checkpoint['count']} records, saved: {filepath}")
+        return {"count": checkpoint["count"], "watermark": checkpoint["watermark"],
+                "columns": columns, "stats": stats}
     except Exception as e:
-        print(f"  Failed to download {table_name}: {e}")
+        log(f"  Failed to download {name}: {e}")
+        log(f"  Progress kept in {checkpoint_file(name)}, re-run to resume")
+        return None
+
+def partition_plan_file(table_name: str) -> str:
+    """Path of the range plan of a partitioned download"""
+    return os.path.join(EXPORT_DIR, f"{table_name}.partitions.json")
+
+def part_files(table_name: str) -> List[str]:
+    """Range files, partial files and checkpoints left by a partitioned download"""
+    pattern = os.path.join(EXPORT_DIR, f"{glob.escape(table_name)}.part*")
+    return [path for path in glob.glob(pattern) if os.path.basename(path)[len(table_name) + 5:][:1].isdigit()]
+
+def has_interrupted_download(table_name: str) -> bool:
+    """A full or partitioned download of the table was started but not finished"""
+    return bool(
+        load_checkpoint(table_name)
+        or os.path.exists(partition_plan_file(table_name))
+        or any(path.endswith(".checkpoint.json") for path in part_files(table_name))
+    )
+
+def clear_partition_state(table_name: str):
+    """Remove the range plan and range files of an earlier partitioned download"""
+    for path in part_files(table_name) + [partition_plan_file(table_name)]:
+        if os.path.exists(path):
+            os.remove(path)
+
+def save_partition_plan(table_name: str, plan: Dict):
+    """Save the range plan (written before the ranges start, so a crash can resume)"""
+    with open(partition_plan_file(table_name), 'w', encoding='utf-8') as f:
+        json.dump(plan, f, ensure_ascii=False, indent=2)
+
+def partition_bounds(table_name: str, partitions: int) -> List[str]:
+    """Split the created_at span of a table into equal-width ranges
+
+    Returns the inner boundaries (partitions - 1 timestamps, ascending);
+    an empty list means the table is fetched as a single range.
+    """
+    def edge(desc: bool) -> Optional[str]:
+        rows = get_client().table(table_name)\
+            .select(PARTITION_COLUMN)\
+            .not_.is_(PARTITION_COLUMN, "null")\
+            .order(PARTITION_COLUMN, desc=desc)\
+            .limit(1)\
+            .execute().data
+        return rows[0][PARTITION_COLUMN] if rows else None
+    
+    lowest, highest = edge(False), edge(True)
+    if not lowest or not highest or lowest == highest:
         return []
+    
+    start = datetime.fromisoformat(lowest)
+    span = datetime.fromisoformat(highest) - start
+    return [(start + span * i / partitions).isoformat() for i in range(1, partitions)]
 
-def save_json(data: any, filename: str):
-    """Save data as JSON file"""
-    filepath = os.path.join("database_export", filename)
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2, default=str)
-    print(f"  Saved: {filepath}")
+def partition_filter(lower: Optional[str], upper: Optional[str]) -> Callable:
+    """Query filter for created_at in [lower, upper); the first range also takes NULLs"""
+    def apply(query):
+        if lower is not None:
+            query = query.gte(PARTITION_COLUMN, lower)
+        if upper is not None:
+            if lower is None:
+                query = query.or_(f'{PARTITION_COLUMN}.lt."{upper}",{PARTITION_COLUMN}.is.null')
+            else:
+                query = query.lt(PARTITION_COLUMN, upper)
+        return query
+    return apply
 
-def download_all_tables() -> Dict[str, List]:
-    """Download all tables"""
+def download_partitioned(table_name: str, partitions: int,
+                         page_size: int = DEFAULT_PAGE_SIZE, columns: str = "*") -> Optional[Dict]:
+    """Fetch disjoint created_at ranges of one table in parallel and stitch them
+
+    The range plan is kept in <table>.partitions.json until the table is
+    complete, so a re-run resumes with the same ranges and skips finished ones.
+    """
+    plan_path = partition_plan_file(table_name)
+    plan = None
+    if os.path.exists(plan_path):
+        with open(plan_path, 'r', encoding='utf-8') as f:
+            plan = json.load(f)
+        if plan.get("columns", "*") != columns:
+            plan = None  # Finished ranges have other columns
+    if plan is None:
+        # Range files of another plan must not be stitched into this one
+        clear_partition_state(table_name)
+        try:
+            bounds = partition_bounds(table_name, partitions)
+        except Exception as e:
+            # e.g. no created_at column or a failed min/max probe
+            log(f"  {table_name}: cannot split by {PARTITION_COLUMN} ({e}), downloading as one range")
+            return download_table(table_name, page_size, columns=columns)
+        plan = {"bounds": bounds, "parts": {}, "columns": columns}
+        save_partition_plan(table_name, plan)
+    
+    bounds = plan["bounds"]
+    ranges = list(zip([None] + bounds, bounds + [None]))
+    log(f"Downloading {table_name} in {len(ranges)} ranges by {PARTITION_COLUMN}...")
+    
+    def download_part(part: int) -> Optional[Dict]:
+        done = plan["parts"].get(str(part))
+        part_file = table_file(f"{table_name}.part{part}")
+        if done and os.path.exists(part_file):
+            return dict(done, stats=stats_from_file(table_name, part_file))
+        lower, upper = ranges[part]
+        return download_table(table_name, page_size, part=part,
+                              where=partition_filter(lower, upper), columns=columns)
+    
+    with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+        results = list(executor.map(download_part, range(len(ranges))))
+    
+    for part, state in enumerate(results):
+        if state is not None:
+            plan["parts"][str(part)] = {k: v for k, v in state.items() if k != "stats"}
+    save_partition_plan(table_name, plan)
+    
+    if any(state is None for state in results):
+        log(f"  Failed to download {table_name}: some ranges failed, re-run to resume")
+        return None
+    
+    # Stitch range files in range order into the table snapshot
+    filepath = table_file(table_name)
+    with open(filepath + ".tmp", 'wb') as out:
+        for part in range(len(ranges)):
+            with open(table_file(f"{table_name}.part{part}"), 'rb') as f:
+                shutil.copyfileobj(f, out)
+    os.replace(filepath + ".tmp", filepath)
+    
+    for part in range(len(ranges)):
+        os.remove(table_file(f"{table_name}.part{part}"))
+    os.remove(plan_path)
+    
+    count = sum(state["count"] for state in results)
+    watermark = None
+    stats = TableStats(table_name)
+    for state in results:
+        watermark = max_watermark(watermark, state["watermark"])
+        stats.merge(state["stats"])
+    log(f"  {table_name}: {count} records from {len(ranges)} ranges, saved: {filepath}")
+    return {"count": count, "watermark": watermark, "columns": columns, "stats": stats}
+
+def delta_table(table_name: str, state: Dict, page_size: int = DEFAULT_PAGE_SIZE,
+                columns: str = "*") -> Optional[Dict]:
+    """Merge rows changed since the last watermark into the NDJSON snapshot
+
+    Returns the updated manifest entry, or None on failure.
+    """
+    log(f"Downloading {table_name} (delta since {state['watermark']})...")
+    
+    filepath = table_file(table_name)
+    temp_path = filepath + ".tmp"
+    watermark_columns = WATERMARK_COLUMNS[table_name]
+    watermark = state["watermark"]
+    
+    try:
+        # Changed and new rows (small compared to the table)
+        changed = {}
+        for rows in iter_table_pages(table_name, page_size, columns=columns,
+                                     since=state["watermark"]):
+            for row in rows:
+                changed[row[PRIMARY_KEY]] = row
+                watermark = max_watermark(watermark, row_watermark(row, watermark_columns))
+        
+        # Id-only listing to detect deleted rows
+        live_ids = set()
+        for rows in iter_table_pages(table_name, page_size, columns=PRIMARY_KEY):
+            live_ids.update(row[PRIMARY_KEY] for row in rows)
+        
+        merge = {"updated": 0, "deleted": 0}
+        stats = TableStats(table_name)
+        
+        def merged_rows() -> Iterator[Dict]:
+            for row in iter_records(filepath):
+                row_id = row[PRIMARY_KEY]
+                if row_id not in live_ids:
+                    merge["deleted"] += 1
+                    continue
+                if row_id in changed:
+                    row = changed.pop(row_id)
+                    merge["updated"] += 1
+                stats.add_rows((row,))
+                yield row
+            
+            # Remaining changed rows are new
+            stats.add_rows(changed.values())
+            yield from changed.values()
+        
+        count = write_records(temp_path, merged_rows(), COMPRESSION)
+        
+        os.replace(temp_path, filepath)
+        log(f"  {table_name}: {merge['updated']} updated, {len(changed)} new, "
+            f"{merge['deleted']} deleted, {count} records, saved: {filepath}")
+        return {"count": count, "watermark": watermark, "columns": columns, "stats": stats}
+    except Exception as e:
+        log(f"  Failed to download {table_name}: {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return None
+
+def sync_table(table_name: str, state: Optional[Dict], page_size: int = DEFAULT_PAGE_SIZE) -> Optional[Dict]:
+    """Delta-merge a table when possible, otherwise download it in full"""
+    try:
+        columns = table_columns(table_name)
+    except Exception as e:
+        log(f"  Failed to download {table_name}: {e}")
+        return None
+    
+    can_delta = (
+        DELTA_MODE
+        and WATERMARK_COLUMNS.get(table_name)
+        and state
+        and state.get("watermark")
+        and state.get("columns", "*") == columns  # Snapshot rows have the same columns
+        and os.path.exists(table_file(table_name))
+        and not has_interrupted_download(table_name)  # Finish an interrupted download first
+    )
+    if can_delta:
+        return delta_table(table_name, state, page_size, columns)
+    if table_name in PARTITIONS or os.path.exists(partition_plan_file(table_name)):
+        # An unfinished range plan is resumed even without --partition
+        return download_partitioned(table_name, PARTITIONS.get(table_name, 1), page_size, columns)
+    # Range files without a plan cannot be resumed
+    clear_partition_state(table_name)
+    return download_table(table_name, page_size, columns=columns)
+
+def to_int(value: Any) -> Optional[int]:
+    """Convert a JSON number (or numeric string) to int, None if invalid"""
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+def to_float(value: Any) -> Optional[float]:
+    """Convert a JSON number (or numeric string) to float, None if invalid"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def plan_date(plan: Dict) -> Optional[date]:
+    """Training date of a plan (completed date, else scheduled date)"""
+    value = plan.get("completed_date") or plan.get("scheduled_date")
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+def iter_workout_sets(plans: Iterator[Dict]) -> Iterator[Dict]:
+    """Flatten workout plans into one record per set
+
+    Exercises whose `sets` is not a list (template-style WorkoutExercise
+    entries that only store a set count) have no set records and are skipped.
+    """
+    for plan in plans:
+        day = plan_date(plan)
+        for exercise in plan.get("exercises") or []:
+            sets = exercise.get("sets")
+            if not isinstance(sets, list):
+                continue
+            for index, set_record in enumerate(sets):
+                yield {
+                    "plan_id": plan.get("id"),
+                    "user_id": plan.get("user_id"),
+                    "date": day,
+                    "exerciseId": exercise.get("exerciseId"),
+                    "setNumber": to_int(set_record.get("setNumber")) or index + 1,
+                    "reps": to_int(set_record.get("reps")),
+                    "weight": to_float(set_record.get("weight")),
+                    "completed": bool(set_record.get("completed")),
+                }
+
+def export_workout_sets_parquet() -> int:
+    """Write the set-level table of workout_plans as Parquet, return the set count
+
+    Streams the workout_plans snapshot and writes one row group per
+    PARQUET_BATCH_SIZE sets, so memory stays bounded for any table size.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("  [ERROR] --parquet requires pyarrow (pip install pyarrow)")
+        return 0
+    
+    source = table_file("workout_plans")
+    if not os.path.exists(source):
+        print(f"  Skipped Parquet export: {source} not found")
+        return 0
+    
+    print("\nWriting set-level Parquet...")
+    schema = pa.schema([
+        ("plan_id", pa.string()),
+        ("user_id", pa.string()),
+        ("date", pa.date32()),
+        ("exerciseId", pa.string()),
+        ("setNumber", pa.int32()),
+        ("reps", pa.int32()),
+        ("weight", pa.float64()),
+        ("completed", pa.bool_()),
+    ])
+    filepath = os.path.join(EXPORT_DIR, "workout_sets.parquet")
+    
+    count = 0
+    batch = {name: [] for name in schema.names}
+    with pq.ParquetWriter(filepath + ".tmp", schema, compression="zstd") as writer:
+        for record in iter_workout_sets(iter_records(source)):
+            for name in schema.names:
+                batch[name].append(record[name])
+            count += 1
+            if len(batch["plan_id"]) >= PARQUET_BATCH_SIZE:
+                writer.write_table(pa.Table.from_pydict(batch, schema=schema))
+                batch = {name: [] for name in schema.names}
+        if batch["plan_id"]:
+            writer.write_table(pa.Table.from_pydict(batch, schema=schema))
+    os.replace(filepath + ".tmp", filepath)
+    
+    print(f"  workout_sets: {count} sets, saved: {filepath}")
+    return count
+
+def export_formats(table_names: List[str]):
+    """Write the downloaded snapshots in the extra --formats
+
+    Converts the local files through export_engine, so every format comes
+    from the same single download.
+    """
+    # The snapshot already is <table>.ndjson (compressed per --compress)
+    formats = [fmt for fmt in FORMATS if fmt != "ndjson"]
+    if "ndjson" in FORMATS:
+        print(f"\nndjson: the snapshots are already {NDJSON_SUFFIXES[COMPRESSION]} files")
+    if not formats:
+        return
+    print(f"\nWriting {', '.join(formats)}...")
+    manifest = load_manifest()
+    for table_name in table_names:
+        source = table_file(table_name)
+        if not os.path.exists(source):
+            log(f"  Skipped {table_name}: {source} not found")
+            continue
+        # Empty tables still get their projected columns
+        columns = manifest["tables"].get(table_name, {}).get("columns", "*")
+        sinks = open_sinks(formats, EXPORT_DIR, table_name, columns=columns)
+        count = export_snapshot(source, sinks)
+        log(f"  {table_name}: {count} records, saved: {', '.join(sink.path for sink in sinks)}")
+
+def remote_state(table_name: str) -> Dict:
+    """Current row count and latest watermark of a table, without fetching rows"""
+    client = get_client()
+    count = client.table(table_name)\
+        .select(PRIMARY_KEY, count="exact", head=True)\
+        .execute().count
+    
+    watermark = None
+    for column in WATERMARK_COLUMNS.get(table_name) or []:
+        rows = client.table(table_name)\
+            .select(column)\
+            .not_.is_(column, "null")\
+            .order(column, desc=True)\
+            .limit(1)\
+            .execute().data
+        if rows:
+            watermark = max_watermark(watermark, rows[0][column])
+    return {"count": count, "watermark": watermark}
+
+def verify_table(table_name: str, state: Optional[Dict]) -> Optional[str]:
+    """Reason why the snapshot of a table is stale, or None if it is up to date"""
+    if not state:
+        return "not in manifest"
+    if not os.path.exists(table_file(table_name)):
+        return "snapshot missing"
+    if has_interrupted_download(table_name):
+        return "interrupted download"
+    if state.get("columns", "*") != table_columns(table_name):
+        return "column selection changed"
+    
+    remote = remote_state(table_name)
+    changes = []
+    if remote["count"] != state.get("count"):
+        changes.append(f"count {state.get('count')} -> {remote['count']}")
+    if WATERMARK_COLUMNS.get(table_name) and remote["watermark"] != state.get("watermark"):
+        changes.append(f"watermark {state.get('watermark')} -> {remote['watermark']}")
+    return ", ".join(changes) or None
+
+def verify_tables(table_names: List[str], manifest: Dict[str, Any]) -> List[str]:
+    """Compare every table with the manifest, return the tables that changed"""
+    print("Verifying snapshot against manifest...")
+    
+    def check(table_name: str) -> Optional[str]:
+        try:
+            return verify_table(table_name, manifest["tables"].get(table_name))
+        except Exception as e:
+            return f"verification failed: {e}"
+    
+    with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        reasons = list(executor.map(check, table_names))
+    
+    stale = []
+    for table_name, reason in zip(table_names, reasons):
+        if reason:
+            print(f"  {table_name}: changed ({reason})")
+            stale.append(table_name)
+        else:
+            only_count = "" if WATERMARK_COLUMNS.get(table_name) else ", count only"
+            print(f"  {table_name}: up to date ({manifest['tables'][table_name]['count']} records{only_count})")
+    print(f"{len(stale)} of {len(table_names)} tables to fetch")
+    print("-" * 60)
+    return stale
+
+def download_all_tables() -> Dict[str, TableStats]:
+    """Download all tables concurrently, return the statistics per table"""
     print("\nDownloading all tables...")
     print("-" * 60)
     
@@ -116,23 +931,69 @@ def download_all_tables() -> Dict[str, List]:
     
     # 合併所有表格（9 個）
     all_tables = core_tables + metadata_tables
-    all_data = {}
+    table_stats = {}
     
     print(f"Total tables to download: {len(all_tables)}")
     print(f"Core tables: {', '.join(core_tables)}")
     print(f"Metadata tables: {', '.join(metadata_tables)}")
+    print(f"Page size: {PAGE_SIZE}")
+    print(f"Workers: {WORKERS}")
+    print(f"Mode: {'delta' if DELTA_MODE else 'full'}{' (verify first)' if VERIFY_MODE else ''}")
+    if PARTITIONS:
+        print(f"Partitioned: {', '.join(f'{t} x{n}' for t, n in PARTITIONS.items())}")
     print("-" * 60)
     
+    manifest = load_manifest()
+    table_times = {}
+    
+    # Up-to-date tables keep their snapshot; statistics are read locally
+    sync_tables = verify_tables(all_tables, manifest) if VERIFY_MODE else all_tables
     for table_name in all_tables:
-        data = download_table(table_name)
-        all_data[table_name] = data
-        
-        # Save complete data
-        save_json(data, f"{table_name}.json")
+        if table_name not in sync_tables:
+            table_stats[table_name] = stats_from_file(table_name, table_file(table_name))
     
-    return all_data
+    def timed_download(table_name: str) -> Optional[Dict]:
+        started = time.perf_counter()
+        state = sync_table(table_name, manifest["tables"].get(table_name), PAGE_SIZE)
+        table_times[table_name] = time.perf_counter() - started
+        return state
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        futures = {
+            executor.submit(timed_download, table_name): table_name
+            for table_name in sync_tables
+        }
+        for future in as_completed(futures):
+            table_name = futures[future]
+            state = future.result()
+            if state is None:
+                # Keep the previous manifest entry so the next delta retries,
+                # and report the previous snapshot (if any)
+                table_stats[table_name] = stats_from_file(table_name, table_file(table_name))
+                continue
+            table_stats[table_name] = state.pop("stats")
+            state["watermark_columns"] = WATERMARK_COLUMNS.get(table_name)
+            manifest["tables"][table_name] = state
+    wall_time = time.perf_counter() - started
+    
+    print_timing_summary(table_times, wall_time)
+    save_manifest(manifest)
+    
+    # Keep the declared table order for the report and summary
+    return {table_name: table_stats[table_name] for table_name in all_tables}
 
-def generate_structure_doc(all_data: Dict[str, List]):
+def print_timing_summary(table_times: Dict[str, float], wall_time: float):
+    """Print per-table download time next to the total wall time"""
+    print("\n" + "-" * 60)
+    print("Download Timing")
+    print("-" * 60)
+    for table_name, seconds in sorted(table_times.items(), key=lambda x: x[1], reverse=True):
+        print(f"  {table_name}: {seconds:.2f}s")
+    print(f"  Sum of table times: {sum(table_times.values()):.2f}s")
+    print(f"  Wall time ({WORKERS} workers): {wall_time:.2f}s")
+
+def generate_structure_doc(table_stats: Dict[str, TableStats]):
     """Generate complete database structure documentation"""
     print("\nGenerating structure documentation...")
     
@@ -141,87 +1002,12 @@ def generate_structure_doc(all_data: Dict[str, List]):
     doc.append(f"\nExported at: {datetime.now().isoformat()}\n")
     doc.append("=" * 80)
     
-    for table_name, data in all_data.items():
-        doc.append(f"\n## Table: {table_name}")
-        doc.append(f"\n**Record Count**: {len(data)}")
-        
-        if data:
-            # Get columns
-            sample = data[0]
-            doc.append(f"\n### Columns ({len(sample.keys())})")
-            doc.append("\n| Column | Type | Sample Value |")
-            doc.append("|--------|------|--------------|")
-            
-            for key, value in sample.items():
-                value_type = type(value).__name__
-                sample_value = str(value)[:50] + "..." if len(str(value)) > 50 else str(value)
-                doc.append(f"| {key} | {value_type} | {sample_value} |")
-            
-            # Statistics
-            doc.append(f"\n### Statistics")
-            doc.append(f"- Total records: {len(data)}")
-            
-            # Add table-specific statistics
-            if table_name == "exercises":
-                training_types = {}
-                for item in data:
-                    t_type = item.get('training_type', 'Unknown')
-                    training_types[t_type] = training_types.get(t_type, 0) + 1
-                
-                doc.append("\n**Training Types:**")
-                for t_type, count in sorted(training_types.items(), key=lambda x: x[1], reverse=True):
-                    doc.append(f"- {t_type}: {count}")
-            
-            elif table_name == "custom_exercises":
-                body_parts = {}
-                for item in data:
-                    bp = item.get('body_part', 'Unknown')
-                    body_parts[bp] = body_parts.get(bp, 0) + 1
-                
-                doc.append("\n**Body Parts Distribution:**")
-                for bp, count in sorted(body_parts.items(), key=lambda x: x[1], reverse=True):
-                    doc.append(f"- {bp}: {count}")
-            
-            elif table_name == "workout_plans":
-                completed = sum(1 for item in data if item.get('completed'))
-                pending = len(data) - completed
-                doc.append(f"- Completed: {completed}")
-                doc.append(f"- Pending: {pending}")
-                
-                # Calculate total volume
-                total_volume = sum(item.get('total_volume', 0) for item in data if item.get('completed'))
-                doc.append(f"- Total training volume: {total_volume:.1f} kg")
-            
-            elif table_name == "workout_templates":
-                doc.append(f"- User templates: {len(data)}")
-            
-            elif table_name == "body_data":
-                if data:
-                    weights = [item.get('weight') for item in data if item.get('weight')]
-                    if weights:
-                        doc.append(f"- Weight range: {min(weights):.1f} - {max(weights):.1f} kg")
-                        doc.append(f"- Average weight: {sum(weights)/len(weights):.1f} kg")
-                    
-                    body_fats = [item.get('body_fat') for item in data if item.get('body_fat')]
-                    if body_fats:
-                        doc.append(f"- Body fat range: {min(body_fats):.1f}% - {max(body_fats):.1f}%")
-            
-            elif table_name == "body_parts":
-                names = [item.get('name', 'Unknown') for item in data]
-                doc.append(f"\n**Body Parts:**")
-                for name in sorted(names):
-                    doc.append(f"- {name}")
-            
-            elif table_name == "exercise_types":
-                names = [item.get('name', 'Unknown') for item in data]
-                doc.append(f"\n**Exercise Types:**")
-                for name in sorted(names):
-                    doc.append(f"- {name}")
-        
+    for stats in table_stats.values():
+        doc.extend(stats.report_lines())
         doc.append("\n" + "-" * 80)
     
     # Save documentation
-    filepath = os.path.join("database_export", "database_structure.md")
+    filepath = os.path.join(EXPORT_DIR, "database_structure.md")
     with open(filepath, 'w', encoding='utf-8') as f:
         f.write("\n".join(doc))
     
@@ -241,23 +1027,36 @@ def main():
         ensure_export_dir()
         
         # Download all tables
-        all_data = download_all_tables()
+        table_stats = download_all_tables()
         
         # Generate structure documentation
-        generate_structure_doc(all_data)
+        generate_structure_doc(table_stats)
+        
+        # Set-level Parquet for analytics
+        if PARQUET_MODE:
+            export_workout_sets_parquet()
+        
+        # Other formats from the same download
+        if FORMATS:
+            export_formats(list(table_stats))
+        
+        # Indexes and set-level table of the local replica
+        if "sqlite" in FORMATS:
+            sets, indexes = build_replica(REPLICA_FILE)
+            print(f"  Local replica: {sets} sets, {len(indexes)} indexes, saved: {REPLICA_FILE}")
         
         # Generate summary
         print("\n" + "=" * 60)
         print("Download Summary")
         print("=" * 60)
-        for table_name, data in all_data.items():
-            print(f"  {table_name}: {len(data)} records")
+        for table_name, stats in table_stats.items():
+            print(f"  {table_name}: {stats.count} records")
         
         print("\nAll data downloaded successfully!")
         print("Output directory: database_export/")
         print("\nNext steps:")
         print("  1. Review database_structure.md for complete structure")
-        print("  2. Check individual JSON files for data details")
+        print("  2. Check individual NDJSON files for data details")
         
     except Exception as e:
         print(f"\nError: {e}")
@@ -6,11 +6,21 @@ Download Supabase Database Complete Data
 This script will:
 1. Connect to Supabase
 2. Download all table data
-3. Save as JSON format
+3. Save in every requested format from a single fetch (export_engine)
 4. Generate database structure report
 
 Usage:
-    python scripts/download_database.py
+    python scripts/download_database.py [--formats=json,ndjson,csv,parquet,sqlite]
+                                        [--compress=gzip|zstd]
+                                        [--profile=catalog-min|lite] [--exclude=drawing_points]
+
+Each table is fetched once, page by page, and every page is written to all
+formats in --formats (default: json). With --compress, table data defaults
+to compact compressed NDJSON (<table>.ndjson.gz / .ndjson.zst) instead of
+indented JSON; sqlite output goes to database_export/database.sqlite.
+
+--profile / --exclude select only the needed columns of each table instead
+of select('*') (see export_engine.COLUMN_PROFILES).
 
 Output:
     - database_export/
@@ -30,10 +40,23 @@ import json
 from datetime import datetime
 from supabase import create_client, Client
 from dotenv import load_dotenv
+from cli_options import get_option
+from snapshot_io import check_compression
+from export_engine import (
+    iter_pages, open_sinks, export_rows, parse_formats,
+    parse_profile, parse_exclude, select_columns,
+)
 
 # Load environment variables
 load_dotenv()
 
+# --compress=gzip|zstd (default: indented JSON)
+COMPRESSION = check_compression(get_option("--compress", "none"))
+# --formats=json,csv,... (default: json, or ndjson with --compress)
+FORMATS = parse_formats(get_option("--formats", "json" if COMPRESSION == "none" else "ndjson"))
+PROFILE = parse_profile(get_option("--profile", "full"))
+EXCLUDE = parse_exclude(get_option("--exclude", ""))
+
 def get_supabase_client() -> Client:
     """Get Supabase client"""
     url = os.getenv("SUPABASE_URL")
@@ -48,18 +71,32 @@ def ensure_export_dir():
     """Ensure export directory exists"""
     os.makedirs("database_export", exist_ok=True)
 
-def download_table(supabase: Client, table_name: str) -> list:
-    """Download all data from specified table"""
+def download_table(supabase: Client, table_name: str) -> dict:
+    """Download a table once and write it to every format in FORMATS
+
+    Returns the record count and the first row (None if the table is empty).
+    """
     print(f"Downloading {table_name}...")
     
+    first = {}
+    
+    def pages():
+        for rows in iter_pages(lambda: supabase.table(table_name).select(columns)):
+            first.setdefault("row", rows[0])
+            yield rows
+    
     try:
-        response = supabase.table(table_name).select("*").execute()
-        data = response.data
-        print(f"  {table_name}: {len(data)} records")
-        return data
+        columns = select_columns(supabase, table_name, PROFILE, EXCLUDE)
+        sinks = open_sinks(FORMATS, "database_export", table_name, COMPRESSION, columns)
+        count = export_rows(pages(), sinks)
     except Exception as e:
         print(f"  Failed to download {table_name}: {e}")
-        return []
+        return {"count": 0, "sample": None}
+    
+    print(f"  {table_name}: {count} records")
+    for sink in sinks:
+        print(f"  Saved: {sink.path}")
+    return {"count": count, "sample": first.get("row")}
 
 def save_json(data: any, filename: str):
     """Save data as JSON file"""
@@ -90,16 +127,14 @@ def analyze_structure(supabase: Client) -> dict:
     }
     
     for table_name in tables:
-        data = download_table(supabase, table_name)
-        
-        # Save complete data
-        save_json(data, f"{table_name}.json")
+        # Download and save complete data
+        result = download_table(supabase, table_name)
         
         # Analyze structure
-        if data:
-            sample = data[0]
+        if result["count"]:
+            sample = result["sample"]
             structure["tables"][table_name] = {
-                "count": len(data),
+                "count": result["count"],
                 "columns": list(sample.keys()),
                 "sample": sample
             }
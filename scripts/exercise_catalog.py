@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本機動作目錄快取（所有腳本共用）
+
+生成、驗證、匯出與測試腳本原本每次都重新下載 exercises 表格（約 800 筆）。
+load_catalog() 改為把整個目錄存在 database_export/exercises.catalog：
+- 精簡二進位格式：固定檔頭 + 版本資訊（JSON）+ zlib 壓縮的欄位式資料
+- 每次啟動只發一次輕量請求（count + max(updated_at)），與快取相同就直接使用
+- 無法連線或加上 --offline 時直接使用快取；--refresh-catalog 強制重新下載
+- 提供以 id、名稱（name / name_en）與關鍵字（exercise_index 的 bigram 索引）查詢
+
+使用方式:
+    from exercise_catalog import load_catalog
+
+    catalog = load_catalog(supabase)
+    bench = catalog.get('0A5921M6WAyUv7fXcA29')
+    matches = catalog.search('臥推')
+    resolver = catalog.resolver()
+"""
+
+import json
+import os
+import struct
+import sys
+import zlib
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from export_engine import iter_pages
+from exercise_index import NameIndex
+from exercise_resolver import ExerciseResolver
+from snapshot_io import dumps_compact
+
+# 快取檔案（與其他本機匯出資料放在一起）
+CATALOG_FILE = os.path.join("database_export", "exercises.catalog")
+
+# 檔頭：識別字串 + 版本資訊長度（uint32, big-endian）
+CATALOG_MAGIC = b"SWCAT1\n"
+HEADER_LENGTH = struct.Struct(">I")
+
+# 目錄的版本：(筆數, max(updated_at))
+Signature = Tuple[int, Optional[str]]
+
+def is_offline() -> bool:
+    """--offline：不連線，只使用快取"""
+    return "--offline" in sys.argv
+
+def is_refresh() -> bool:
+    """--refresh-catalog：忽略快取重新下載"""
+    return "--refresh-catalog" in sys.argv
+
+def remote_signature(client) -> Signature:
+    """查詢資料庫目前的版本（一次請求，只回傳一個欄位）
+
+    updated_at 由降冪排序取第一筆；PostgreSQL 降冪時 NULL 排在最前面，
+    rows_signature() 用相同規則，兩邊的結果才能直接比較。
+    """
+    response = client.table("exercises")\
+        .select("updated_at", count="exact")\
+        .order("updated_at", desc=True)\
+        .limit(1)\
+        .execute()
+    latest = response.data[0]["updated_at"] if response.data else None
+    return response.count, latest
+
+def rows_signature(rows: List[Dict]) -> Signature:
+    """本機資料的版本（規則與 remote_signature 相同）"""
+    stamps = [row.get("updated_at") for row in rows]
+    if not stamps or None in stamps:
+        return len(rows), None
+    return len(rows), max(stamps)
+
+def encode_catalog(rows: List[Dict], source: str = "") -> bytes:
+    """編碼成快取檔案內容（每個欄位一個陣列，重複的值壓縮效果較好）"""
+    columns = list(dict.fromkeys(column for row in rows for column in row))
+    count, updated_at = rows_signature(rows)
+    header = dumps_compact({
+        "count": count,
+        "updated_at": updated_at,
+        "source": source,
+        "saved_at": datetime.now().isoformat(timespec="seconds"),
+        "columns": columns,
+    }).encode("utf-8")
+    body = dumps_compact([[row.get(column) for row in rows] for column in columns])
+    return CATALOG_MAGIC + HEADER_LENGTH.pack(len(header)) + header + zlib.compress(body.encode("utf-8"), 6)
+
+def read_header(path: str) -> Optional[Dict]:
+    """只讀取快取的版本資訊（不解壓資料）；檔案不存在或格式不符時回傳 None"""
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        if f.read(len(CATALOG_MAGIC)) != CATALOG_MAGIC:
+            return None
+        size = HEADER_LENGTH.unpack(f.read(HEADER_LENGTH.size))[0]
+        return json.loads(f.read(size).decode("utf-8"))
+
+def read_catalog(path: str) -> Tuple[Dict, List[Dict]]:
+    """讀取快取檔案，回傳 (版本資訊, 資料)"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(CATALOG_MAGIC):
+        raise ValueError(f"{path} 不是動作目錄快取")
+    offset = len(CATALOG_MAGIC)
+    size = HEADER_LENGTH.unpack_from(data, offset)[0]
+    offset += HEADER_LENGTH.size
+    header = json.loads(data[offset:offset + size].decode("utf-8"))
+    values = json.loads(zlib.decompress(data[offset + size:]).decode("utf-8"))
+    rows = [dict(zip(header["columns"], row)) for row in zip(*values)] if values else []
+    return header, rows
+
+def write_catalog(path: str, rows: List[Dict], source: str = ""):
+    """寫入快取（先寫暫存檔再取代，中斷時不會留下半個檔案）"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp = path + ".tmp"
+    with open(temp, "wb") as f:
+        f.write(encode_catalog(rows, source))
+    os.replace(temp, path)
+
+def download_catalog(client) -> List[Dict]:
+    """下載整個 exercises 表格（keyset 分頁）"""
+    return [row for rows in iter_pages(lambda: client.table("exercises").select("*")) for row in rows]
+
+def client_source(client) -> str:
+    """快取來源（不同專案的快取不會混用）"""
+    return str(getattr(client, "supabase_url", "") or "")
+
+class ExerciseCatalog:
+    """動作目錄：以 id、名稱與關鍵字查詢"""
+
+    def __init__(self, rows: List[Dict], source: str = ""):
+        self.rows = rows
+        self.source = source
+        self.by_id = {row["id"]: row for row in rows}
+        self.by_name: Dict[str, Dict] = {}
+        for column in ("name_en", "name"):
+            for row in rows:
+                if row.get(column):
+                    self.by_name[row[column].strip().lower()] = row
+        self._resolvers: Dict[bool, ExerciseResolver] = {}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def signature(self) -> Signature:
+        return rows_signature(self.rows)
+
+    def get(self, exercise_id: str) -> Optional[Dict]:
+        """以 id 查詢"""
+        return self.by_id.get(exercise_id)
+
+    def find(self, name: str) -> Optional[Dict]:
+        """以完整名稱查詢（name 或 name_en，不分大小寫；name 優先）"""
+        return self.by_name.get(name.strip().lower())
+
+    def system(self) -> List[Dict]:
+        """系統動作（user_id IS NULL）"""
+        return [row for row in self.rows if row.get("user_id") is None]
+
+    def resolver(self, system_only: bool = True) -> ExerciseResolver:
+        """關鍵字解析器（預設只含系統動作，與生成腳本原本的查詢相同）"""
+        if system_only not in self._resolvers:
+            self._resolvers[system_only] = ExerciseResolver(self.system() if system_only else self.rows)
+        return self._resolvers[system_only]
+
+    def index(self, system_only: bool = False) -> NameIndex:
+        """name / name_en 的 bigram 索引（與 resolver 共用）"""
+        return self.resolver(system_only).index
+
+    def search(self, keyword: str, system_only: bool = False) -> List[Dict]:
+        """名稱包含關鍵字的動作（依固定順序排名）"""
+        return self.index(system_only).search(keyword)
+
+def load_catalog(client=None, path: str = CATALOG_FILE) -> ExerciseCatalog:
+    """讀取動作目錄：快取有效就直接使用，否則下載並更新快取
+
+    client 為 None 或加上 --offline 時只讀快取（不存在時丟出 FileNotFoundError）。
+    """
+    source = client_source(client) if client is not None else ""
+    header = None if is_refresh() else read_header(path)
+
+    if header is not None and (client is None or is_offline()):
+        print(f"📦 使用本機動作目錄快取（{header['count']} 筆，{header['saved_at']}）")
+        return ExerciseCatalog(read_catalog(path)[1], header.get("source", ""))
+    if client is None or is_offline():
+        raise FileNotFoundError(f"{path} 不存在，請先在可連線時執行一次（會自動建立快取）")
+
+    if header is not None and header.get("source") == source:
+        try:
+            signature = remote_signature(client)
+        except Exception as e:
+            print(f"⚠️  無法確認動作目錄版本，使用本機快取 - {e}")
+            return ExerciseCatalog(read_catalog(path)[1], source)
+        if signature == (header["count"], header["updated_at"]):
+            print(f"📦 動作目錄快取有效（{header['count']} 筆）")
+            return ExerciseCatalog(read_catalog(path)[1], source)
+        print(f"🔄 動作目錄已變更（{header['count']} → {signature[0]} 筆），重新下載")
+
+    rows = download_catalog(client)
+    write_catalog(path, rows, source)
+    print(f"💾 已下載 {len(rows)} 個動作並更新快取 {path}")
+    return ExerciseCatalog(rows, source)
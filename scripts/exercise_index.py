@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+動作名稱的字元 bigram 倒排索引（所有需要以關鍵字找動作的腳本共用）
+
+原本各腳本各自比對：伺服器端 ilike '%…%'、pandas str.contains、
+或逐筆 '臥推' in exercise['name']，大小寫與排名規則都不一樣。
+NameIndex 建立一次後：
+- name 與 name_en（不分大小寫）的每個相鄰兩字元對應到一個 posting list
+- 查詢時取關鍵字所有 bigram 的 posting list，由最短的開始取交集，
+  只對交集內的少數動作確認整段關鍵字（單一字元的關鍵字使用字元索引）
+- 所有結果依固定排名：名稱較短 → 名稱 → id，各工具的結果完全相同
+
+使用方式:
+    from exercise_index import NameIndex
+
+    index = NameIndex(exercises)
+    bench = index.search('臥推')
+    barbell_bench = index.search_all(['槓鈴', '臥推'])
+    compound_ids = index.ids_any(['臥推', '深蹲', '硬舉'])
+"""
+
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# 建立索引的欄位
+INDEX_FIELDS = ('name', 'name_en')
+
+def normalize(value: Any) -> str:
+    """比對用的文字（非字串，例如 pandas 的 NaN，視為空字串）"""
+    return value.lower() if isinstance(value, str) else ''
+
+def bigrams(text: str) -> Set[str]:
+    """相鄰兩字元的集合"""
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+def rank_key(row: Dict) -> Tuple[int, str, str]:
+    """排名：名稱較短 → 名稱 → id"""
+    name = row.get('name') if isinstance(row.get('name'), str) else ''
+    return len(name), name, str(row.get('id'))
+
+class NameIndex:
+    """name / name_en 的 bigram 倒排索引，查詢結果依固定排名排序"""
+
+    def __init__(self, rows: Iterable[Dict], fields: Tuple[str, ...] = INDEX_FIELDS):
+        # 位置就是排名：posting list 由小到大即為排名順序
+        self.rows = sorted(rows, key=rank_key)
+        self._texts = [tuple(normalize(row.get(field)) for field in fields) for row in self.rows]
+        postings = defaultdict(list)
+        for position, texts in enumerate(self._texts):
+            grams = set()
+            for text in texts:
+                grams.update(bigrams(text))
+                grams.update(text)
+            for gram in grams:
+                postings[gram].append(position)
+        self._postings: Dict[str, List[int]] = dict(postings)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def positions(self, keyword: str) -> List[int]:
+        """名稱包含關鍵字的位置（依排名排序）"""
+        needle = normalize(keyword)
+        if not needle:
+            return list(range(len(self.rows)))
+        grams = bigrams(needle) or {needle}
+        lists = sorted((self._postings.get(gram, []) for gram in grams), key=len)
+        candidates = set(lists[0])
+        for postings in lists[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(postings)
+        if len(needle) > 2:
+            # bigram 都出現不代表整段相連，再確認一次
+            candidates = {p for p in candidates if any(needle in text for text in self._texts[p])}
+        return sorted(candidates)
+
+    def search(self, keyword: str, limit: Optional[int] = None) -> List[Dict]:
+        """名稱包含關鍵字的動作"""
+        return [self.rows[p] for p in self.positions(keyword)[:limit]]
+
+    def search_all(self, keywords: Iterable[str]) -> List[Dict]:
+        """名稱同時包含所有關鍵字的動作"""
+        found: Optional[Set[int]] = None
+        for keyword in keywords:
+            matched = set(self.positions(keyword))
+            found = matched if found is None else found & matched
+            if not found:
+                return []
+        return [self.rows[p] for p in sorted(found or range(len(self.rows)))]
+
+    def search_any(self, keywords: Iterable[str]) -> List[Dict]:
+        """名稱包含任一關鍵字的動作"""
+        found: Set[int] = set()
+        for keyword in keywords:
+            found.update(self.positions(keyword))
+        return [self.rows[p] for p in sorted(found)]
+
+    def ids_any(self, keywords: Iterable[str]) -> Set[Any]:
+        """名稱包含任一關鍵字的動作 id"""
+        return {row['id'] for row in self.search_any(keywords)}
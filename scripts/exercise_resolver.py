@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+動作關鍵字解析（生成腳本共用）
+
+原本每個關鍵字各發一次 ilike('name', '%關鍵字%').limit(1)（而且 select('*')），
+生成腳本啟動時要來回十幾到二十幾次，取到哪一筆也由伺服器的掃描順序決定。
+ExerciseResolver 改為：
+- 動作目錄由 exercise_catalog 提供（本機快取，只確認一次版本）
+- 所有關鍵字以 exercise_index.NameIndex 在本機比對（name / name_en，不分大小寫）
+- 多筆符合時依固定順序排名：器材提示相符 → 名稱較短 → 名稱 → id
+
+使用方式:
+    from exercise_catalog import load_catalog
+
+    resolver = load_catalog(supabase).resolver()
+    bench = resolver.resolve('臥推', equipment='槓鈴')
+"""
+
+from typing import Dict, List, Optional
+
+from exercise_index import NameIndex
+
+class ExerciseResolver:
+    """在本機把關鍵字對應到系統動作，結果與查詢順序無關"""
+
+    def __init__(self, rows: List[Dict]):
+        self.index = NameIndex(rows)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def candidates(self, keyword: str) -> List[Dict]:
+        """名稱包含關鍵字的動作（已依排名排序）"""
+        return self.index.search(keyword)
+
+    def resolve(self, keyword: str, equipment: str = '') -> Optional[Dict]:
+        """排名最高的動作；有器材提示時優先取器材或名稱含提示的動作"""
+        matches = self.candidates(keyword)
+        if equipment:
+            for row in matches:
+                if equipment in (row.get('equipment') or '') or equipment in (row.get('name') or ''):
+                    return row
+        return matches[0] if matches else None
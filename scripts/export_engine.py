@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+匯出引擎：一次下載，同時寫出多種格式
+
+每一頁資料只從 Supabase 取一次，接著依序交給所有輸出目標（sink）：
+- json     縮排 JSON 陣列（<name>.json，舊版格式）
+- ndjson   每行一筆資料（<name>.ndjson，可搭配 gzip / zstd 壓縮）
+- csv      CSV（<name>.csv，UTF-8 BOM 方便 Excel 開啟；陣列 / 物件欄位存成 JSON 字串）
+- parquet  Parquet（<name>.parquet，需要 pyarrow）
+- sqlite   SQLite 資料表（所有表格共用 database.sqlite，表格名稱為 <name>）
+
+所有檔案先寫到 .tmp，全部成功才替換正式檔案；任一頁失敗時捨棄所有輸出，
+SQLite 則整個交易回滾，不會留下只寫一半的結果。
+
+csv / parquet / sqlite 的欄位以 open_sinks(columns=...) 的 select 清單為準
+（'*' 時取第一頁的欄位），沒有資料的表格也會建立空表格或只有標題的檔案。
+parquet / sqlite 的型別由第一頁推斷，之後的頁面出現不符的值或新欄位時會顯示警告。
+
+欄位投影（select_columns）：
+- --profile=catalog-min  動作 / 元數據只取 id 與分類欄位
+- --profile=lite         排除大型欄位（說明文字、圖片連結、筆記繪圖數據）
+- --exclude=drawing_points,exercises.description
+  排除任何表格的同名欄位，或以 <表格>.<欄位> 指定單一表格
+PostgREST 無法排除欄位，因此先以 limit(1) 取得實際欄位再組成 select 清單，
+結構變動時不會因欄位不存在而失敗；本機資料（例如動作目錄快取）則用 project_columns 直接挑選。
+
+使用方式:
+    from export_engine import iter_pages, open_sinks, export_rows
+
+    sinks = open_sinks(['json', 'csv', 'sqlite'], 'database_export', 'exercises')
+    count = export_rows(iter_pages(lambda: supabase.table('exercises').select('*')), sinks)
+"""
+
+import csv
+import json
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from snapshot_io import NDJSON_SUFFIXES, dumps_compact, encode_rows, iter_records
+
+# 每頁筆數（PostgREST 預設 max-rows 為 1000）
+DEFAULT_PAGE_SIZE = 1000
+
+# 分頁用的主鍵
+PRIMARY_KEY = "id"
+
+# SQLite 輸出的預設檔名
+SQLITE_FILE = "database.sqlite"
+
+# 動作分類欄位（catalog-min）
+CATALOG_COLUMNS = [
+    "id", "name", "name_en", "training_type", "training_type_en",
+    "body_part", "body_part_en", "body_parts", "specific_muscle", "specific_muscle_en",
+    "equipment", "equipment_en", "equipment_category", "equipment_category_en",
+    "equipment_subcategory", "equipment_subcategory_en", "joint_type",
+    "level1", "level2", "level3", "level4", "level5",
+    "user_id", "created_at", "updated_at",
+]
+
+# 元數據表格（body_parts / exercise_types / equipments / joint_types）
+METADATA_TABLES = ["body_parts", "exercise_types", "equipments", "joint_types"]
+
+# 欄位設定檔：表格 → {"columns": 只取這些欄位} 或 {"exclude": 排除這些欄位}
+# 未列出的表格維持 select('*')
+COLUMN_PROFILES = {
+    "full": {},
+    "catalog-min": {
+        "exercises": {"columns": CATALOG_COLUMNS},
+        "custom_exercises": {"columns": CATALOG_COLUMNS},
+        **{table: {"columns": ["id", "name", "name_en", "count", "created_at", "updated_at"]}
+           for table in METADATA_TABLES},
+    },
+    "lite": {
+        "exercises": {"exclude": ["description", "image_url", "video_url"]},
+        "custom_exercises": {"exclude": ["description", "notes"]},
+        "notes": {"exclude": ["drawing_points"]},
+        **{table: {"exclude": ["description", "description_en"]} for table in METADATA_TABLES},
+    },
+}
+
+def parse_profile(value: str) -> str:
+    """確認 --profile 名稱有效"""
+    if value not in COLUMN_PROFILES:
+        raise ValueError(f"不支援的欄位設定檔: {value}（可用: {', '.join(COLUMN_PROFILES)}）")
+    return value
+
+def parse_exclude(value: str) -> List[str]:
+    """解析 --exclude=drawing_points,exercises.description"""
+    return [column.strip() for column in value.split(",") if column.strip()]
+
+def column_spec(table: str, profile: str = "full",
+                exclude: Iterable[str] = ()) -> Tuple[Optional[Set[str]], Set[str]]:
+    """設定檔與 --exclude 對 table 的要求：(只取這些欄位或 None, 排除的欄位)"""
+    spec = COLUMN_PROFILES[profile].get(table, {})
+    drop = set(spec.get("exclude", []))
+    for column in exclude:
+        owner, _, name = column.rpartition(".")
+        if not owner or owner == table:
+            drop.add(name)
+    return (set(spec["columns"]) if "columns" in spec else None), drop
+
+def project_columns(available: List[str], table: str, profile: str = "full",
+                    exclude: Iterable[str] = (), required: Iterable[str] = ()) -> List[str]:
+    """從實際存在的欄位中挑出要保留的欄位（required 與主鍵一定保留）"""
+    wanted, drop = column_spec(table, profile, exclude)
+    keep = set(required) | {PRIMARY_KEY}
+    return [c for c in available if ((wanted is None or c in wanted) and c not in drop) or c in keep]
+
+def select_columns(client, table: str, profile: str = "full",
+                   exclude: Iterable[str] = (), required: Iterable[str] = ()) -> str:
+    """依設定檔與 --exclude 組成 table 的 select 字串（不需投影時為 '*'）
+
+    required 中的欄位（主鍵、水位線等）一定保留。表格沒有資料時回傳 '*'。
+    """
+    wanted, drop = column_spec(table, profile, exclude)
+    if wanted is None and not drop:
+        return "*"
+    
+    # 以一筆資料取得實際存在的欄位
+    sample = client.table(table).select("*").limit(1).execute().data
+    if not sample:
+        return "*"
+    available = list(sample[0])
+    columns = project_columns(available, table, profile, exclude, required)
+    return "*" if columns == available else ",".join(columns)
+
+def iter_pages(make_query: Callable, page_size: int = DEFAULT_PAGE_SIZE,
+               after: Optional[str] = None) -> Iterator[List[Dict]]:
+    """以 keyset 分頁（id > 上一頁最後的 id）逐頁下載
+
+    make_query() 每次都要回傳一個已 select 的新查詢（可帶篩選條件），
+    遇到空頁才停止，因此不會被伺服器端的 max-rows 截斷。
+    """
+    last_id = after
+    while True:
+        query = make_query()
+        if last_id is not None:
+            query = query.gt(PRIMARY_KEY, last_id)
+        rows = query.order(PRIMARY_KEY).limit(page_size).execute().data
+        if not rows:
+            break
+        yield rows
+        last_id = rows[-1][PRIMARY_KEY]
+
+def iter_chunks(rows: Iterable[Dict], size: int = DEFAULT_PAGE_SIZE) -> Iterator[List[Dict]]:
+    """把逐筆資料切成固定大小的頁（用於本機資料）"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def select_list(columns: str) -> Optional[List[str]]:
+    """select 字串轉成欄位清單（'*' 或空字串為 None）"""
+    if columns.strip() in ("", "*"):
+        return None
+    return [column.strip() for column in columns.split(",") if column.strip()]
+
+def flat_value(value: Any) -> Any:
+    """陣列 / 物件轉成精簡 JSON 字串，其他值不變"""
+    if isinstance(value, (list, dict)):
+        return dumps_compact(value)
+    return value
+
+class Sink(ABC):
+    """輸出目標基底：每頁呼叫 write()，成功後 close()，失敗時 abort()"""
+
+    suffix = ""
+
+    def __init__(self, directory: str, name: str, compression: str = "none",
+                 columns: Optional[List[str]] = None):
+        self.path = os.path.join(directory, name + self.suffix)
+        self.temp_path = self.path + ".tmp"
+        self.name = name
+        self.known_columns = columns
+        self.warned: Set[str] = set()
+
+    def page_columns(self, rows: List[Dict]) -> List[str]:
+        """輸出的欄位：select 清單，'*' 時取第一頁出現的所有欄位"""
+        if self.known_columns:
+            return list(self.known_columns)
+        return list(dict.fromkeys(key for row in rows for key in row))
+
+    def check_page(self, rows: List[Dict], types: Dict[str, Any], fits: Callable[[Any, Any], bool]):
+        """之後的頁面出現推斷型別放不下的值或新欄位時警告（每個欄位一次）"""
+        for row in rows:
+            for column, value in row.items():
+                if column in self.warned or value is None:
+                    continue
+                if column not in types:
+                    self.warned.add(column)
+                    print(f"  ⚠️  {self.name}.{column}: 第一頁沒有這個欄位，{os.path.basename(self.path)} 不會寫入")
+                elif not fits(value, types[column]):
+                    self.warned.add(column)
+                    print(f"  ⚠️  {self.name}.{column}: 第一頁推斷為 {types[column]}，"
+                          f"之後出現 {type(value).__name__} 值 {value!r:.40}，{os.path.basename(self.path)} 會依推斷型別轉換")
+
+    @abstractmethod
+    def write(self, rows: List[Dict]):
+        """寫入一頁資料"""
+
+    def finish(self):
+        """寫入結尾並關閉暫存檔"""
+
+    def close(self):
+        self.finish()
+        os.replace(self.temp_path, self.path)
+
+    def abort(self):
+        self.finish()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+class JsonSink(Sink):
+    """縮排 JSON 陣列（輸出與 json.dump(rows, indent=2) 相同）"""
+
+    suffix = ".json"
+
+    def __init__(self, directory: str, name: str, compression: str = "none",
+                 columns: Optional[List[str]] = None):
+        super().__init__(directory, name, compression, columns)
+        self.file = open(self.temp_path, "w", encoding="utf-8")
+        self.count = 0
+
+    def write(self, rows: List[Dict]):
+        for row in rows:
+            text = json.dumps(row, ensure_ascii=False, indent=2, default=str)
+            self.file.write("[\n  " if self.count == 0 else ",\n  ")
+            self.file.write(text.replace("\n", "\n  "))
+            self.count += 1
+
+    def finish(self):
+        if self.file.closed:
+            return
+        self.file.write("\n]" if self.count else "[]")
+        self.file.close()
+
+class NdjsonSink(Sink):
+    """NDJSON（每頁一個壓縮區塊，格式同 snapshot_io）"""
+
+    def __init__(self, directory: str, name: str, compression: str = "none",
+                 columns: Optional[List[str]] = None):
+        self.suffix = NDJSON_SUFFIXES[compression]
+        super().__init__(directory, name, compression, columns)
+        self.compression = compression
+        self.file = open(self.temp_path, "wb")
+
+    def write(self, rows: List[Dict]):
+        self.file.write(encode_rows(rows, self.compression))
+
+    def finish(self):
+        self.file.close()
+
+class CsvSink(Sink):
+    """CSV（欄位為 select 清單，'*' 時取第一頁出現的所有欄位）"""
+
+    suffix = ".csv"
+
+    def __init__(self, directory: str, name: str, compression: str = "none",
+                 columns: Optional[List[str]] = None):
+        super().__init__(directory, name, compression, columns)
+        self.file = open(self.temp_path, "w", encoding="utf-8-sig", newline="")
+        self.writer = None
+
+    def open_writer(self, columns: List[str]):
+        self.writer = csv.DictWriter(self.file, fieldnames=columns, extrasaction="ignore")
+        self.writer.writeheader()
+
+    def write(self, rows: List[Dict]):
+        if self.writer is None:
+            self.open_writer(self.page_columns(rows))
+        for row in rows:
+            self.writer.writerow({key: flat_value(value) for key, value in row.items()})
+
+    def finish(self):
+        if self.file.closed:
+            return
+        if self.writer is None and self.known_columns:
+            # 空表格：只寫標題
+            self.open_writer(self.known_columns)
+        self.file.close()
+
+class ParquetSink(Sink):
+    """Parquet（每頁一個 row group）
+
+    欄位型別由第一頁推斷：布林 → bool、數字 → float64（與 JSON 數字語意相同，
+    避免整數欄位之後出現小數時失敗）、其他 → string（陣列 / 物件存成 JSON 字串）。
+    之後的頁面放不下推斷型別的值會被轉換（數字變字串、非數字變 NULL），並顯示警告。
+    """
+
+    suffix = ".parquet"
+
+    def __init__(self, directory: str, name: str, compression: str = "none",
+                 columns: Optional[List[str]] = None):
+        super().__init__(directory, name, compression, columns)
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet 輸出需要 pyarrow 套件（pip install pyarrow）")
+        self.pa = pa
+        self.pq = pq
+        self.schema = None
+        self.writer = None
+
+    def infer_type(self, values: List[Any]):
+        sample = next((value for value in values if value is not None), None)
+        if isinstance(sample, bool):
+            return self.pa.bool_()
+        if isinstance(sample, (int, float)):
+            return self.pa.float64()
+        return self.pa.string()
+
+    def fits(self, value: Any, arrow_type) -> bool:
+        """值可以不經轉換放進推斷的型別"""
+        if arrow_type == self.pa.bool_():
+            return isinstance(value, bool)
+        if arrow_type == self.pa.float64():
+            return isinstance(value, (int, float)) and not isinstance(value, bool)
+        return isinstance(value, (str, list, dict))
+
+    def convert(self, value: Any, arrow_type) -> Any:
+        if value is None:
+            return None
+        if arrow_type == self.pa.bool_():
+            return bool(value)
+        if arrow_type == self.pa.float64():
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return None
+        return value if isinstance(value, str) else dumps_compact(value)
+
+    def write(self, rows: List[Dict]):
+        if self.schema is None:
+            self.schema = self.pa.schema([
+                (column, self.infer_type([row.get(column) for row in rows]))
+                for column in self.page_columns(rows)
+            ])
+            self.writer = self.pq.ParquetWriter(self.temp_path, self.schema, compression="zstd")
+        else:
+            self.check_page(rows, {field.name: field.type for field in self.schema}, self.fits)
+        arrays = {
+            field.name: [self.convert(row.get(field.name), field.type) for row in rows]
+            for field in self.schema
+        }
+        self.writer.write_table(self.pa.table(arrays, schema=self.schema))
+
+    def finish(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        elif self.schema is None and not os.path.exists(self.temp_path):
+            # 空表格：依 select 清單寫出只有欄位（string）的檔案
+            self.schema = self.pa.schema([(column, self.pa.string()) for column in self.known_columns or []])
+            self.pq.write_table(self.pa.table({}, schema=self.schema), self.temp_path)
+
+class SqliteSink(Sink):
+    """SQLite 資料表（同一目錄的表格共用 database.sqlite）
+
+    資料表在同一個交易中重建並寫入，close() 才提交，失敗時回滾保留舊資料。
+    欄位型別由第一頁推斷；沒有資料時依 select 清單（'*' 時沿用舊表格的欄位）建立空表格，
+    local_replica 的索引與查詢才找得到這個表格。
+    """
+
+    def __init__(self, directory: str, name: str, compression: str = "none",
+                 columns: Optional[List[str]] = None, database: str = SQLITE_FILE):
+        self.path = os.path.join(directory, database)
+        self.table = name
+        self.name = name
+        self.known_columns = columns
+        self.warned: Set[str] = set()
+        self.conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        self.conn.execute("BEGIN IMMEDIATE")
+        # 舊表格的欄位（'*' 且沒有資料時用來建立空表格）
+        self.previous = [(row[1], row[2] or "TEXT")
+                         for row in self.conn.execute(f'PRAGMA table_info("{name}")')]
+        self.conn.execute(f'DROP TABLE IF EXISTS "{name}"')
+        self.columns = None
+        self.types: Dict[str, str] = {}
+        self.insert_sql = None
+
+    @staticmethod
+    def column_type(values: List[Any]) -> str:
+        sample = next((value for value in values if value is not None), None)
+        if isinstance(sample, (bool, int)):
+            return "INTEGER"
+        if isinstance(sample, float):
+            return "REAL"
+        return "TEXT"
+
+    @staticmethod
+    def fits(value: Any, column_type: str) -> bool:
+        """值可以不經型別轉換存進推斷的欄位"""
+        if column_type == "INTEGER":
+            return isinstance(value, (bool, int))
+        if column_type == "REAL":
+            return isinstance(value, (int, float)) and not isinstance(value, bool)
+        return isinstance(value, (str, list, dict))
+
+    def create_table(self, types: Dict[str, str]):
+        self.columns = list(types)
+        self.types = types
+        definitions = []
+        for column, column_type in types.items():
+            definition = f'"{column}" {column_type}'
+            if column == PRIMARY_KEY:
+                definition += " PRIMARY KEY"
+            definitions.append(definition)
+        self.conn.execute(f'CREATE TABLE "{self.table}" ({", ".join(definitions)})')
+        placeholders = ", ".join("?" for _ in self.columns)
+        quoted = ", ".join(f'"{column}"' for column in self.columns)
+        self.insert_sql = f'INSERT OR REPLACE INTO "{self.table}" ({quoted}) VALUES ({placeholders})'
+
+    def write(self, rows: List[Dict]):
+        if self.columns is None:
+            self.create_table({
+                column: self.column_type([row.get(column) for row in rows])
+                for column in self.page_columns(rows)
+            })
+        else:
+            self.check_page(rows, self.types, self.fits)
+        self.conn.executemany(self.insert_sql, (
+            tuple(flat_value(row.get(column)) for column in self.columns)
+            for row in rows
+        ))
+
+    def close(self):
+        if self.columns is None:
+            # 空表格：欄位沒有資料可推斷型別，一律 TEXT
+            if self.known_columns:
+                self.create_table({column: "TEXT" for column in self.known_columns})
+            else:
+                self.create_table(dict(self.previous) or {PRIMARY_KEY: "TEXT"})
+        self.conn.execute("COMMIT")
+        self.conn.close()
+
+    def abort(self):
+        self.conn.execute("ROLLBACK")
+        self.conn.close()
+
+# 格式名稱 → 輸出目標
+SINKS = {
+    "json": JsonSink,
+    "ndjson": NdjsonSink,
+    "csv": CsvSink,
+    "parquet": ParquetSink,
+    "sqlite": SqliteSink,
+}
+
+def parse_formats(value: str) -> List[str]:
+    """解析 --formats=json,csv,...（保留順序、去除重複）"""
+    formats = list(dict.fromkeys(f.strip() for f in value.split(",") if f.strip()))
+    unknown = [f for f in formats if f not in SINKS]
+    if unknown:
+        raise ValueError(f"不支援的輸出格式: {', '.join(unknown)}（可用: {', '.join(SINKS)}）")
+    return formats
+
+def open_sinks(formats: List[str], directory: str, name: str,
+               compression: str = "none", columns: str = "*") -> List[Sink]:
+    """建立 <name> 的所有輸出目標（compression 只影響 ndjson）
+
+    columns 為 select_columns 的結果，決定表格式輸出的欄位（沒有資料時也會建立）。
+    """
+    os.makedirs(directory, exist_ok=True)
+    sinks = []
+    try:
+        for fmt in formats:
+            sinks.append(SINKS[fmt](directory, name, compression, select_list(columns)))
+    except BaseException:
+        for sink in sinks:
+            sink.abort()
+        raise
+    return sinks
+
+def export_rows(pages: Iterable[List[Dict]], sinks: List[Sink]) -> int:
+    """把每一頁交給所有輸出目標，回傳總筆數；失敗時捨棄所有輸出"""
+    count = 0
+    try:
+        for rows in pages:
+            for sink in sinks:
+                sink.write(rows)
+            count += len(rows)
+    except BaseException:
+        for sink in sinks:
+            sink.abort()
+        raise
+    for sink in sinks:
+        sink.close()
+    return count
+
+def export_snapshot(path: str, sinks: List[Sink], page_size: int = DEFAULT_PAGE_SIZE) -> int:
+    """把本機的匯出檔案轉成其他格式（不需重新下載）"""
+    return export_rows(iter_chunks(iter_records(path), page_size), sinks)
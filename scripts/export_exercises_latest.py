@@ -4,12 +4,30 @@
 重新匯出 exercises 表格（使用更新後的資料）
 
 這個腳本會從 Supabase 下載最新的 exercises 資料
+
+使用方式:
+    python scripts/export_exercises_latest.py [--formats=json,ndjson,csv,parquet,sqlite]
+                                              [--profile=catalog-min|lite] [--exclude=description]
+                                              [--refresh-catalog]
+
+資料來自動作目錄快取（database_export/exercises.catalog）：版本與資料庫相同時不重新下載，
+否則下載一次（分頁）並更新快取。每一頁同時寫入 --formats 指定的所有格式（預設 json）：
+database_export/exercises_latest.json / .ndjson / .csv / .parquet，
+sqlite 則寫入 database_export/database.sqlite 的 exercises_latest 表格。
+--profile / --exclude 只下載需要的欄位（例如 catalog-min 只取 id 與分類欄位）。
 """
 
 import os
 import json
 import sys
+from collections import Counter
 from datetime import datetime
+from cli_options import get_option
+from export_engine import (
+    iter_chunks, open_sinks, export_rows, parse_formats,
+    parse_profile, parse_exclude, project_columns,
+)
+from exercise_catalog import load_catalog
 
 # 設定輸出編碼
 sys.stdout.reconfigure(encoding='utf-8')
@@ -63,42 +81,46 @@ def main():
         print()
         print("[INFO] 正在連線到 Supabase...")
         
-        # 嘗試查詢
-        response = supabase.table('exercises').select('*').limit(1).execute()
+        # 動作目錄：快取與資料庫版本相同時不重新下載
+        catalog = load_catalog(supabase)
         
-        print("[INFO] ✅ 連線成功！")
-        print("[INFO] 正在下載所有 exercises 資料...")
+        print("[INFO] ✅ 已取得動作目錄！")
         
-        # 下載所有資料
-        response = supabase.table('exercises').select('*').execute()
-        exercises = response.data
+        # 統計在寫出時逐頁累計
+        training_types = Counter()
+        body_parts = Counter()
         
-        print(f"[INFO] 已下載 {len(exercises)} 個動作")
+        available = list(catalog.rows[0]) if catalog.rows else []
+        columns = project_columns(
+            available, 'exercises',
+            parse_profile(get_option('--profile', 'full')),
+            parse_exclude(get_option('--exclude', ''))
+        )
         
-        # 儲存為 JSON
-        output_file = 'database_export/exercises_latest.json'
-        os.makedirs('database_export', exist_ok=True)
+        def pages():
+            for rows in iter_chunks(catalog.rows):
+                if columns != available:
+                    rows = [{c: ex.get(c) for c in columns} for ex in rows]
+                for ex in rows:
+                    training_types[ex.get('training_type')] += 1
+                    body_parts.update(ex.get('body_parts') or [])
+                yield rows
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(exercises, f, ensure_ascii=False, indent=2, default=str)
+        # 下載所有資料，同時寫入所有格式
+        formats = parse_formats(get_option('--formats', 'json'))
+        sinks = open_sinks(formats, 'database_export', 'exercises_latest', columns=','.join(columns))
+        count = export_rows(pages(), sinks)
         
-        print(f"[INFO] 已儲存至：{output_file}")
+        print(f"[INFO] 已匯出 {count} 個動作")
+        for sink in sinks:
+            print(f"[INFO] 已儲存至：{sink.path}")
         
         # 顯示統計
-        from collections import Counter
-        
-        training_types = Counter([ex.get('training_type') for ex in exercises])
         print("\ntraining_type 分佈:")
         for tt, count in training_types.most_common():
             print(f"  {tt}: {count}")
         
         # body_parts 統計
-        body_parts_list = []
-        for ex in exercises:
-            bp = ex.get('body_parts', [])
-            if bp:
-                body_parts_list.extend(bp)
-        body_parts = Counter(body_parts_list)
         print("\nbody_parts 分佈 (前10):")
         for bp, count in body_parts.most_common(10):
             print(f"  {bp}: {count}")
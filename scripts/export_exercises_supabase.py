@@ -6,26 +6,58 @@
 功能：
 - 下載所有系統動作（exercises 表格）
 - 下載元數據（body_parts, exercise_types, equipments, joint_types）
-- 導出為 JSON 和 CSV 格式
+- 導出為 JSON 和 CSV 格式（可加上 NDJSON / Parquet / SQLite）
 - 支援篩選和搜尋
 
 使用方式:
-    python scripts/export_exercises_supabase.py
+    python scripts/export_exercises_supabase.py [--delta] [--compress=gzip|zstd]
+                                                [--formats=json,csv,parquet,sqlite]
+                                                [--profile=catalog-min|lite] [--exclude=description]
+
+多格式輸出（--formats，預設 json,csv）：
+- 動作只下載一次，同一份資料依序寫入所有格式（export_engine）
+- parquet → exercises_export.parquet（需要 pyarrow）
+- sqlite → database.sqlite 的 exercises_export 表格
+
+欄位投影（--profile / --exclude）：
+- catalog-min 只下載 id 與分類欄位，lite 排除說明文字與圖片連結
+- 投影記錄在 manifest.json，投影改變的表格改為完整下載
+
+精簡模式（--compress）：
+- 動作改為壓縮的 NDJSON（exercises_export.ndjson.gz / .ndjson.zst）
+- 元數據改為壓縮的精簡 JSON（metadata_export.json.gz / .json.zst）
+
+增量模式（--delta）：
+- 只下載 updated_at 晚於上次水位線（manifest.json）的資料
+- 合併到現有的 exercises_export.json / metadata_export.json
+- 以僅含 id 的清單比對出已刪除的資料（所有查詢都以 keyset 分頁，不受 max-rows 限制）
+- 合併後的筆數與 count='exact' 不符時改為完整下載
+- 增量合併需要 JSON / NDJSON 基準檔，--delta 時一定會寫出；
+  沒有寫出基準檔的執行不記錄水位線，下次改為完整下載
 
 輸出：
 - exercises_export.json - 完整 JSON 格式
 - exercises_export.csv - CSV 格式（適合 Excel）
 - metadata_export.json - 元數據
+- manifest.json - 每個表格的筆數與 updated_at 水位線
 """
 
 import sys
 import os
 import json
-import pandas as pd
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
 from supabase import create_client, Client
+from cli_options import get_option
+from snapshot_io import (
+    JSON_SUFFIXES, check_compression, find_snapshot,
+    load_document, write_document,
+)
+from export_engine import (
+    iter_chunks, iter_pages, open_sinks, export_rows, parse_formats,
+    parse_profile, parse_exclude, select_columns,
+)
 
 # 設置 UTF-8 輸出
 sys.stdout.reconfigure(encoding='utf-8')
@@ -60,76 +92,191 @@ if not SUPABASE_URL or not SUPABASE_KEY:
 # 初始化 Supabase Client
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
-def fetch_exercises() -> List[Dict[str, Any]]:
+OUTPUT_DIR = 'data/exports'
+MANIFEST_FILE = os.path.join(OUTPUT_DIR, 'manifest.json')
+
+# 增量模式
+DELTA_MODE = '--delta' in sys.argv
+
+def get_compression() -> str:
+    """讀取 --compress=gzip|zstd（預設為縮排 JSON）"""
+    return check_compression(get_option('--compress', 'none'))
+
+COMPRESSION = get_compression()
+
+# 可作為下次增量合併基準的格式（find_snapshot 讀得到的檔案）
+SNAPSHOT_FORMATS = {'json', 'ndjson'}
+
+def get_formats() -> List[str]:
+    """讀取 --formats=json,csv,...（預設 json,csv；精簡模式下 json 改為 ndjson）"""
+    formats = parse_formats(get_option('--formats', 'json,csv'))
+    if COMPRESSION != 'none':
+        formats = list(dict.fromkeys('ndjson' if f == 'json' else f for f in formats))
+    if DELTA_MODE and not SNAPSHOT_FORMATS & set(formats):
+        # 增量合併的基準檔
+        formats.insert(0, 'json' if COMPRESSION == 'none' else 'ndjson')
+    return formats
+
+FORMATS = get_formats()
+
+# 欄位投影
+PROFILE = parse_profile(get_option('--profile', 'full'))
+EXCLUDE = parse_exclude(get_option('--exclude', ''))
+
+def load_manifest() -> Dict[str, Any]:
+    """載入上次導出的水位線（沒有則為空）"""
+    if not os.path.exists(MANIFEST_FILE):
+        return {"tables": {}}
+    with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_manifest(manifest: Dict[str, Any]):
+    """儲存水位線"""
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    manifest["exported_at"] = datetime.now().isoformat()
+    with open(MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+def load_previous_export(name: str) -> Optional[Any]:
+    """載入上次導出的資料（任何格式，不存在則回傳 None）"""
+    filepath = find_snapshot(OUTPUT_DIR, name)
+    if filepath is None:
+        return None
+    return load_document(filepath)
+
+def latest_updated_at(rows: List[Dict], previous: Optional[str] = None) -> Optional[str]:
+    """取得資料中最新的 updated_at"""
+    values = [row['updated_at'] for row in rows if row.get('updated_at')]
+    if previous:
+        values.append(previous)
+    return max(values) if values else None
+
+def system_exercises_query(columns: str = '*', count: Optional[str] = None):
+    """系統動作查詢（user_id 為 null）"""
+    return supabase.table('exercises').select(columns, count=count).is_('user_id', 'null')
+
+def metadata_query(table: str, columns: str = '*', count: Optional[str] = None):
+    """元數據表格查詢"""
+    return supabase.table(table).select(columns, count=count)
+
+def fetch_all(make_query) -> List[Dict]:
+    """keyset 分頁下載查詢的所有資料（不會被 max-rows 截斷）"""
+    return [row for rows in iter_pages(make_query) for row in rows]
+
+def count_rows(make_query) -> int:
+    """count='exact' 取得表格目前的筆數（只回傳一筆 id）"""
+    return make_query('id', count='exact').limit(1).execute().count
+
+def fetch_table(name: str, make_query, previous_rows: Optional[List[Dict]],
+                manifest: Dict[str, Any]) -> List[Dict]:
+    """下載表格資料；增量模式下只下載變更並合併到上次的導出"""
+    state = manifest["tables"].get(name, {})
+    watermark = state.get("watermark")
+    columns = select_columns(supabase, name, PROFILE, EXCLUDE, ['updated_at'])
+    
+    # 上次導出的欄位不同時無法合併，改為完整下載
+    if DELTA_MODE and watermark and previous_rows is not None and state.get("columns", '*') == columns:
+        # 只下載水位線之後變更的資料
+        changed = fetch_all(lambda: make_query(columns).gte('updated_at', watermark))
+        changed_by_id = {row['id']: row for row in changed}
+        
+        # 僅 id 的清單，用來找出已刪除的資料
+        live_ids = {row['id'] for row in fetch_all(lambda: make_query('id'))}
+        
+        rows = []
+        for row in previous_rows:
+            if row['id'] not in live_ids:
+                continue
+            rows.append(changed_by_id.pop(row['id'], row))
+        rows.extend(changed_by_id.values())
+        
+        deleted = len(previous_rows) - (len(rows) - len(changed_by_id))
+        print(f"  🔄 {name}: {len(changed)} 筆變更, {deleted} 筆刪除（增量）")
+    else:
+        rows = fetch_all(lambda: make_query(columns))
+    
+    # 寫入 manifest 前確認筆數與資料庫相同
+    expected = count_rows(make_query)
+    if len(rows) != expected and DELTA_MODE:
+        print(f"  ⚠️  {name}: 合併後 {len(rows)} 筆，資料庫有 {expected} 筆，改為完整下載")
+        rows = fetch_all(lambda: make_query(columns))
+        watermark = None
+    if len(rows) != expected:
+        raise RuntimeError(f"{name}: 下載 {len(rows)} 筆，資料庫有 {expected} 筆")
+    
+    manifest["tables"][name] = {
+        "count": len(rows),
+        "watermark": latest_updated_at(rows, watermark if DELTA_MODE else None),
+        "columns": columns,
+    }
+    return rows
+
+def fetch_exercises(manifest: Dict[str, Any]) -> List[Dict[str, Any]]:
     """獲取所有動作資料"""
     print("\n[1/5] 正在下載動作資料...")
     
     try:
-        response = supabase.table('exercises').select('*').is_('user_id', 'null').execute()
-        exercises = response.data
+        exercises = fetch_table(
+            'exercises', system_exercises_query,
+            load_previous_export('exercises_export'), manifest
+        )
         print(f"✅ 成功下載 {len(exercises)} 個動作")
         return exercises
     except Exception as e:
         print(f"❌ 下載失敗: {e}")
+        manifest["tables"].pop('exercises', None)  # 下次改為完整下載
         return []
 
-def fetch_metadata() -> Dict[str, List[Dict]]:
+def fetch_metadata(manifest: Dict[str, Any]) -> Dict[str, List[Dict]]:
     """獲取所有元數據"""
     print("\n[2/5] 正在下載元數據...")
     
     metadata = {}
     tables = ['body_parts', 'exercise_types', 'equipments', 'joint_types']
+    previous = load_previous_export('metadata_export') or {}
     
     for table in tables:
         try:
-            response = supabase.table(table).select('*').execute()
-            metadata[table] = response.data
-            print(f"  ✅ {table}: {len(response.data)} 筆")
+            metadata[table] = fetch_table(
+                table, lambda columns='*', count=None, t=table: metadata_query(t, columns, count),
+                previous.get(table), manifest
+            )
+            print(f"  ✅ {table}: {len(metadata[table])} 筆")
         except Exception as e:
             print(f"  ❌ {table} 下載失敗: {e}")
+            manifest["tables"].pop(table, None)  # 下次改為完整下載
             metadata[table] = []
     
     return metadata
 
-def export_to_json(exercises: List[Dict], metadata: Dict, output_dir: str = 'data/exports'):
-    """導出為 JSON 格式"""
-    print("\n[3/5] 正在導出 JSON 格式...")
+def export_exercises(exercises: List[Dict], columns: str = '*', output_dir: str = 'data/exports'):
+    """導出動作（同一份資料一次寫入所有格式）"""
+    print(f"\n[3/5] 正在導出動作（{', '.join(FORMATS)}）...")
+    
+    sinks = open_sinks(FORMATS, output_dir, 'exercises_export', COMPRESSION, columns)
+    export_rows(iter_chunks(exercises), sinks)
+    for sink in sinks:
+        print(f"  ✅ {sink.path}")
+
+def export_metadata(metadata: Dict, output_dir: str = 'data/exports'):
+    """導出元數據"""
+    print("\n[4/5] 正在導出元數據...")
     
     # 創建輸出目錄
     os.makedirs(output_dir, exist_ok=True)
     
-    # 導出動作
-    exercises_file = os.path.join(output_dir, 'exercises_export.json')
-    with open(exercises_file, 'w', encoding='utf-8') as f:
-        json.dump(exercises, f, ensure_ascii=False, indent=2)
-    print(f"  ✅ 動作: {exercises_file}")
+    if COMPRESSION != 'none':
+        # 精簡模式：壓縮的精簡 JSON
+        metadata_file = os.path.join(output_dir, 'metadata_export' + JSON_SUFFIXES[COMPRESSION])
+        write_document(metadata_file, metadata, COMPRESSION)
+        print(f"  ✅ 元數據: {metadata_file}")
+        return
     
-    # 導出元數據
     metadata_file = os.path.join(output_dir, 'metadata_export.json')
     with open(metadata_file, 'w', encoding='utf-8') as f:
         json.dump(metadata, f, ensure_ascii=False, indent=2)
     print(f"  ✅ 元數據: {metadata_file}")
 
-def export_to_csv(exercises: List[Dict], output_dir: str = 'data/exports'):
-    """導出為 CSV 格式"""
-    print("\n[4/5] 正在導出 CSV 格式...")
-    
-    # 創建輸出目錄
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # 轉換為 DataFrame
-    df = pd.DataFrame(exercises)
-    
-    # 處理 JSONB 欄位（轉為字串）
-    for col in ['body_parts', 'muscle_groups']:
-        if col in df.columns:
-            df[col] = df[col].apply(lambda x: json.dumps(x, ensure_ascii=False) if x else '')
-    
-    # 導出 CSV
-    csv_file = os.path.join(output_dir, 'exercises_export.csv')
-    df.to_csv(csv_file, index=False, encoding='utf-8-sig')
-    print(f"  ✅ CSV: {csv_file}")
-
 def print_statistics(exercises: List[Dict], metadata: Dict):
     """列印統計資訊"""
     print("\n[5/5] 統計資訊")
@@ -186,30 +333,40 @@ def main():
     print("StrengthWise - 動作資料導出工具（Supabase 版本）")
     print("=" * 60)
     print(f"時間: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"模式: {'增量' if DELTA_MODE else '完整'}")
+    
+    manifest = load_manifest()
     
     # 1. 下載動作
-    exercises = fetch_exercises()
+    exercises = fetch_exercises(manifest)
     if not exercises:
         print("\n❌ 無法下載動作資料，程式終止")
         sys.exit(1)
     
     # 2. 下載元數據
-    metadata = fetch_metadata()
+    metadata = fetch_metadata(manifest)
     
-    # 3. 導出 JSON
-    export_to_json(exercises, metadata)
+    # 3. 導出動作（所有格式）
+    export_exercises(exercises, manifest["tables"]['exercises'].get("columns", '*'))
+    if not SNAPSHOT_FORMATS & set(FORMATS):
+        # 沒有 JSON / NDJSON 基準檔，下次增量會合併到舊的快照，因此不記錄水位線
+        manifest["tables"]['exercises']["watermark"] = None
+        print("  ℹ️  未輸出 json / ndjson，下次 --delta 會完整下載動作")
     
-    # 4. 導出 CSV
-    export_to_csv(exercises)
+    # 4. 導出元數據
+    export_metadata(metadata)
     
     # 5. 統計資訊
     print_statistics(exercises, metadata)
     
+    # 儲存水位線供下次增量導出
+    save_manifest(manifest)
+    
     print("\n✅ 導出完成！")
     print("\n輸出文件:")
-    print("  - data/exports/exercises_export.json")
-    print("  - data/exports/exercises_export.csv")
+    print(f"  - data/exports/exercises_export.* ({', '.join(FORMATS)})")
     print("  - data/exports/metadata_export.json")
+    print("  - data/exports/manifest.json")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,621 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多用戶壓力測試資料生成器（Supabase 版本）
+
+為容量測試（migration 015 的索引、migration 019 的彙總觸發器）產生
+大量用戶、每人長時間的訓練歷史：
+- 用戶數量、歷史天數、訓練課表比例都可以指定
+- 每位用戶的訓練記錄由 process pool 平行生成（同一個 --seed 結果相同）
+- 生成結果邊產生邊送進輸出端（REST、--emit-copy 或 --emit-ndjson），記憶體只保留少數幾個區塊
+- --vectorized 改用 NumPy 一次產生整個區塊的所有組數（vectorized_history.py），
+  worker 只回傳陣列，寫入時才組成 dict，適合數百萬組以上的資料量
+
+使用方式:
+    # 建立 100 個測試帳號（auth.users，觸發器會建立 public.users），每人一年的訓練記錄
+    python scripts/generate_load_dataset.py --users=100 --days=365 --create-users
+
+    # 使用已存在的用戶（每行一個 UUID，預設 scripts/load_test_users.txt）
+    python scripts/generate_load_dataset.py --users=10000 --user-file=load_test_users.txt
+
+    # 只生成不寫入，測量生成速度
+    python scripts/generate_load_dataset.py --users=10000 --create-users --dry-run
+    python scripts/generate_load_dataset.py --users=10000 --create-users --dry-run --vectorized
+
+    # 固定的資料集設定（種子與結束日期固定，同一份用戶清單每次結果逐位元相同）
+    python scripts/generate_load_dataset.py --profile=coach-heavy --user-file=load_test_users.txt
+    python scripts/generate_load_dataset.py --profile=10k-users --create-users --emit-ndjson
+
+資料集設定（--profile，其他選項仍可覆寫）:
+    small          10 位用戶 × 90 天
+    coach-heavy    500 位用戶 × 365 天，10% 為教練，90% 學員的訓練由教練建立（plan_type=trainer）
+    10k-users      10000 位用戶 × 365 天，NumPy 向量化
+
+選項:
+    --profile=NAME       資料集設定（small、coach-heavy、10k-users）
+    --users=N            用戶數量（預設 100）
+    --days=N             每位用戶的歷史天數（預設 365）
+    --mix=ppl:5,upper_lower:3,full_body:2,bro_split:0
+                         訓練課表比例（權重，不需加總為 1）
+    --workers=N          生成用的 process 數量（預設 CPU 數）
+    --chunk-size=N       每個工作區塊的用戶數（預設 50 位 × 365 天換算，--days 越長區塊越小）
+    --batch-size=N       每批寫入筆數（預設 500）
+    --concurrency=N      同時送出的寫入請求數（預設 4）
+    --retries=N          429 / 5xx 的重試次數（預設 5）
+    --seed=N             隨機種子（預設 42）
+    --end-date=YYYY-MM-DD
+                         歷史的最後一天（預設今天；--profile 時固定）
+    --coach-ratio=R      教練佔用戶的比例（預設 0）
+    --coached-ratio=R    學員中由教練建立訓練的比例（預設 0）
+    --vectorized         用 NumPy 向量化生成（需要 numpy；同 --seed 與 --chunk-size 結果相同）
+    --create-users       用 Auth Admin API 建立測試帳號，UUID 附加到 --user-file
+                         （--dry-run、--emit-ndjson 時改用固定的虛擬 UUID；--emit-copy 仍建立
+                         真實帳號，load.sql 的 user_id 外鍵才成立）
+    --user-file=PATH     用戶 UUID 檔案
+    --dry-run            只生成不寫入
+    --bulk-load          寫入期間暫停彙總觸發器，寫入後一次重建彙總（需要 migration 021）
+    --emit-copy[=DIR]    不寫入資料庫，輸出 COPY CSV 與 load.sql（預設 data/copy）
+    --emit-ndjson[=DIR]  不寫入資料庫，輸出 workout_plans.ndjson（預設 data/ndjson）
+"""
+
+import os
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Tuple
+
+from bulk_insert import get_batch_size
+from cli_options import get_option
+from exercise_catalog import load_catalog
+from id_allocator import IdAllocator
+from copy_output import sql_literal
+from bulk_load import defer_copy_summaries, deferred_summaries, is_bulk_load
+from record_sinks import CopySink, get_sink
+
+# 獲取專案根目錄
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+ENV_FILE = os.path.join(PROJECT_ROOT, '.env')
+
+DEFAULT_USER_FILE = os.path.join(SCRIPT_DIR, 'load_test_users.txt')
+DEFAULT_MIX = 'ppl:5,upper_lower:3,full_body:2'
+# 固定的資料集設定：同一個設定（與同一份用戶清單）每次生成的資料逐位元相同
+PROFILES: Dict[str, Dict] = {
+    "small": {
+        "users": 10, "days": 90, "mix": DEFAULT_MIX, "seed": 42, "end_date": "2025-01-01",
+    },
+    "coach-heavy": {
+        "users": 500, "days": 365, "mix": "ppl:3,upper_lower:3,full_body:3,bro_split:1",
+        "seed": 7, "end_date": "2025-01-01", "coach_ratio": 0.1, "coached_ratio": 0.9,
+    },
+    "10k-users": {
+        "users": 10000, "days": 365, "mix": DEFAULT_MIX, "seed": 10000, "end_date": "2025-01-01",
+        "vectorized": True,
+    },
+}
+# 預設每個區塊的用戶 × 天數（50 位用戶 × 一年），多年的歷史自動縮小區塊，記憶體用量不隨 --days 增加
+DEFAULT_CHUNK_USER_DAYS = 50 * 365
+
+# 測試帳號
+LOAD_TEST_EMAIL = 'loadtest+{tag}-{index}@strengthwise.test'
+LOAD_TEST_PASSWORD = 'LoadTest-123456'
+
+# 需要的動作（與 reset_user_data_and_generate.py 相同的關鍵字）
+EXERCISE_QUERIES = {
+    "bench_press": "臥推",
+    "incline_press": "上斜",
+    "chest_fly": "飛鳥",
+    "deadlift": "硬舉",
+    "pull_up": "引體",
+    "barbell_row": "划船",
+    "lat_pulldown": "下拉",
+    "squat": "深蹲",
+    "leg_press": "腿推",
+    "leg_curl": "腿彎舉",
+    "leg_extension": "腿伸展",
+    "shoulder_press": "肩推",
+    "lateral_raise": "側平舉",
+    "front_raise": "前平舉",
+    "bicep_curl": "二頭彎舉",
+    "tricep_extension": "三頭",
+    "hammer_curl": "錘式",
+}
+
+# 訓練日：(標題, [(動作, 組數, 基礎重量 kg, 次數), ...])
+PUSH_DAY = ("胸肩三頭訓練", [
+    ("bench_press", 5, 60.0, 8),
+    ("incline_press", 4, 22.0, 10),
+    ("chest_fly", 3, 15.0, 12),
+    ("shoulder_press", 4, 18.0, 10),
+    ("lateral_raise", 3, 8.0, 12),
+    ("tricep_extension", 3, 12.0, 12),
+])
+PULL_DAY = ("背二頭訓練", [
+    ("deadlift", 5, 80.0, 6),
+    ("pull_up", 4, 0.0, 8),
+    ("barbell_row", 4, 50.0, 10),
+    ("lat_pulldown", 3, 45.0, 12),
+    ("bicep_curl", 3, 12.0, 12),
+])
+LEG_DAY = ("腿部訓練", [
+    ("squat", 5, 80.0, 8),
+    ("leg_press", 4, 120.0, 10),
+    ("leg_curl", 3, 35.0, 12),
+    ("leg_extension", 3, 40.0, 12),
+])
+UPPER_DAY = ("上肢訓練", [
+    ("bench_press", 4, 60.0, 8),
+    ("barbell_row", 4, 50.0, 10),
+    ("shoulder_press", 3, 18.0, 10),
+    ("lat_pulldown", 3, 45.0, 12),
+    ("bicep_curl", 3, 12.0, 12),
+    ("tricep_extension", 3, 12.0, 12),
+])
+LOWER_DAY = ("下肢訓練", [
+    ("squat", 5, 80.0, 8),
+    ("deadlift", 3, 80.0, 6),
+    ("leg_press", 4, 120.0, 10),
+    ("leg_curl", 3, 35.0, 12),
+])
+FULL_BODY_DAY = ("全身訓練", [
+    ("squat", 4, 80.0, 8),
+    ("bench_press", 4, 60.0, 8),
+    ("barbell_row", 4, 50.0, 10),
+    ("shoulder_press", 3, 18.0, 10),
+])
+SHOULDER_DAY = ("肩部訓練", [
+    ("shoulder_press", 4, 18.0, 10),
+    ("front_raise", 3, 8.0, 12),
+    ("lateral_raise", 3, 8.0, 12),
+])
+ARM_DAY = ("手臂訓練", [
+    ("bicep_curl", 4, 12.0, 12),
+    ("hammer_curl", 3, 12.0, 12),
+    ("tricep_extension", 4, 12.0, 12),
+])
+
+# 課表 → 循環的訓練日
+PROGRAMS: Dict[str, List[Tuple[str, List[Tuple[str, int, float, int]]]]] = {
+    "ppl": [PUSH_DAY, PULL_DAY, LEG_DAY],
+    "upper_lower": [UPPER_DAY, LOWER_DAY],
+    "full_body": [FULL_BODY_DAY],
+    "bro_split": [
+        ("胸部訓練", PUSH_DAY[1][:3]),
+        ("背部訓練", PULL_DAY[1][:4]),
+        LEG_DAY,
+        SHOULDER_DAY,
+        ARM_DAY,
+    ],
+}
+
+def parse_mix(value: str) -> List[Tuple[str, float]]:
+    """解析 --mix=ppl:5,upper_lower:3 → [(課表, 權重), ...]"""
+    mix = []
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, weight = item.partition(':')
+        if name not in PROGRAMS:
+            raise ValueError(f"未知的課表: {name}（可用: {', '.join(PROGRAMS)}）")
+        weight = float(weight) if weight else 1.0
+        if weight > 0:
+            mix.append((name, weight))
+    if not mix:
+        raise ValueError("--mix 至少需要一個權重大於 0 的課表")
+    return mix
+
+def get_profile(name: str) -> Dict:
+    """取得 --profile 的設定（未指定時為空）"""
+    if not name:
+        return {}
+    if name not in PROFILES:
+        raise ValueError(f"未知的資料集設定: {name}（可用: {', '.join(PROFILES)}）")
+    return PROFILES[name]
+
+def parse_end_date(value: str) -> datetime:
+    """解析 --end-date（未指定時為現在）"""
+    if not value:
+        return datetime.now()
+    return datetime.strptime(value, '%Y-%m-%d').replace(hour=12)
+
+def assign_coaches(user_ids: List[str], coach_ratio: float, coached_ratio: float,
+                   seed: int) -> Tuple[List[str], Dict[str, str]]:
+    """前 coach_ratio 比例的用戶為教練，其餘用戶依 coached_ratio 分配給教練
+
+    回傳 (教練清單, {學員: 教練})，同一個 seed 與用戶清單結果相同。
+    """
+    coach_count = min(len(user_ids), round(len(user_ids) * coach_ratio))
+    coaches = user_ids[:coach_count]
+    coach_of = {}
+    if coaches:
+        rng = random.Random(f"{seed}:coaches")
+        for user_id in user_ids[coach_count:]:
+            if rng.random() < coached_ratio:
+                coach_of[user_id] = rng.choice(coaches)
+    return coaches, coach_of
+
+def assign_trainer_plans(records: Iterator[Dict], coach_of: Dict[str, str]) -> Iterator[Dict]:
+    """有教練的學員：訓練改由教練建立（creator_id = 教練，plan_type = trainer）"""
+    for record in records:
+        coach_id = coach_of.get(record['trainee_id'])
+        if coach_id:
+            record['creator_id'] = coach_id
+            record['plan_type'] = 'trainer'
+        yield record
+
+def create_sets(num_sets: int, base_weight: float, base_reps: int) -> List[Dict]:
+    """創建組數記錄（符合 SetRecord 模型，與 reset_user_data_and_generate.py 相同的金字塔組）"""
+    sets = []
+    for i in range(num_sets):
+        weight_factor = 1.0 if i < 2 else 0.9
+        reps_factor = 1.0 if i < 2 else 1.1
+        sets.append({
+            "setNumber": i + 1,
+            "reps": int(base_reps * reps_factor),
+            "weight": round(base_weight * weight_factor, 1),
+            "restTime": 90,
+            "completed": True,
+            "note": ""
+        })
+    return sets
+
+def create_exercise_record(exercise: Dict, num_sets: int, weight: float, reps: int) -> Dict:
+    """創建訓練動作（符合 ExerciseRecord 模型，含 Phase 3 觸發器需要的 trainingType）"""
+    return {
+        "exerciseId": exercise['exerciseId'],
+        "exerciseName": exercise['name'],
+        "actionName": exercise.get('actionName', ''),
+        "equipment": exercise.get('equipment', ''),
+        "bodyParts": exercise.get('bodyParts', []),
+        "trainingType": exercise.get('trainingType', '阻力訓練'),
+        "sets": create_sets(num_sets, weight, reps),
+        "notes": "",
+        "completed": True
+    }
+
+def create_workout_record(record_id: str, date: datetime, title: str,
+                          exercises: List[Dict], user_id: str) -> Dict:
+    """創建已完成的訓練記錄（符合 workout_plans 表結構）"""
+    total_volume = sum(s['weight'] * s['reps'] for ex in exercises for s in ex['sets'])
+    return {
+        "id": record_id,
+        "user_id": user_id,
+        "trainee_id": user_id,
+        "creator_id": user_id,
+        "title": title,
+        "description": f"專業訓練計劃 - {title}",
+        "scheduled_date": date.isoformat(),
+        "completed": True,
+        "completed_date": date.isoformat(),
+        "exercises": exercises,
+        "plan_type": "personal",
+        "total_exercises": len(exercises),
+        "total_sets": sum(len(ex['sets']) for ex in exercises),
+        "total_volume": round(total_volume, 1),
+        "note": ""
+    }
+
+def pick_program(rng: random.Random, mix: List[Tuple[str, float]]) -> str:
+    """依權重抽一個課表"""
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+    return rng.choices(names, weights=weights)[0]
+
+def generate_user_history(user_id: str, exercises: Dict[str, Dict], days: int,
+                          end_date: datetime, mix: List[Tuple[str, float]],
+                          seed: int) -> List[Dict]:
+    """生成單一用戶 days 天的訓練記錄
+
+    每位用戶有自己的課表、每週訓練次數、力量基礎與進步速度；
+    亂數與 ID 以 (seed, user_id) 初始化，與分區方式無關。
+    """
+    rng = random.Random(f"{seed}:{user_id}")
+    ids = IdAllocator(f"{seed}:{user_id}:ids")
+    program = PROGRAMS[pick_program(rng, mix)]
+    sessions_per_week = rng.randint(2, 6)
+    strength = rng.uniform(0.6, 1.4)
+    progress_per_week = rng.uniform(0.005, 0.025)
+
+    records = []
+    cycle_index = 0
+    start_date = end_date - timedelta(days=days)
+    for day in range(days):
+        if rng.random() >= sessions_per_week / 7:
+            continue
+        week = day // 7
+        # 進步幅度上限 60%，避免一年後重量不合理
+        multiplier = strength * (1.0 + min(week * progress_per_week, 0.6))
+        title, prescription = program[cycle_index % len(program)]
+        workout = [
+            create_exercise_record(exercises[key], sets, round(weight * multiplier, 1), reps)
+            for key, sets, weight, reps in prescription
+            if key in exercises
+        ]
+        cycle_index += 1
+        if not workout:
+            continue
+        date = (start_date + timedelta(days=day)).replace(
+            hour=rng.randint(6, 21), minute=rng.choice((0, 15, 30, 45)), second=0, microsecond=0
+        )
+        records.append(create_workout_record(ids.next_id(), date, f"{title} - 第{week + 1}週", workout, user_id))
+    return records
+
+def generate_chunk(task: Tuple[int, List[str], Dict]) -> List[Dict]:
+    """（worker process）生成一個區塊內所有用戶的訓練記錄"""
+    _, user_ids, config = task
+    records = []
+    for user_id in user_ids:
+        records.extend(generate_user_history(
+            user_id, config['exercises'], config['days'],
+            config['end_date'], config['mix'], config['seed']
+        ))
+    return records
+
+def generate_chunk_arrays(task: Tuple[int, List[str], Dict]) -> Dict:
+    """（worker process）向量化生成一個區塊，只回傳陣列"""
+    from vectorized_history import generate_history_arrays
+
+    chunk_index, user_ids, config = task
+    return generate_history_arrays(
+        user_ids, PROGRAMS, config['exercises'], config['days'],
+        config['end_date'], config['mix'], config['seed'], chunk_index
+    )
+
+def iter_generated_records(user_ids: List[str], config: Dict, workers: int,
+                           chunk_size: int, stats: Dict) -> Iterator[Dict]:
+    """平行生成並依區塊順序逐筆輸出（輸出順序與 worker 數量無關）
+
+    同時最多只有 workers * 2 個區塊在生成或等待寫入，
+    寫入速度跟不上時生成會暫停，記憶體用量固定。
+    config['vectorized'] 為真時 worker 回傳陣列，在這裡才組成記錄。
+    """
+    chunks = deque(enumerate(user_ids[i:i + chunk_size] for i in range(0, len(user_ids), chunk_size)))
+    total_chunks = len(chunks)
+    vectorized = config.get('vectorized', False)
+    if vectorized:
+        from vectorized_history import count_sets, iter_history_records
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        while chunks or pending:
+            while chunks and len(pending) < workers * 2:
+                chunk_index, chunk = chunks.popleft()
+                worker = generate_chunk_arrays if vectorized else generate_chunk
+                pending.append(executor.submit(worker, (chunk_index, chunk, config)))
+            # 依送出順序取結果，後面的區塊仍在背景生成
+            result = pending.popleft().result()
+            if vectorized:
+                count = len(result['id'])
+                sets = count_sets(result)
+                records = iter_history_records(result, config['exercises'])
+            else:
+                count = len(result)
+                sets = sum(record['total_sets'] for record in result)
+                records = result
+            stats['chunks'] += 1
+            stats['records'] += count
+            stats['sets'] += sets
+            print(f"  🧮 區塊 {stats['chunks']}/{total_chunks}: {count} 筆訓練記錄、{sets} 組")
+            yield from records
+
+def load_environment():
+    """載入 .env（與其他腳本相同，會先清除 BOM）"""
+    from dotenv import load_dotenv
+
+    if os.path.exists(ENV_FILE):
+        with open(ENV_FILE, 'r', encoding='utf-8-sig') as f:
+            env_content = f.read()
+        temp_env = ENV_FILE + '.tmp'
+        with open(temp_env, 'w', encoding='utf-8') as f:
+            f.write(env_content)
+        load_dotenv(temp_env)
+        os.remove(temp_env)
+        print(f"✅ 已載入環境變數: {ENV_FILE}")
+    else:
+        print(f"⚠️  找不到 .env 文件: {ENV_FILE}")
+        load_dotenv()
+
+def get_client():
+    """建立 Supabase client（需要 service role key）"""
+    from supabase import create_client
+
+    url = os.getenv("SUPABASE_URL")
+    key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    if not url or not key:
+        print("[ERROR] 請設置 SUPABASE_URL 和 SUPABASE_SERVICE_ROLE_KEY 環境變數")
+        sys.exit(1)
+    return create_client(url, key)
+
+def get_exercises(client) -> Dict[str, Dict]:
+    """從資料庫獲取真實動作（動作目錄來自本機快取，在本機解析關鍵字，傳給所有 worker）"""
+    try:
+        resolver = load_catalog(client).resolver()
+    except Exception as e:
+        print(f"  ❌ 讀取動作目錄失敗 - {e}")
+        return {}
+    exercises = {}
+    for key, keyword in EXERCISE_QUERIES.items():
+        ex = resolver.resolve(keyword)
+        if not ex:
+            print(f"  ⚠️  {key}: 找不到包含 '{keyword}' 的動作")
+            continue
+        exercises[key] = {
+            "exerciseId": ex['id'],
+            "name": ex['name'],
+            "actionName": ex.get('action_name') or keyword,
+            "equipment": ex.get('equipment') or '',
+            "bodyParts": ex.get('body_parts') or [],
+            "trainingType": ex.get('training_type') or '阻力訓練',
+        }
+    print(f"✅ 成功獲取 {len(exercises)}/{len(EXERCISE_QUERIES)} 個動作")
+    return exercises
+
+def load_user_ids(path: str) -> List[str]:
+    """讀取用戶 UUID 檔案（每行一個，# 開頭為註解）"""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+def create_users(client, count: int, path: str, workers: int) -> List[str]:
+    """用 Auth Admin API 建立測試帳號，UUID 附加寫入 path"""
+    tag = datetime.now().strftime('%Y%m%d%H%M%S')
+
+    def create(index: int) -> str:
+        response = client.auth.admin.create_user({
+            "email": LOAD_TEST_EMAIL.format(tag=tag, index=index),
+            "password": LOAD_TEST_PASSWORD,
+            "email_confirm": True,
+            "user_metadata": {"display_name": f"Load Test {index}"},
+        })
+        return response.user.id
+
+    created = []
+    failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor, open(path, 'a', encoding='utf-8') as f:
+        for index, future in enumerate([executor.submit(create, i) for i in range(count)], start=1):
+            try:
+                user_id = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"  ❌ 第 {index} 個帳號建立失敗: {e}")
+                continue
+            created.append(user_id)
+            f.write(user_id + '\n')
+            if index % 100 == 0 or index == count:
+                print(f"  👤 已建立 {len(created)}/{count} 個帳號")
+    if failed:
+        print(f"⚠️  {failed} 個帳號建立失敗")
+    return created
+
+def mark_coaches(client, coaches: List[str], chunk_size: int = 100):
+    """把教練帳號標記為 is_coach"""
+    for start in range(0, len(coaches), chunk_size):
+        client.table('users').update({'is_coach': True}).in_('id', coaches[start:start + chunk_size]).execute()
+    print(f"  ✅ 已標記 {len(coaches)} 位教練（users.is_coach）")
+
+def mark_copy_coaches(writer, coaches: List[str], chunk_size: int = 100):
+    """COPY 模式：在 load.sql 裡標記教練（\\copy 之前執行）"""
+    for start in range(0, len(coaches), chunk_size):
+        ids = ', '.join(sql_literal(coach) for coach in coaches[start:start + chunk_size])
+        writer.execute(f"UPDATE users SET is_coach = TRUE WHERE id IN ({ids})")
+    print(f"  ✅ load.sql 會標記 {len(coaches)} 位教練（users.is_coach）")
+
+def main():
+    """主函數"""
+    sys.stdout.reconfigure(encoding='utf-8')
+
+    profile_name = get_option('--profile', '')
+    profile = get_profile(profile_name)
+    user_count = int(get_option('--users', str(profile.get('users', 100))))
+    days = int(get_option('--days', str(profile.get('days', 365))))
+    mix = parse_mix(get_option('--mix', profile.get('mix', DEFAULT_MIX)))
+    workers = int(get_option('--workers', str(os.cpu_count() or 1)))
+    chunk_size = max(1, int(get_option('--chunk-size', str(DEFAULT_CHUNK_USER_DAYS // max(days, 1)))))
+    batch_size = get_batch_size()
+    seed = int(get_option('--seed', str(profile.get('seed', 42))))
+    end_date = parse_end_date(get_option('--end-date', profile.get('end_date', '')))
+    coach_ratio = float(get_option('--coach-ratio', str(profile.get('coach_ratio', 0))))
+    coached_ratio = float(get_option('--coached-ratio', str(profile.get('coached_ratio', 0))))
+    user_file = get_option('--user-file', DEFAULT_USER_FILE)
+    dry_run = '--dry-run' in sys.argv
+    vectorized = '--vectorized' in sys.argv or profile.get('vectorized', False)
+    if vectorized:
+        from vectorized_history import _numpy
+        _numpy()
+
+    print("=" * 60)
+    print("多用戶壓力測試資料生成器")
+    print("=" * 60)
+    if profile_name:
+        print(f"資料集設定: {profile_name}（seed {seed}，結束日期 {end_date:%Y-%m-%d}）")
+    print(f"用戶: {user_count}，歷史: {days} 天，課表: {', '.join(f'{n}:{w:g}' for n, w in mix)}")
+    print(f"worker: {workers}，區塊: {chunk_size} 位用戶，批次: {batch_size} 筆"
+          f"{'，NumPy 向量化' if vectorized else ''}{'，暫停彙總觸發器' if is_bulk_load() else ''}"
+          f"{'（dry run）' if dry_run else ''}")
+
+    load_environment()
+    client = get_client()
+    try:
+        sink = get_sink(client, batch_size)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print("\n步驟 1: 準備用戶")
+    if '--create-users' in sys.argv:
+        if dry_run or sink.name == 'NDJSON':
+            user_ids = [f"00000000-0000-4000-8000-{i:012d}" for i in range(user_count)]
+            print(f"  ⏭️  {'dry run' if dry_run else '輸出檔案'}：使用 {user_count} 個虛擬 UUID")
+        else:
+            user_ids = create_users(client, user_count, user_file, min(workers * 4, 32))
+    else:
+        user_ids = load_user_ids(user_file)[:user_count]
+        if not user_ids:
+            print(f"❌ {user_file} 沒有用戶 UUID，請加上 --create-users 或指定 --user-file")
+            sys.exit(1)
+        if len(user_ids) < user_count:
+            print(f"⚠️  {user_file} 只有 {len(user_ids)} 個用戶")
+    print(f"✅ {len(user_ids)} 位用戶")
+
+    coaches, coach_of = assign_coaches(user_ids, coach_ratio, coached_ratio, seed)
+    if coaches:
+        print(f"✅ {len(coaches)} 位教練，{len(coach_of)} 位學員由教練建立訓練")
+        if not dry_run and sink.name == 'REST':
+            mark_coaches(client, coaches)
+        elif not dry_run and isinstance(sink, CopySink):
+            mark_copy_coaches(sink.writer, coaches)
+
+    print("\n步驟 2: 獲取真實動作")
+    exercises = get_exercises(client)
+    if not exercises:
+        print("❌ 找不到任何動作，無法生成訓練記錄")
+        sys.exit(1)
+
+    print("\n步驟 3: 平行生成並批次寫入訓練記錄")
+    config = {
+        "exercises": exercises,
+        "days": days,
+        "end_date": end_date,
+        "mix": mix,
+        "seed": seed,
+        "vectorized": vectorized,
+    }
+    stats = {"chunks": 0, "records": 0, "sets": 0}
+    started = time.perf_counter()
+    records = iter_generated_records(user_ids, config, workers, chunk_size, stats)
+    if coach_of:
+        records = assign_trainer_plans(records, coach_of)
+
+    failures = []
+    if dry_run:
+        for _ in records:
+            pass
+        inserted = 0
+    else:
+        if is_bulk_load() and isinstance(sink, CopySink):
+            defer_copy_summaries(sink.writer, user_ids)
+        with deferred_summaries(client, user_ids, enabled=is_bulk_load() and sink.name == 'REST'):
+            inserted, failures = sink.write(
+                'workout_plans', records,
+                describe=lambda r: f"{r['user_id'][:8]} {r['scheduled_date'][:10]}"
+            )
+        load_script = sink.close()
+    elapsed = time.perf_counter() - started
+
+    print("\n" + "=" * 60)
+    print(f"✅ 生成 {stats['records']} 筆訓練記錄、{stats['sets']} 組（{len(user_ids)} 位用戶），耗時 {elapsed:.1f} 秒"
+          f"（{stats['records'] / max(elapsed, 1e-9):.0f} 筆/秒）")
+    if not dry_run:
+        print(f"✅ 寫入 {inserted} 筆（{sink.name}）")
+        if load_script:
+            print(f"載入資料庫：psql \"$DATABASE_URL\" -f {load_script}")
+        if failures:
+            print(f"❌ {sum(f['count'] for f in failures)} 筆寫入失敗（{len(failures)} 批）")
+    print("=" * 60)
+
+if __name__ == "__main__":
+    main()
@@ -11,22 +11,33 @@
 - 支援漸進式超負荷原則
 
 使用方式:
-    python scripts/generate_training_data_supabase.py [user_id]
+    python scripts/generate_training_data_supabase.py [user_id] [--emit-copy[=DIR]] [--concurrency=4] [--retries=5] [--bulk-load]
     
 範例:
     python scripts/generate_training_data_supabase.py
     python scripts/generate_training_data_supabase.py 550e8400-e29b-41d4-a716-446655440000
+
+    # 不寫入資料庫，輸出 data/copy/workout_plans.csv 與 load.sql
+    python scripts/generate_training_data_supabase.py 550e8400-e29b-41d4-a716-446655440000 --emit-copy
+    psql "$DATABASE_URL" -f data/copy/load.sql
+
+    # 寫入期間暫停彙總觸發器，寫入後一次重建（需要 migration 021）
+    python scripts/generate_training_data_supabase.py 550e8400-e29b-41d4-a716-446655440000 --bulk-load
 """
 
 import sys
 import os
 import uuid
 import random
-import string
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
 from dotenv import load_dotenv
 from supabase import create_client, Client
+from bulk_insert import get_batch_size, insert_batches
+from exercise_catalog import load_catalog
+from id_allocator import IdAllocator
+from copy_output import CopyWriter, get_copy_dir
+from bulk_load import defer_copy_summaries, deferred_summaries, is_bulk_load
 
 # 設置 UTF-8 輸出
 sys.stdout.reconfigure(encoding='utf-8')
@@ -45,9 +56,16 @@ if not SUPABASE_URL or not SUPABASE_KEY:
 # 初始化 Supabase Client
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
+# --emit-copy：輸出 COPY 檔案而不寫入資料庫
+COPY_DIR = get_copy_dir()
+
+# 訓練記錄 ID（只取一次熵，區塊式產生）
+ID_ALLOCATOR = IdAllocator()
+
 # 目標用戶 ID（可通過命令列參數指定）
-if len(sys.argv) > 1:
-    TARGET_USER_ID = sys.argv[1]
+ARGS = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+if ARGS:
+    TARGET_USER_ID = ARGS[0]
     print(f"使用命令列指定的 User ID: {TARGET_USER_ID}")
 else:
     TARGET_USER_ID = None
@@ -58,28 +76,8 @@ else:
         sys.exit(1)
 
 def generate_firestore_id() -> str:
-    """生成 Firestore 相容的 ID（20 字符）"""
-    chars = string.ascii_letters + string.digits
-    return ''.join(random.choice(chars) for _ in range(20))
-
-def get_exercise_by_name(name_keyword: str) -> Dict[str, Any]:
-    """根據關鍵字獲取動作"""
-    try:
-        response = supabase.table('exercises')\
-            .select('*')\
-            .is_('user_id', 'null')\
-            .ilike('name', f'%{name_keyword}%')\
-            .limit(1)\
-            .execute()
-        
-        if response.data:
-            return response.data[0]
-        else:
-            print(f"⚠️  找不到包含 '{name_keyword}' 的動作")
-            return None
-    except Exception as e:
-        print(f"❌ 查詢動作失敗: {e}")
-        return None
+    """生成 Firestore 相容的 ID（20 字符，區塊式產生）"""
+    return ID_ALLOCATOR.next_id()
 
 def get_common_exercises() -> Dict[str, Dict]:
     """獲取常見訓練動作"""
@@ -104,9 +102,16 @@ def get_common_exercises() -> Dict[str, Dict]:
         "tricep": "三頭",
     }
     
+    # 動作目錄來自本機快取（只確認一次版本），關鍵字在本機解析
+    try:
+        resolver = load_catalog(supabase).resolver()
+    except Exception as e:
+        print(f"❌ 讀取動作目錄失敗: {e}")
+        return {}
+    
     exercises = {}
     for key, keyword in exercise_keywords.items():
-        exercise = get_exercise_by_name(keyword)
+        exercise = resolver.resolve(keyword)
         if exercise:
             exercises[key] = {
                 "id": exercise['id'],
@@ -118,7 +123,7 @@ def get_common_exercises() -> Dict[str, Dict]:
             }
             print(f"  ✅ {key}: {exercise['name'][:30]}...")
         else:
-            print(f"  ❌ {key}: 找不到動作")
+            print(f"  ❌ {key}: 找不到包含 '{keyword}' 的動作")
     
     return exercises
 
@@ -165,9 +170,6 @@ def create_workout_plan(date: datetime, title: str, plan_type: str,
         if ex.get('weight') and ex.get('reps')
     )
     
-    # 計算訓練時長（約5分鐘/組）
-    training_time = total_sets * 5
-    
     return {
         "id": plan_id,
         "user_id": user_id,
@@ -180,7 +182,7 @@ def create_workout_plan(date: datetime, title: str, plan_type: str,
         "completed_date": date.isoformat(),
         "exercises": exercises,
         "plan_type": "personal",
-        "training_time": training_time,
+        # training_time 欄位在資料庫中是 TIMESTAMPTZ，不能存訓練分鐘數
         "total_exercises": total_exercises,
         "total_sets": total_sets,
         "total_volume": total_volume,
@@ -337,6 +339,7 @@ def generate_month_training(user_id: str, exercises_db: Dict):
     
     created_count = 0
     current_date = start_date
+    records = []
     
     while current_date <= end_date:
         # 每週訓練 4-5 天，休息 2-3 天
@@ -380,13 +383,8 @@ def generate_month_training(user_id: str, exercises_db: Dict):
             user_id
         )
         
-        try:
-            # 插入到 Supabase
-            supabase.table('workout_plans').insert(workout).execute()
-            created_count += 1
-            print(f"  ✅ {current_date.strftime('%Y-%m-%d')}: {title}")
-        except Exception as e:
-            print(f"  ❌ {current_date.strftime('%Y-%m-%d')}: 插入失敗 - {e}")
+        records.append(workout)
+        print(f"  📝 {current_date.strftime('%Y-%m-%d')}: {title}")
         
         # 下一天
         current_day += 1
@@ -394,6 +392,24 @@ def generate_month_training(user_id: str, exercises_db: Dict):
             week += 1
         current_date += timedelta(days=1)
     
+    if COPY_DIR:
+        writer = CopyWriter(COPY_DIR)
+        if is_bulk_load():
+            defer_copy_summaries(writer, [user_id])
+        created_count = writer.write('workout_plans', records)
+        load_script = writer.close()
+        print(f"\n💾 workout_plans: {created_count} 筆寫入 {writer.path('workout_plans')}")
+        print(f"載入資料庫：psql \"$DATABASE_URL\" -f {load_script}")
+    else:
+        # 批次寫入（暫時性錯誤會重試，失敗資料另存報告）
+        with deferred_summaries(supabase, [user_id], enabled=is_bulk_load()):
+            created_count, failures = insert_batches(
+                supabase, 'workout_plans', records, get_batch_size(),
+                describe=lambda r: r['scheduled_date'][:10]
+            )
+        if failures:
+            print(f"❌ {sum(f['count'] for f in failures)} 筆寫入失敗（{len(failures)} 批）")
+    
     print("=" * 60)
     print(f"\n✅ 完成！共創建 {created_count} 筆訓練記錄")
 
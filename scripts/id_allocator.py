@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+區塊式 Firestore ID 產生器（生成腳本共用）
+
+原本每個 ID 呼叫 20 次 random.choice，而且使用未設定種子的全域亂數。
+IdAllocator 改為：
+- 只取一次熵（指定 seed 時完全不取），建立自己的亂數來源
+- 每次取一整塊隨機位元組，用 bytes.translate 一次轉成 ID 字元：
+  0-247 對應 62 個字元（各 4 次），248-255 直接捨棄，沒有取模偏差
+- 用不完的字元留給下一次，同一個 seed 產生的 ID 序列固定，與每次取幾個無關
+
+使用方式:
+    from id_allocator import IdAllocator
+
+    ids = IdAllocator(seed='42:user-1')
+    plan_id = ids.next_id()
+    template_ids = ids.take(5)
+"""
+
+import os
+import random
+import string
+from typing import Any, List, Optional
+
+# Firestore 相容 ID：20 個英數字元
+ID_ALPHABET = string.ascii_letters + string.digits
+ID_LENGTH = 20
+
+# 每次從亂數來源取的位元組數（4 的倍數：分次取與一次取的結果相同）
+RAW_BLOCK_SIZE = 4096
+
+_USABLE = 256 - 256 % len(ID_ALPHABET)
+_TRANSLATE = bytes(
+    ID_ALPHABET.encode('ascii')[value % len(ID_ALPHABET)] if value < _USABLE else 0
+    for value in range(256)
+)
+_REJECTED = bytes(range(_USABLE, 256))
+
+class IdAllocator:
+    """以區塊產生 Firestore 相容 ID，同一個 seed 結果相同"""
+
+    def __init__(self, seed: Optional[Any] = None):
+        self.seed(seed)
+
+    def seed(self, seed: Optional[Any] = None):
+        """重新設定種子（None 時取一次系統熵）"""
+        if seed is None:
+            seed = int.from_bytes(os.urandom(16), 'big')
+        self._rng = random.Random(seed)
+        self._chars = b''
+        self._offset = 0
+
+    def _reserve(self, size: int) -> int:
+        """確保至少還有 size 個字元，回傳起始位置"""
+        available = len(self._chars) - self._offset
+        if available < size:
+            blocks = [self._chars[self._offset:]]
+            while available < size:
+                block = self._rng.randbytes(RAW_BLOCK_SIZE).translate(_TRANSLATE, _REJECTED)
+                blocks.append(block)
+                available += len(block)
+            self._chars = b''.join(blocks)
+            self._offset = 0
+        start = self._offset
+        self._offset += size
+        return start
+
+    def next_id(self) -> str:
+        """下一個 ID"""
+        start = self._reserve(ID_LENGTH)
+        return self._chars[start:start + ID_LENGTH].decode('ascii')
+
+    def take(self, count: int) -> List[str]:
+        """一次取 count 個 ID"""
+        start = self._reserve(count * ID_LENGTH)
+        text = self._chars[start:start + count * ID_LENGTH].decode('ascii')
+        return [text[i:i + ID_LENGTH] for i in range(0, len(text), ID_LENGTH)]
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本機 SQLite 副本（離線查詢用）
+
+download_complete_database.py --sqlite 會把所有表格載入
+database_export/database.sqlite，接著由這個模組補上：
+- 常用查詢欄位的索引（user_id、training_type、completed_date 等）
+- workout_sets 表格：用 SQLite JSON1（json_each）把 workout_plans.exercises
+  攤平成每組一筆，可直接用 SQL 計算訓練量、PR
+
+check_* 腳本加上 --local 就改查這個檔案，不需要連線 Supabase。
+
+使用方式:
+    from local_replica import open_replica
+
+    conn = open_replica()
+    rows = conn.execute("SELECT name FROM exercises WHERE training_type = ?", ('心肺適能訓練',)).fetchall()
+"""
+
+import os
+import re
+import sqlite3
+from typing import List, Tuple
+
+# 副本檔案（與 export_engine 的 sqlite 輸出相同）
+REPLICA_FILE = os.path.join("database_export", "database.sqlite")
+
+# (表格, 欄位) → 建立索引；表格或欄位不存在時略過
+INDEXES: List[Tuple[str, Tuple[str, ...]]] = [
+    ("exercises", ("training_type",)),
+    ("exercises", ("user_id",)),
+    ("exercises", ("body_part",)),
+    ("custom_exercises", ("user_id",)),
+    ("custom_exercises", ("training_type",)),
+    ("workout_plans", ("user_id", "completed_date")),
+    ("workout_plans", ("trainee_id",)),
+    ("workout_plans", ("completed_date",)),
+    ("workout_plans", ("scheduled_date",)),
+    ("workout_templates", ("user_id",)),
+    ("body_data", ("user_id",)),
+    ("notes", ("user_id",)),
+    ("workout_sets", ("user_id", "date")),
+    ("workout_sets", ("exercise_id",)),
+]
+
+# workout_plans.exercises → 每組一筆（sets 不是陣列的模板型動作沒有組數資料，略過）
+WORKOUT_SETS_SQL = """
+CREATE TABLE workout_sets AS
+SELECT
+    p.id AS plan_id,
+    p.user_id AS user_id,
+    substr(COALESCE(p.completed_date, p.scheduled_date), 1, 10) AS date,
+    p.completed AS plan_completed,
+    json_extract(e.value, '$.exerciseId') AS exercise_id,
+    json_extract(e.value, '$.exerciseName') AS exercise_name,
+    COALESCE(CAST(json_extract(s.value, '$.setNumber') AS INTEGER), CAST(s.key AS INTEGER) + 1) AS set_number,
+    CAST(json_extract(s.value, '$.reps') AS INTEGER) AS reps,
+    CAST(json_extract(s.value, '$.weight') AS REAL) AS weight,
+    COALESCE(json_extract(s.value, '$.completed'), 0) AS completed
+FROM workout_plans AS p,
+     json_each(p.exercises) AS e,
+     json_each(e.value, '$.sets') AS s
+WHERE json_valid(p.exercises)
+  AND json_type(e.value, '$.sets') = 'array'
+"""
+
+def table_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    """表格的欄位名稱（表格不存在時為空）"""
+    return [row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')]
+
+def build_workout_sets(conn: sqlite3.Connection) -> int:
+    """重建 workout_sets，回傳組數"""
+    conn.execute("DROP TABLE IF EXISTS workout_sets")
+    columns = table_columns(conn, "workout_plans")
+    if "exercises" not in columns:
+        return 0
+    sql = WORKOUT_SETS_SQL
+    for column in ("user_id", "completed_date", "scheduled_date", "completed"):
+        if column not in columns:
+            # 欄位投影後可能少了部分欄位
+            sql = re.sub(rf"\bp\.{column}\b", "NULL", sql)
+    conn.execute(sql)
+    return conn.execute("SELECT COUNT(*) FROM workout_sets").fetchone()[0]
+
+def create_indexes(conn: sqlite3.Connection) -> List[str]:
+    """建立 INDEXES 中存在的索引，回傳索引名稱"""
+    created = []
+    for table, columns in INDEXES:
+        existing = table_columns(conn, table)
+        if not existing or any(column not in existing for column in columns):
+            continue
+        name = f"idx_{table}_{'_'.join(columns)}"
+        quoted = ", ".join(f'"{column}"' for column in columns)
+        conn.execute(f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ({quoted})')
+        created.append(name)
+    return created
+
+def build_replica(path: str = REPLICA_FILE) -> Tuple[int, List[str]]:
+    """在已載入資料的 SQLite 檔案上建立 workout_sets 與索引
+
+    回傳 (組數, 索引名稱)。
+    """
+    conn = sqlite3.connect(path)
+    try:
+        with conn:
+            sets = build_workout_sets(conn)
+            indexes = create_indexes(conn)
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    return sets, indexes
+
+def open_replica(path: str = REPLICA_FILE) -> sqlite3.Connection:
+    """開啟本機副本（唯讀查詢用，欄位可用名稱存取）"""
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"{path} 不存在，請先執行 python scripts/download_complete_database.py --sqlite"
+        )
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    return conn
@@ -2,10 +2,14 @@
 # -*- coding: utf-8 -*-
 """
 從 CSV 讀取動作數據並查找常見動作
+
+關鍵字以 exercise_index.NameIndex 比對（name / name_en，不分大小寫），
+排名與生成腳本選動作的規則相同。
 """
 
 import sys
 import pandas as pd
+from exercise_index import NameIndex
 
 # 設置 UTF-8 輸出
 sys.stdout.reconfigure(encoding='utf-8')
@@ -31,14 +35,15 @@ def main():
     print(df.head(10)[['id', 'name', 'bodyPart', 'equipmentCategory']])
     print()
     
-    # 關鍵字搜尋
+    # 關鍵字搜尋（索引只建立一次）
     keywords = ['臥推', '深蹲', '硬舉', '划船', '引體', '肩推', '彎舉', '腿推', '腿彎', '側平舉', '提踵']
+    index = NameIndex(df.to_dict('records'))
     
     for keyword in keywords:
-        matches = df[df['name'].str.contains(keyword, na=False)]
+        matches = index.search(keyword)
         if len(matches) > 0:
             print(f"\n【{keyword}】 ({len(matches)} 個):")
-            for _, row in matches.head(3).iterrows():
+            for row in matches[:3]:
                 print(f"  ID: {row['id']}")
                 print(f"  名稱: {row['name']}")
                 print(f"  部位: {row['bodyPart']} / {row['specificMuscle']}")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+生成資料的輸出端（生成腳本的「生成 → 分批 → 輸出」管線共用）
+
+生成函式只負責逐筆 yield 資料，輸出端一邊讀一邊分批寫出，
+記憶體裡最多只有幾批資料，多年 × 多用戶的歷史也不會整份放進 list：
+- RestSink：bulk_insert.insert_batches（並行寫入；佇列滿時生成端會等待）
+- CopySink：附加到 COPY CSV（copy_output.CopyWriter），close() 時產生 load.sql
+- NdjsonRecordSink：附加到 <DIR>/<table>.ndjson（--emit-ndjson[=DIR]，預設 data/ndjson）
+
+使用方式:
+    from record_sinks import get_sink
+
+    sink = get_sink(supabase)
+    count, failures = sink.write('workout_plans', iter_records(), describe=lambda r: r['scheduled_date'][:10])
+    sink.close()
+"""
+
+import os
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from bulk_insert import get_batch_size, insert_batches, iter_batches
+from cli_options import get_optional_option
+from copy_output import CopyWriter, get_copy_dir
+from snapshot_io import encode_rows
+
+# --emit-ndjson 未指定目錄時的輸出位置
+DEFAULT_NDJSON_DIR = os.path.join('data', 'ndjson')
+
+def get_ndjson_dir(default: str = DEFAULT_NDJSON_DIR) -> Optional[str]:
+    """讀取 --emit-ndjson 或 --emit-ndjson=DIR，未指定時回傳 None"""
+    return get_optional_option('--emit-ndjson', default)
+
+class RestSink:
+    """透過 REST API 批次寫入"""
+
+    name = 'REST'
+
+    def __init__(self, client, batch_size: Optional[int] = None):
+        self.client = client
+        self.batch_size = batch_size or get_batch_size()
+
+    def write(self, table: str, records: Iterable[Dict],
+              describe: Optional[Callable[[Dict], str]] = None) -> Tuple[int, List[Dict]]:
+        """寫入資料，回傳 (成功筆數, 失敗批次清單)"""
+        return insert_batches(self.client, table, records, self.batch_size, describe=describe)
+
+    def close(self) -> Optional[str]:
+        return None
+
+    def summary(self) -> List[str]:
+        return []
+
+class CopySink:
+    """附加到 COPY CSV，close() 時產生 load.sql"""
+
+    name = 'COPY'
+
+    def __init__(self, writer: CopyWriter):
+        self.writer = writer
+
+    def write(self, table: str, records: Iterable[Dict],
+              describe: Optional[Callable[[Dict], str]] = None) -> Tuple[int, List[Dict]]:
+        count = self.writer.write(table, records)
+        print(f"  💾 {table}: {count} 筆寫入 {self.writer.path(table)}")
+        return count, []
+
+    def close(self) -> Optional[str]:
+        """產生 load.sql，回傳路徑"""
+        return self.writer.close()
+
+    def summary(self) -> List[str]:
+        return self.writer.summary()
+
+class NdjsonRecordSink:
+    """附加到 <table>.ndjson（每行一筆精簡 JSON；匯出用的是 export_engine.NdjsonSink）"""
+
+    name = 'NDJSON'
+
+    def __init__(self, directory: str, batch_size: Optional[int] = None):
+        self.directory = directory
+        self.batch_size = batch_size or get_batch_size()
+        self.counts: Dict[str, int] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, table: str) -> str:
+        """表格的 NDJSON 檔案路徑"""
+        return os.path.join(self.directory, f"{table}.ndjson")
+
+    def write(self, table: str, records: Iterable[Dict],
+              describe: Optional[Callable[[Dict], str]] = None) -> Tuple[int, List[Dict]]:
+        """附加資料（同一個表格第一次寫入時覆蓋舊檔）"""
+        mode = 'ab' if table in self.counts else 'wb'
+        count = 0
+        with open(self.path(table), mode) as f:
+            for batch in iter_batches(records, self.batch_size):
+                f.write(encode_rows(batch))
+                count += len(batch)
+        self.counts[table] = self.counts.get(table, 0) + count
+        print(f"  💾 {table}: {count} 筆寫入 {self.path(table)}")
+        return count, []
+
+    def close(self) -> Optional[str]:
+        return None
+
+    def summary(self) -> List[str]:
+        return [f"{table}: {count} 筆 → {self.path(table)}" for table, count in self.counts.items()]
+
+def get_sink(client, batch_size: Optional[int] = None):
+    """依命令列選擇輸出端：--emit-copy、--emit-ndjson，否則 REST"""
+    copy_dir = get_copy_dir()
+    ndjson_dir = get_ndjson_dir()
+    if copy_dir and ndjson_dir:
+        raise ValueError("--emit-copy 與 --emit-ndjson 不能同時使用")
+    if copy_dir:
+        return CopySink(CopyWriter(copy_dir))
+    if ndjson_dir:
+        return NdjsonRecordSink(ndjson_dir, batch_size)
+    return RestSink(client, batch_size)
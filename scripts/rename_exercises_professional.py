@@ -10,6 +10,7 @@ import os
 import sys
 from typing import Dict, List, Tuple
 from datetime import datetime
+from snapshot_io import find_snapshot, load_document
 
 # 設定輸出編碼為 UTF-8
 sys.stdout.reconfigure(encoding='utf-8')
@@ -251,9 +252,8 @@ def generate_exercise_name(
 # ============================================================================
 
 def load_exercises(filepath: str) -> List[Dict]:
-    """載入動作資料"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """載入動作資料（支援 JSON / NDJSON / 壓縮格式）"""
+    return load_document(filepath)
 
 def analyze_current_data(exercises: List[Dict]) -> Dict:
     """分析現有資料結構"""
@@ -473,7 +473,8 @@ def main():
     print()
     
     # 檔案路徑
-    input_file = 'database_export/exercises.json'
+    # 自動選擇最新的匯出格式（JSON / NDJSON / 壓縮）
+    input_file = find_snapshot('database_export', 'exercises') or 'database_export/exercises.json'
     output_file = 'database_export/exercises_optimized.json'
     report_file = 'database_export/EXERCISE_RENAMING_REPORT.md'
     
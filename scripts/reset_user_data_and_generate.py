@@ -6,22 +6,50 @@
 
 功能：
 1. 刪除指定用戶的所有訓練數據
-2. 生成一個月的訓練記錄（推拉腿分化）
+2. 生成一個月的訓練記錄（推拉腿分化，--days 可改為多年的歷史）
 3. 生成一周的訓練模板
 
 使用方式:
-    python scripts/reset_user_data_and_generate.py d1798674-0b96-4c47-a7c7-ee20a5372a03
+    python scripts/reset_user_data_and_generate.py d1798674-0b96-4c47-a7c7-ee20a5372a03 [--auto-confirm] [--batch-size=500] [--concurrency=4] [--retries=5]
+    python scripts/reset_user_data_and_generate.py d1798674-0b96-4c47-a7c7-ee20a5372a03 --emit-copy[=data/copy]
+    python scripts/reset_user_data_and_generate.py d1798674-0b96-4c47-a7c7-ee20a5372a03 --days=1825 --emit-ndjson[=data/ndjson]
+
+訓練記錄與模板由 generator 逐筆產生，輸出端（record_sinks.py）邊讀邊分批寫出，
+多年的歷史也只在記憶體保留幾批：每 --batch-size 筆只呼叫一次 insert（預設 500），
+最多 --concurrency 批同時送出（寫入跟不上時生成會等待），
+暫時性錯誤（429 / 5xx）會重試 --retries 次。
+
+--upsert 不先刪除：ID 由用戶與日期（模板為標題）推導，只 upsert 內容不同的資料、
+只刪除這次沒有生成的舊資料，重複執行時相同的資料不會再觸發彙總 / PR 觸發器：
+    python scripts/reset_user_data_and_generate.py d1798674-0b96-4c47-a7c7-ee20a5372a03 --upsert
+
+--emit-copy 不寫入資料庫，改為輸出 workout_plans.csv、workout_templates.csv
+與 load.sql（先刪除該用戶的計劃與模板，再 \copy 載入），用 psql 執行：
+    psql "$DATABASE_URL" -f data/copy/load.sql
+
+--emit-ndjson 不寫入資料庫也不刪除，改為輸出 workout_plans.ndjson、workout_templates.ndjson。
+
+--bulk-load 寫入期間暫停彙總 / PR 觸發器，寫入後一次重建該用戶的
+daily_workout_summary 與 personal_records（需要 migration 021，COPY 模式也適用）。
 """
 
 import sys
 import os
 import uuid
 import random
-import string
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Iterable, Iterator, Tuple
 from dotenv import load_dotenv
 from supabase import create_client, Client
+from bulk_delete import delete_users, print_summary
+from bulk_insert import get_batch_size
+from exercise_catalog import load_catalog
+from id_allocator import IdAllocator
+from bulk_load import defer_copy_summaries, deferred_summaries, is_bulk_load
+from cli_options import get_int_option
+from copy_output import sql_literal
+from record_sinks import CopySink, get_sink
+from upsert_sync import deterministic_id, sync_rows
 
 # 設置 UTF-8 輸出
 sys.stdout.reconfigure(encoding='utf-8')
@@ -64,73 +92,107 @@ supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
 # 目標用戶 ID
 AUTO_CONFIRM = '--auto-confirm' in sys.argv
+BATCH_SIZE = get_batch_size()
+UPSERT_MODE = '--upsert' in sys.argv
+# 計劃、模板與模板動作的 ID（只取一次熵，區塊式產生；--upsert 時以用戶 ID 為種子）
+ID_ALLOCATOR = IdAllocator()
+# 訓練記錄的歷史天數（預設一個月）
+HISTORY_DAYS = get_int_option('--days', 30)
+# 長期歷史：每 12 週一個週期，回到基礎重量重新漸進（避免重量無限增加）
+PROGRESSION_WEEKS = 12
+BULK_LOAD = is_bulk_load()
+
+# 重置時清除的表格（appointments 不存在時略過）
+RESET_TABLES = ['workout_plans', 'workout_templates', 'exercises', 'appointments']
+
+# 刪除失敗只警告、不中止的表格（用戶不一定有自定義動作或預約）
+OPTIONAL_RESET_TABLES = ['exercises', 'appointments']
+
+# --upsert：生成的資料先收集起來，最後與資料庫比對後同步
+PENDING: Dict[str, List[Dict]] = {'workout_plans': [], 'workout_templates': []}
+
+# --upsert 時各表格推導 ID 用的欄位（每天一筆計劃、每個標題一個模板）
+UPSERT_KEYS = {
+    'workout_plans': lambda r: r['scheduled_date'][:10],
+    'workout_templates': lambda r: r['title'],
+}
+
+# 輸出端：REST（預設）、--emit-copy 或 --emit-ndjson
+try:
+    SINK = get_sink(supabase, BATCH_SIZE)
+except ValueError as e:
+    print(f"❌ {e}")
+    sys.exit(1)
+COPY_WRITER = SINK.writer if isinstance(SINK, CopySink) else None
+FILE_OUTPUT = SINK.name != 'REST'
+
+if UPSERT_MODE and FILE_OUTPUT:
+    print("❌ --upsert 與 --emit-copy / --emit-ndjson 不能同時使用")
+    sys.exit(1)
 
 if len(sys.argv) > 1 and not sys.argv[1].startswith('--'):
     TARGET_USER_ID = sys.argv[1]
     print(f"目標用戶 ID: {TARGET_USER_ID}")
 else:
     print("❌ 請提供用戶 UUID")
-    print("使用方式: python scripts/reset_user_data_and_generate.py <user_id> [--auto-confirm]")
+    print("使用方式: python scripts/reset_user_data_and_generate.py <user_id> [--auto-confirm] [--batch-size=500] [--concurrency=4] [--retries=5] [--days=30] [--bulk-load] [--upsert | --emit-copy[=DIR] | --emit-ndjson[=DIR]]")
     sys.exit(1)
 
 def generate_firestore_id() -> str:
-    """生成 Firestore 相容的 ID（20 字符）"""
-    chars = string.ascii_letters + string.digits
-    return ''.join(random.choice(chars) for _ in range(20))
+    """生成 Firestore 相容的 ID（20 字符，區塊式產生）"""
+    return ID_ALLOCATOR.next_id()
+
+def run_time() -> datetime:
+    """生成資料的基準時間（--upsert 時固定為今天中午，同一天重複執行結果相同）"""
+    if UPSERT_MODE:
+        return datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+    return datetime.now()
 
 def delete_user_data(user_id: str):
-    """刪除用戶的所有訓練數據"""
+    """刪除用戶的所有訓練數據（各表格同時刪除）"""
     print("\n" + "=" * 60)
     print("步驟 1: 刪除現有數據")
     print("=" * 60)
     
-    try:
-        # 刪除訓練計劃（workout_plans）
-        print(f"正在刪除用戶 {user_id} 的訓練計劃...")
-        result = supabase.table('workout_plans')\
-            .delete()\
-            .eq('user_id', user_id)\
-            .execute()
-        print(f"  ✅ 已刪除訓練計劃")
-        
-        # 刪除訓練模板（workout_templates）
-        print(f"正在刪除用戶 {user_id} 的訓練模板...")
-        result = supabase.table('workout_templates')\
-            .delete()\
-            .eq('user_id', user_id)\
-            .execute()
-        print(f"  ✅ 已刪除訓練模板")
-        
-        # 刪除自定義動作（可選，因為這個用戶可能沒有自定義動作）
-        print(f"正在刪除用戶 {user_id} 的自定義動作...")
-        try:
-            result = supabase.table('exercises')\
-                .delete()\
-                .eq('user_id', user_id)\
-                .execute()
-            print(f"  ✅ 已刪除自定義動作")
-        except Exception as e:
-            print(f"  ⚠️  刪除自定義動作失敗（可能沒有）: {e}")
-        
-        # 刪除預約記錄（如果表存在）
-        print(f"正在刪除用戶 {user_id} 的預約記錄...")
-        try:
-            result = supabase.table('appointments')\
-                .delete()\
-                .or_(f'coach_id.eq.{user_id},trainee_id.eq.{user_id}')\
-                .execute()
-            print(f"  ✅ 已刪除預約記錄")
-        except Exception as e:
-            if 'PGRST205' in str(e) or 'appointments' in str(e).lower():
-                print(f"  ⚠️  appointments 表不存在，跳過")
-            else:
-                raise
-        
-        print("\n✅ 所有數據已清空！")
-        
-    except Exception as e:
-        print(f"\n❌ 刪除數據時發生錯誤: {e}")
+    print(f"正在刪除用戶 {user_id} 的訓練計劃、訓練模板、自定義動作與預約記錄...")
+    results = delete_users(supabase, [user_id], RESET_TABLES)
+    if not print_summary(results, optional=OPTIONAL_RESET_TABLES):
+        print("\n❌ 刪除數據時發生錯誤")
         sys.exit(1)
+    
+    print("\n✅ 所有數據已清空！")
+
+def queue_delete_user_data(user_id: str):
+    """--emit-copy：把刪除舊計劃與模板寫進 load.sql（載入時才執行）"""
+    print("\n" + "=" * 60)
+    print("步驟 1: 刪除現有數據（寫入 load.sql）")
+    print("=" * 60)
+    for table in ('workout_plans', 'workout_templates'):
+        COPY_WRITER.execute(f"DELETE FROM {table} WHERE user_id = {sql_literal(user_id)}")
+        print(f"  📝 載入前刪除 {table}")
+
+def save_records(table: str, records: Iterable[Dict], describe) -> Tuple[int, List[Dict]]:
+    """寫入資料：--upsert 時先收集（需要整份比對），否則交給輸出端邊生成邊分批寫出"""
+    if UPSERT_MODE:
+        count = 0
+        for record in records:
+            record['id'] = deterministic_id(table, record['user_id'], UPSERT_KEYS[table](record))
+            PENDING[table].append(record)
+            count += 1
+        return count, []
+    return SINK.write(table, records, describe=describe)
+
+def sync_pending(user_id: str):
+    """--upsert：把收集的資料與資料庫比對後同步"""
+    print("\n" + "=" * 60)
+    print("步驟 6: 比對並同步（upsert）")
+    print("=" * 60)
+    for table, records in PENDING.items():
+        stats = sync_rows(supabase, table, records, 'user_id', user_id, BATCH_SIZE,
+                          describe=UPSERT_KEYS[table])
+        print(f"  ✅ {table}: 寫入 {stats['written']} 筆、未變更 {stats['unchanged']} 筆、刪除 {stats['deleted']} 筆")
+        if stats['failed']:
+            print(f"  ❌ {table}: {stats['failed']} 筆寫入失敗")
 
 def get_exercises_from_db() -> Dict[str, Dict]:
     """從資料庫獲取真實動作"""
@@ -169,32 +231,29 @@ def get_exercises_from_db() -> Dict[str, Dict]:
         "hammer_curl": "錘式",
     }
     
+    # 動作目錄來自本機快取（只確認一次版本），關鍵字在本機解析
+    try:
+        resolver = load_catalog(supabase).resolver()
+    except Exception as e:
+        print(f"  ❌ 讀取動作目錄失敗 - {e}")
+        return {}
+    
     exercises = {}
     
     for key, keyword in exercise_queries.items():
-        try:
-            response = supabase.table('exercises')\
-                .select('*')\
-                .is_('user_id', 'null')\
-                .ilike('name', f'%{keyword}%')\
-                .limit(1)\
-                .execute()
-            
-            if response.data:
-                ex = response.data[0]
-                exercises[key] = {
-                    "id": ex['id'],
-                    "exerciseId": ex['id'],
-                    "name": ex['name'],
-                    "actionName": ex.get('action_name', keyword),
-                    "equipment": ex.get('equipment', ''),
-                    "bodyParts": ex.get('body_parts', []) if ex.get('body_parts') else []
-                }
-                print(f"  ✅ {key}: {ex['name'][:60]}")
-            else:
-                print(f"  ⚠️  {key}: 找不到包含 '{keyword}' 的動作")
-        except Exception as e:
-            print(f"  ❌ {key}: 查詢失敗 - {e}")
+        ex = resolver.resolve(keyword)
+        if ex:
+            exercises[key] = {
+                "id": ex['id'],
+                "exerciseId": ex['id'],
+                "name": ex['name'],
+                "actionName": ex.get('action_name', keyword),
+                "equipment": ex.get('equipment', ''),
+                "bodyParts": ex.get('body_parts', []) if ex.get('body_parts') else []
+            }
+            print(f"  ✅ {key}: {ex['name'][:60]}")
+        else:
+            print(f"  ⚠️  {key}: 找不到包含 '{keyword}' 的動作")
     
     print(f"\n✅ 成功獲取 {len(exercises)} 個動作")
     return exercises
@@ -468,15 +527,9 @@ def create_workout_record(date: datetime, title: str, exercises: List[Dict],
         "note": ""
     }
 
-def generate_training_records(user_id: str, exercises: Dict):
-    """生成一個月的訓練記錄"""
-    print("\n" + "=" * 60)
-    print("步驟 3: 生成訓練記錄（一個月）")
-    print("=" * 60)
-    
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=30)
-    
+def iter_training_records(user_id: str, exercises: Dict,
+                          start_date: datetime, end_date: datetime) -> Iterator[Dict]:
+    """逐日產生已完成的訓練記錄（推拉腿循環；週日與隨機休息日跳過）"""
     # PPL 循環
     ppl_cycle = [
         ('push', generate_push_workout),
@@ -487,7 +540,6 @@ def generate_training_records(user_id: str, exercises: Dict):
     current_date = start_date
     cycle_index = 0
     week = 0
-    created_count = 0
     
     while current_date <= end_date:
         day_of_week = current_date.weekday()
@@ -504,30 +556,42 @@ def generate_training_records(user_id: str, exercises: Dict):
         
         # 生成訓練
         _, workout_func = ppl_cycle[cycle_index % 3]
-        title, workout_exercises = workout_func(week, exercises)
+        title, workout_exercises = workout_func(week % PROGRESSION_WEEKS, exercises)
         
         if not workout_exercises:
             current_date += timedelta(days=1)
             continue
         
         # 創建記錄
-        record = create_workout_record(
+        yield create_workout_record(
             current_date, title, workout_exercises, user_id, completed=True
         )
-        
-        try:
-            supabase.table('workout_plans').insert(record).execute()
-            created_count += 1
-            print(f"  ✅ {current_date.strftime('%Y-%m-%d')}: {title} ({len(workout_exercises)} 個動作)")
-        except Exception as e:
-            print(f"  ❌ {current_date.strftime('%Y-%m-%d')}: 插入失敗 - {e}")
+        if HISTORY_DAYS <= 31:
+            print(f"  📝 {current_date.strftime('%Y-%m-%d')}: {title} ({len(workout_exercises)} 個動作)")
         
         cycle_index += 1
         if cycle_index % 7 == 0:
             week += 1
         current_date += timedelta(days=1)
+
+def generate_training_records(user_id: str, exercises: Dict):
+    """生成過去 HISTORY_DAYS 天的訓練記錄（預設一個月）"""
+    print("\n" + "=" * 60)
+    print(f"步驟 3: 生成訓練記錄（{HISTORY_DAYS} 天）")
+    print("=" * 60)
+    
+    end_date = run_time()
+    start_date = end_date - timedelta(days=HISTORY_DAYS)
+    
+    # 邊生成邊分批寫入
+    created_count, failures = save_records(
+        'workout_plans', iter_training_records(user_id, exercises, start_date, end_date),
+        describe=lambda r: r['scheduled_date'][:10]
+    )
     
     print(f"\n✅ 完成！共創建 {created_count} 筆訓練記錄")
+    if failures:
+        print(f"❌ {sum(f['count'] for f in failures)} 筆寫入失敗（{len(failures)} 批）")
 
 def convert_exercise_record_to_workout_exercise(exercise_record: Dict) -> Dict:
     """將 ExerciseRecord 格式轉換為 WorkoutExercise 格式（用於模板）"""
@@ -585,13 +649,8 @@ def create_workout_template(title: str, exercises: List[Dict], user_id: str) ->
         "plan_type": plan_type,  # 使用 Flutter 中定義的類型
     }
 
-def generate_training_templates(user_id: str, exercises: Dict):
-    """生成基礎訓練模板（workout_templates 表）"""
-    print("\n" + "=" * 60)
-    print("步驟 4: 生成訓練模板（workout_templates）")
-    print("=" * 60)
-    
-    # 基礎訓練模板：胸、背、腿、肩、手臂
+def iter_training_templates(user_id: str, exercises: Dict) -> Iterator[Dict]:
+    """逐一產生基礎訓練模板：胸、背、腿、肩、手臂"""
     templates = [
         ('胸部訓練模板', generate_push_workout),
         ('背部訓練模板', generate_pull_workout),
@@ -600,8 +659,6 @@ def generate_training_templates(user_id: str, exercises: Dict):
         ('手臂訓練模板', generate_arm_workout),
     ]
     
-    created_count = 0
-    
     for title, workout_func in templates:
         _, workout_exercises = workout_func(0, exercises)  # Week 0 = 基礎重量
         
@@ -613,14 +670,20 @@ def generate_training_templates(user_id: str, exercises: Dict):
         workout_exercises = set_exercises_completed_status(workout_exercises, False)
         
         # 創建模板
-        template = create_workout_template(title, workout_exercises, user_id)
-        
-        try:
-            supabase.table('workout_templates').insert(template).execute()
-            created_count += 1
-            print(f"  ✅ {title} ({len(workout_exercises)} 個動作)")
-        except Exception as e:
-            print(f"  ❌ {title}: 插入失敗 - {e}")
+        yield create_workout_template(title, workout_exercises, user_id)
+        print(f"  📝 {title} ({len(workout_exercises)} 個動作)")
+
+def generate_training_templates(user_id: str, exercises: Dict):
+    """生成基礎訓練模板（workout_templates 表）"""
+    print("\n" + "=" * 60)
+    print("步驟 4: 生成訓練模板（workout_templates）")
+    print("=" * 60)
+    
+    # 邊生成邊分批寫入
+    created_count, failures = save_records(
+        'workout_templates', iter_training_templates(user_id, exercises),
+        describe=lambda r: r['title']
+    )
     
     print(f"\n✅ 完成！共創建 {created_count} 個訓練模板")
 
@@ -640,7 +703,7 @@ def generate_future_plans(user_id: str, exercises: Dict):
     print("=" * 60)
     
     # 設定下週的日期
-    today = datetime.now()
+    today = run_time()
     next_monday = today + timedelta(days=(7 - today.weekday()))
     
     # 一週訓練計劃（PPL 分化 + 肩日 + 手臂日）
@@ -652,7 +715,7 @@ def generate_future_plans(user_id: str, exercises: Dict):
         (4, '週五 - 手臂訓練', generate_arm_workout),
     ]
     
-    created_count = 0
+    records = []
     
     for day_offset, title, workout_func in plans:
         plan_date = next_monday + timedelta(days=day_offset)
@@ -668,13 +731,14 @@ def generate_future_plans(user_id: str, exercises: Dict):
         plan = create_workout_record(
             plan_date, title, workout_exercises, user_id, completed=False
         )
-        
-        try:
-            supabase.table('workout_plans').insert(plan).execute()
-            created_count += 1
-            print(f"  ✅ {plan_date.strftime('%m/%d (%a)')}: {title} ({len(workout_exercises)} 個動作)")
-        except Exception as e:
-            print(f"  ❌ {plan_date.strftime('%m/%d')}: 插入失敗 - {e}")
+        records.append(plan)
+        print(f"  📝 {plan_date.strftime('%m/%d (%a)')}: {title} ({len(workout_exercises)} 個動作)")
+    
+    # 批次寫入
+    created_count, failures = save_records(
+        'workout_plans', records,
+        describe=lambda r: r['scheduled_date'][:10]
+    )
     
     print(f"\n✅ 完成！共創建 {created_count} 個未來訓練計劃")
 
@@ -689,8 +753,14 @@ def main():
     print("⚠️  警告：此操作將刪除該用戶的所有訓練數據！")
     print("")
     
-    # 確認
-    if not AUTO_CONFIRM:
+    # 確認（--emit-copy / --emit-ndjson 不會修改資料庫，不需要確認）
+    if COPY_WRITER:
+        print(f"💾 COPY 模式：只輸出檔案到 {COPY_WRITER.directory}，執行 load.sql 時才會刪除與載入")
+        print("")
+    elif FILE_OUTPUT:
+        print(f"💾 NDJSON 模式：只輸出檔案到 {SINK.directory}，不會修改資料庫")
+        print("")
+    elif not AUTO_CONFIRM:
         confirm = input("確定要繼續嗎？(yes/no): ").strip().lower()
         if confirm not in ['yes', 'y']:
             print("❌ 操作已取消")
@@ -699,8 +769,15 @@ def main():
         print("✅ 自動確認模式已啟用，跳過確認步驟")
         print("")
     
-    # 1. 刪除現有數據
-    delete_user_data(TARGET_USER_ID)
+    # 1. 刪除現有數據（--upsert 時最後才刪除沒有重新生成的舊資料）
+    if UPSERT_MODE:
+        # 亂數（休息日、暫時 ID）固定，同一天重複執行生成相同內容
+        random.seed(TARGET_USER_ID)
+        ID_ALLOCATOR.seed(TARGET_USER_ID)
+    elif COPY_WRITER:
+        queue_delete_user_data(TARGET_USER_ID)
+    elif not FILE_OUTPUT:
+        delete_user_data(TARGET_USER_ID)
     
     # 2. 獲取真實動作
     exercises = get_exercises_from_db()
@@ -708,20 +785,38 @@ def main():
         print("\n❌ 獲取的動作數量不足，程式終止")
         sys.exit(1)
     
-    # 3. 生成訓練記錄（一個月）
-    generate_training_records(TARGET_USER_ID, exercises)
-    
-    # 4. 生成訓練模板（workout_templates）
-    generate_training_templates(TARGET_USER_ID, exercises)
-    
-    # 5. 生成未來訓練計劃（workout_plans, completed=False）
-    generate_future_plans(TARGET_USER_ID, exercises)
-    
-    print("\n" + "=" * 60)
-    print("🎉 完成！數據已重置並生成假資料")
-    print("=" * 60)
+    # --bulk-load：寫入期間暫停彙總觸發器，結束後一次重建
+    if BULK_LOAD and COPY_WRITER:
+        defer_copy_summaries(COPY_WRITER, [TARGET_USER_ID])
+    with deferred_summaries(supabase, [TARGET_USER_ID], enabled=BULK_LOAD and not FILE_OUTPUT):
+        # 3. 生成訓練記錄（預設一個月）
+        generate_training_records(TARGET_USER_ID, exercises)
+        
+        # 4. 生成訓練模板（workout_templates）
+        generate_training_templates(TARGET_USER_ID, exercises)
+        
+        # 5. 生成未來訓練計劃（workout_plans, completed=False）
+        generate_future_plans(TARGET_USER_ID, exercises)
+        
+        # 6. --upsert：比對並同步
+        if UPSERT_MODE:
+            sync_pending(TARGET_USER_ID)
+    
+    if FILE_OUTPUT:
+        load_script = SINK.close()
+        print("\n" + "=" * 60)
+        print(f"🎉 完成！{SINK.name} 檔案已輸出")
+        print("=" * 60)
+        for line in SINK.summary():
+            print(f"  - {line}")
+        if load_script:
+            print(f"\n載入資料庫：psql \"$DATABASE_URL\" -f {load_script}")
+    else:
+        print("\n" + "=" * 60)
+        print("🎉 完成！數據已重置並生成假資料")
+        print("=" * 60)
     print("\n訓練數據：")
-    print("  - 訓練記錄：過去 30 天的訓練（推拉腿分化，completed=True）")
+    print(f"  - 訓練記錄：過去 {HISTORY_DAYS} 天的訓練（推拉腿分化，completed=True）")
     print("  - 訓練模板：5 個可自訂模板（胸、背、腿、肩、手臂）")
     print("  - 未來計劃：下週 5 天的訓練計劃（completed=False）")
     print("\n訓練特點：")
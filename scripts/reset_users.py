@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批次清除多位用戶的訓練資料（Supabase 版本）
+
+清除測試環境的大量用戶（例如 generate_load_dataset.py 建立的測試帳號）時，
+不需要逐一執行 reset 腳本：每個表格用 in_() 分段刪除、各表格同時進行，
+最後列出每個表格刪除的筆數。
+
+使用方式:
+    python scripts/reset_users.py <user_id>[,<user_id>...] [<user_id> ...] [選項]
+    python scripts/reset_users.py --user-file=scripts/load_test_users.txt [選項]
+
+選項:
+    --user-file=PATH     用戶 UUID 檔案（每行一個，# 開頭為註解）
+    --tables=a,b         要清除的表格（預設 workout_plans,workout_templates,exercises,appointments）
+    --chunk-size=N       每次 in_() 的用戶數（預設 100）
+    --concurrency=N      每個表格同時進行的刪除請求數（預設 4）
+    --auto-confirm       跳過確認
+
+範例:
+    python scripts/reset_users.py --user-file=scripts/load_test_users.txt --tables=workout_plans,workout_templates --auto-confirm
+"""
+
+import sys
+import os
+import time
+from datetime import datetime
+from dotenv import load_dotenv
+from supabase import create_client, Client
+from bulk_delete import USER_TABLES, delete_users, get_chunk_size, load_user_ids, print_summary
+from async_writer import get_concurrency
+from cli_options import get_option
+
+# 設置 UTF-8 輸出
+sys.stdout.reconfigure(encoding='utf-8')
+
+# 獲取專案根目錄
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+ENV_FILE = os.path.join(PROJECT_ROOT, '.env')
+
+# 載入環境變數
+if os.path.exists(ENV_FILE):
+    with open(ENV_FILE, 'r', encoding='utf-8-sig') as f:
+        env_content = f.read()
+    temp_env = ENV_FILE + '.tmp'
+    with open(temp_env, 'w', encoding='utf-8') as f:
+        f.write(env_content)
+    load_dotenv(temp_env)
+    os.remove(temp_env)
+    print(f"✅ 已載入環境變數: {ENV_FILE}")
+else:
+    print(f"⚠️  找不到 .env 文件: {ENV_FILE}")
+    load_dotenv()
+
+# Supabase 配置
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
+if not SUPABASE_URL or not SUPABASE_KEY:
+    print("[ERROR] 請設置 SUPABASE_URL 和 SUPABASE_SERVICE_ROLE_KEY 環境變數")
+    sys.exit(1)
+
+# 初始化 Supabase Client
+supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+def main():
+    """主函數"""
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    user_file = get_option('--user-file', '') or None
+    tables = [table.strip() for table in get_option('--tables', ','.join(USER_TABLES)).split(',') if table.strip()]
+    chunk_size = get_chunk_size()
+    concurrency = get_concurrency()
+
+    try:
+        user_ids = load_user_ids(args, user_file)
+    except FileNotFoundError as e:
+        print(f"❌ 找不到用戶檔案: {e}")
+        sys.exit(1)
+    if not user_ids:
+        print("❌ 請提供用戶 UUID 或 --user-file")
+        print("使用方式: python scripts/reset_users.py <user_id>[,<user_id>...] [--user-file=PATH] [--tables=a,b] [--chunk-size=100] [--concurrency=4] [--auto-confirm]")
+        sys.exit(1)
+
+    print("=" * 60)
+    print("StrengthWise - 多用戶訓練資料清除工具")
+    print("=" * 60)
+    print(f"用戶數: {len(user_ids)}（{user_ids[0]}{' ...' if len(user_ids) > 1 else ''}）")
+    print(f"表格: {', '.join(tables)}")
+    print(f"每段 {chunk_size} 位用戶，每個表格 {concurrency} 個並行請求")
+    print(f"執行時間: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("\n⚠️  警告：此操作將刪除這些用戶在上述表格中的所有資料！")
+
+    if '--auto-confirm' not in sys.argv:
+        confirm = input("確定要繼續嗎？(yes/no): ").strip().lower()
+        if confirm not in ['yes', 'y']:
+            print("❌ 操作已取消")
+            sys.exit(0)
+
+    started = time.perf_counter()
+    try:
+        results = delete_users(supabase, user_ids, tables, chunk_size, concurrency)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - started
+
+    print("\n" + "=" * 60)
+    print("刪除結果")
+    print("=" * 60)
+    ok = print_summary(results)
+    total = sum(result['deleted'] for result in results.values())
+    print(f"\n{'✅' if ok else '⚠️ '} 共刪除 {total} 筆（{len(user_ids)} 位用戶），耗時 {elapsed:.1f} 秒")
+    if not ok:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -10,22 +10,38 @@
 4. 生成多個訓練模板
 
 使用方式:
-    python scripts/reset_workouts_and_templates.py <user_id> [--auto-confirm]
+    python scripts/reset_workouts_and_templates.py <user_id> [--auto-confirm] [--batch-size=500] [--concurrency=4] [--retries=5]
+
+生成的記錄與模板每 --batch-size 筆只呼叫一次 insert（預設 500），
+最多 --concurrency 批同時送出，暫時性錯誤（429 / 5xx）會重試 --retries 次。
+
+--upsert 不先刪除：ID 由用戶與日期（模板為標題）推導，只 upsert 內容不同的資料、
+只刪除這次沒有生成的舊資料，重複執行時相同的資料不會再觸發彙總 / PR 觸發器。
+
+--bulk-load 寫入期間暫停彙總 / PR 觸發器，寫入後一次重建該用戶的
+daily_workout_summary 與 personal_records（需要 migration 021）。
 
 範例:
     python scripts/reset_workouts_and_templates.py d1798674-0b96-4c47-a7c7-ee20a5372a03
     python scripts/reset_workouts_and_templates.py d1798674-0b96-4c47-a7c7-ee20a5372a03 --auto-confirm
+    python scripts/reset_workouts_and_templates.py d1798674-0b96-4c47-a7c7-ee20a5372a03 --upsert
+    python scripts/reset_workouts_and_templates.py d1798674-0b96-4c47-a7c7-ee20a5372a03 --auto-confirm --bulk-load
 """
 
 import sys
 import os
 import uuid
 import random
-import string
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any
 from dotenv import load_dotenv
 from supabase import create_client, Client
+from bulk_delete import delete_users, print_summary
+from bulk_insert import get_batch_size, insert_batches
+from exercise_catalog import load_catalog
+from id_allocator import IdAllocator
+from bulk_load import deferred_summaries, is_bulk_load
+from upsert_sync import deterministic_id, sync_rows
 
 # 設置 UTF-8 輸出
 sys.stdout.reconfigure(encoding='utf-8')
@@ -62,67 +78,78 @@ supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
 # 解析命令列參數
 AUTO_CONFIRM = '--auto-confirm' in sys.argv
+BATCH_SIZE = get_batch_size()
+UPSERT_MODE = '--upsert' in sys.argv
+# 計劃與模板的 ID（只取一次熵，區塊式產生；--upsert 時每個步驟固定種子）
+ID_ALLOCATOR = IdAllocator()
+
+# 動作分類關鍵字（以名稱索引比對，與其他工具的比對規則相同）
+COMPOUND_KEYWORDS = ['臥推', '深蹲', '硬舉']  # 主要複合動作
+ISOLATION_KEYWORDS = ['側平舉', '彎舉']  # 孤立動作
+# 動作 id → 'compound' / 'isolation'（get_training_exercises 時建立）
+EXERCISE_KINDS: Dict[str, str] = {}
+
+# --upsert 時各表格推導 ID 用的欄位（每天一筆計劃、每個標題一個模板）
+UPSERT_KEYS = {
+    'workout_plans': lambda r: r['scheduled_date'][:10],
+    'workout_templates': lambda r: r['title'],
+}
 
 if len(sys.argv) > 1 and not sys.argv[1].startswith('--'):
     TARGET_USER_ID = sys.argv[1]
 else:
     print("❌ 請提供用戶 UUID")
-    print("使用方式: python scripts/reset_workouts_and_templates.py <user_id> [--auto-confirm]")
+    print("使用方式: python scripts/reset_workouts_and_templates.py <user_id> [--auto-confirm] [--batch-size=500] [--concurrency=4] [--retries=5] [--bulk-load] [--upsert]")
     sys.exit(1)
 
 # ==================== 工具函數 ====================
 
 def generate_firestore_id() -> str:
-    """生成 Firestore 相容的 ID（20 字符）"""
-    chars = string.ascii_letters + string.digits
-    return ''.join(random.choice(chars) for _ in range(20))
+    """生成 Firestore 相容的 ID（20 字符，區塊式產生）"""
+    return ID_ALLOCATOR.next_id()
 
-def get_exercise_by_keyword(keyword: str) -> Optional[Dict[str, Any]]:
-    """根據關鍵字搜尋動作"""
-    try:
-        response = supabase.table('exercises')\
-            .select('*')\
-            .is_('user_id', 'null')\
-            .ilike('name', f'%{keyword}%')\
-            .limit(1)\
-            .execute()
-        if response.data:
-            return response.data[0]
-        return None
-    except Exception as e:
-        print(f"  ⚠️  搜尋動作 '{keyword}' 失敗: {e}")
-        return None
+def new_uuid() -> str:
+    """暫時 ID（使用 random，--upsert 固定亂數種子時結果相同）"""
+    return str(uuid.UUID(int=random.getrandbits(128), version=4))
+
+def seed_random(user_id: str, step: str):
+    """--upsert：每個步驟以 (用戶, 步驟) 固定亂數（休息日、次數、暫時 ID），
+    同一天重複執行生成相同內容，也不受前一步寫入時用掉的亂數影響"""
+    if UPSERT_MODE:
+        random.seed(f"{user_id}:{step}")
+        ID_ALLOCATOR.seed(f"{user_id}:{step}")
+
+def run_time() -> datetime:
+    """生成資料的基準時間（--upsert 時固定為今天中午，同一天重複執行結果相同）"""
+    if UPSERT_MODE:
+        return datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+    return datetime.now()
+
+def save_records(table: str, records: List[Dict], describe):
+    """寫入資料：--upsert 時與現有資料比對後同步，否則批次 insert"""
+    if not UPSERT_MODE:
+        return insert_batches(supabase, table, records, BATCH_SIZE, describe=describe)
+    for record in records:
+        record['id'] = deterministic_id(table, record['user_id'], UPSERT_KEYS[table](record))
+    stats = sync_rows(supabase, table, records, 'user_id', TARGET_USER_ID, BATCH_SIZE, describe=describe)
+    print(f"  ✅ {table}: 寫入 {stats['written']} 筆、未變更 {stats['unchanged']} 筆、刪除 {stats['deleted']} 筆")
+    return stats['written'] + stats['unchanged'], stats['failures']
 
 # ==================== 刪除函數 ====================
 
 def delete_workout_data(user_id: str):
-    """刪除用戶的訓練計劃和模板"""
+    """刪除用戶的訓練計劃和模板（兩個表格同時刪除）"""
     print("\n" + "=" * 60)
     print("步驟 1: 刪除現有數據")
     print("=" * 60)
     
-    try:
-        # 刪除訓練計劃（包括記錄和未來計劃）
-        print(f"正在刪除用戶 {user_id} 的所有訓練計劃...")
-        result = supabase.table('workout_plans')\
-            .delete()\
-            .eq('user_id', user_id)\
-            .execute()
-        print(f"  ✅ 已刪除訓練計劃（workout_plans）")
-        
-        # 刪除訓練模板
-        print(f"正在刪除用戶 {user_id} 的所有訓練模板...")
-        result = supabase.table('workout_templates')\
-            .delete()\
-            .eq('user_id', user_id)\
-            .execute()
-        print(f"  ✅ 已刪除訓練模板（workout_templates）")
-        
-        print("\n✅ 所有訓練數據已清空！")
-        
-    except Exception as e:
-        print(f"\n❌ 刪除失敗: {e}")
+    print(f"正在刪除用戶 {user_id} 的所有訓練計劃與模板...")
+    results = delete_users(supabase, [user_id], ['workout_plans', 'workout_templates'])
+    if not print_summary(results):
+        print("\n❌ 刪除失敗")
         sys.exit(1)
+    
+    print("\n✅ 所有訓練數據已清空！")
 
 # ==================== 獲取動作 ====================
 
@@ -138,6 +165,17 @@ def get_training_exercises() -> Dict[str, List[Dict[str, Any]]]:
         'legs': [],  # 腿日：下肢
     }
     
+    # 動作目錄來自本機快取（只確認一次版本），關鍵字在本機解析（第二個值是器材提示，相符的動作優先）
+    try:
+        resolver = load_catalog(supabase).resolver()
+    except Exception as e:
+        print(f"  ❌ 讀取動作目錄失敗: {e}")
+        return exercises
+    
+    # 以名稱索引一次分類所有動作（同時符合時視為複合動作）
+    EXERCISE_KINDS.update(dict.fromkeys(resolver.index.ids_any(ISOLATION_KEYWORDS), 'isolation'))
+    EXERCISE_KINDS.update(dict.fromkeys(resolver.index.ids_any(COMPOUND_KEYWORDS), 'compound'))
+    
     # 推日動作
     push_keywords = [
         ('臥推', '槓鈴'),
@@ -168,33 +206,24 @@ def get_training_exercises() -> Dict[str, List[Dict[str, Any]]]:
     # 搜尋推日動作
     print("\n[推日動作]")
     for primary, secondary in push_keywords:
-        exercise = get_exercise_by_keyword(primary)
-        if exercise and (not secondary or secondary in exercise['name']):
-            exercises['push'].append(exercise)
-            print(f"  ✅ {exercise['name'][:40]}")
-        elif exercise:
+        exercise = resolver.resolve(primary, equipment=secondary)
+        if exercise:
             exercises['push'].append(exercise)
             print(f"  ✅ {exercise['name'][:40]}")
     
     # 搜尋拉日動作
     print("\n[拉日動作]")
     for primary, secondary in pull_keywords:
-        exercise = get_exercise_by_keyword(primary)
-        if exercise and (not secondary or secondary in exercise['name']):
-            exercises['pull'].append(exercise)
-            print(f"  ✅ {exercise['name'][:40]}")
-        elif exercise:
+        exercise = resolver.resolve(primary, equipment=secondary)
+        if exercise:
             exercises['pull'].append(exercise)
             print(f"  ✅ {exercise['name'][:40]}")
     
     # 搜尋腿日動作
     print("\n[腿日動作]")
     for primary, secondary in leg_keywords:
-        exercise = get_exercise_by_keyword(primary)
-        if exercise and (not secondary or secondary in exercise['name']):
-            exercises['legs'].append(exercise)
-            print(f"  ✅ {exercise['name'][:40]}")
-        elif exercise:
+        exercise = resolver.resolve(primary, equipment=secondary)
+        if exercise:
             exercises['legs'].append(exercise)
             print(f"  ✅ {exercise['name'][:40]}")
     
@@ -205,6 +234,10 @@ def get_training_exercises() -> Dict[str, List[Dict[str, Any]]]:
 
 # ==================== 生成訓練記錄 ====================
 
+def exercise_kind(exercise: Dict) -> str:
+    """動作類型：compound（複合）、isolation（孤立）或 general"""
+    return EXERCISE_KINDS.get(exercise['id'], 'general')
+
 def generate_exercise_record(exercise: Dict, base_weight: float, week: int) -> Dict[str, Any]:
     """生成單個動作記錄（符合 Dart ExerciseRecord 格式）"""
     # 計算漸進式超負荷（每週 +2.5%）
@@ -212,11 +245,12 @@ def generate_exercise_record(exercise: Dict, base_weight: float, week: int) -> D
     weight = round(weight * 2) / 2  # 四捨五入到 0.5kg
     
     # 根據動作類型決定組數和次數
-    if '臥推' in exercise['name'] or '深蹲' in exercise['name'] or '硬舉' in exercise['name']:
+    kind = exercise_kind(exercise)
+    if kind == 'compound':
         # 主要複合動作：5組 x 5-8次
         sets_count = 5
         reps = random.randint(5, 8)
-    elif '側平舉' in exercise['name'] or '彎舉' in exercise['name']:
+    elif kind == 'isolation':
         # 孤立動作：3組 x 12-15次
         sets_count = 3
         reps = random.randint(12, 15)
@@ -253,11 +287,12 @@ def generate_exercise_record(exercise: Dict, base_weight: float, week: int) -> D
 
 def generate_workout_records(user_id: str, exercises: Dict[str, List[Dict]]):
     """生成一個月的訓練記錄"""
+    seed_random(user_id, 'workout_plans')
     print("\n" + "=" * 60)
     print("步驟 3: 生成訓練記錄（過去 30 天）")
     print("=" * 60)
     
-    today = datetime.now()
+    today = run_time()
     start_date = today - timedelta(days=30)
     
     # 推拉腿循環
@@ -275,7 +310,7 @@ def generate_workout_records(user_id: str, exercises: Dict[str, List[Dict]]):
         'legs': 80.0,
     }
     
-    created_count = 0
+    records = []
     current_date = start_date
     workout_index = 0
     
@@ -326,22 +361,27 @@ def generate_workout_records(user_id: str, exercises: Dict[str, List[Dict]]):
             'updated_at': current_date.isoformat(),
         }
         
-        try:
-            supabase.table('workout_plans').insert(workout_plan).execute()
-            created_count += 1
-            date_str = current_date.strftime('%m/%d')
-            print(f"  ✅ {date_str}: {workout_titles[workout_type]} ({len(exercise_records)} 個動作)")
-        except Exception as e:
-            print(f"  ❌ {current_date.strftime('%m/%d')} 創建失敗: {e}")
+        records.append(workout_plan)
+        date_str = current_date.strftime('%m/%d')
+        print(f"  📝 {date_str}: {workout_titles[workout_type]} ({len(exercise_records)} 個動作)")
         
         current_date += timedelta(days=1)
     
+    # 批次寫入
+    created_count, failures = save_records(
+        'workout_plans', records,
+        describe=lambda r: r['scheduled_date'][:10]
+    )
+    
     print(f"\n✅ 完成！共創建 {created_count} 筆訓練記錄")
+    if failures:
+        print(f"❌ {sum(f['count'] for f in failures)} 筆寫入失敗（{len(failures)} 批）")
 
 # ==================== 生成訓練模板 ====================
 
 def generate_workout_templates(user_id: str, exercises: Dict[str, List[Dict]]):
     """生成訓練模板"""
+    seed_random(user_id, 'workout_templates')
     print("\n" + "=" * 60)
     print("步驟 4: 生成訓練模板")
     print("=" * 60)
@@ -380,7 +420,7 @@ def generate_workout_templates(user_id: str, exercises: Dict[str, List[Dict]]):
         },
     ]
     
-    created_count = 0
+    records = []
     
     for config in templates_config:
         workout_type = config['workout_type']
@@ -392,11 +432,12 @@ def generate_workout_templates(user_id: str, exercises: Dict[str, List[Dict]]):
         template_exercises = []
         for exercise in exercises[workout_type]:
             # 根據動作類型設定預設的組數和目標
-            if '臥推' in exercise['name'] or '深蹲' in exercise['name'] or '硬舉' in exercise['name']:
+            kind = exercise_kind(exercise)
+            if kind == 'compound':
                 sets_count = 5
                 target_reps = 5
                 target_weight = 0.0
-            elif '側平舉' in exercise['name'] or '彎舉' in exercise['name']:
+            elif kind == 'isolation':
                 sets_count = 3
                 target_reps = 12
                 target_weight = 0.0
@@ -416,7 +457,7 @@ def generate_workout_templates(user_id: str, exercises: Dict[str, List[Dict]]):
                 })
             
             template_exercises.append({
-                'id': str(uuid.uuid4()),  # WorkoutExercise 的臨時 ID
+                'id': new_uuid(),  # WorkoutExercise 的臨時 ID
                 'exerciseId': exercise['id'],  # 關聯到 exercises 表的真實 ID
                 'name': exercise['name'],
                 'sets': sets_count,  # 組數
@@ -433,16 +474,18 @@ def generate_workout_templates(user_id: str, exercises: Dict[str, List[Dict]]):
             'plan_type': config['plan_type'],
             'exercises': template_exercises,
             # training_time 欄位暫時不設定（模型中是 DateTime?）
-            'created_at': datetime.now().isoformat(),
-            'updated_at': datetime.now().isoformat(),
+            'created_at': run_time().isoformat(),
+            'updated_at': run_time().isoformat(),
         }
         
-        try:
-            supabase.table('workout_templates').insert(template).execute()
-            created_count += 1
-            print(f"  ✅ {config['title']} ({len(template_exercises)} 個動作)")
-        except Exception as e:
-            print(f"  ❌ {config['title']} 創建失敗: {e}")
+        records.append(template)
+        print(f"  📝 {config['title']} ({len(template_exercises)} 個動作)")
+    
+    # 批次寫入
+    created_count, failures = save_records(
+        'workout_templates', records,
+        describe=lambda r: r['title']
+    )
     
     print(f"\n✅ 完成！共創建 {created_count} 個訓練模板")
 
@@ -468,11 +511,14 @@ def main():
             print("已取消操作")
             sys.exit(0)
     
-    # 執行步驟
-    delete_workout_data(TARGET_USER_ID)
+    # 執行步驟（--upsert 時不先刪除，寫入時才刪除沒有重新生成的舊資料）
+    if not UPSERT_MODE:
+        delete_workout_data(TARGET_USER_ID)
     exercises = get_training_exercises()
-    generate_workout_records(TARGET_USER_ID, exercises)
-    generate_workout_templates(TARGET_USER_ID, exercises)
+    # --bulk-load：寫入期間暫停彙總觸發器，結束後一次重建
+    with deferred_summaries(supabase, [TARGET_USER_ID], enabled=is_bulk_load()):
+        generate_workout_records(TARGET_USER_ID, exercises)
+        generate_workout_templates(TARGET_USER_ID, exercises)
     
     # 完成
     print("\n" + "=" * 60)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+匯出檔案讀寫工具（所有匯出 / 讀取腳本共用）
+
+支援格式：
+- <name>.json          縮排 JSON（舊版格式）
+- <name>.json.gz/.zst  壓縮的精簡 JSON
+- <name>.ndjson        每行一筆資料
+- <name>.ndjson.gz     gzip 壓縮的 NDJSON
+- <name>.ndjson.zst    zstd 壓縮的 NDJSON（需要 zstandard 套件）
+
+寫入時每一批資料都壓成獨立的 gzip member / zstd frame 直接附加到檔案，
+因此可以分頁串流寫入、在任一批次邊界截斷續傳，也能直接串接多個檔案；
+讀取時會依副檔名自動解壓，呼叫端不需要知道實際格式。
+
+使用方式:
+    from snapshot_io import find_snapshot, iter_records, load_records
+
+    exercises = load_records('database_export', 'exercises')
+"""
+
+import gzip
+import io
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# 壓縮方式 → NDJSON 副檔名
+NDJSON_SUFFIXES = {
+    "none": ".ndjson",
+    "gzip": ".ndjson.gz",
+    "zstd": ".ndjson.zst",
+}
+
+# 壓縮方式 → 整份 JSON 副檔名
+JSON_SUFFIXES = {
+    "none": ".json",
+    "gzip": ".json.gz",
+    "zstd": ".json.zst",
+}
+
+# 每次編碼成一個壓縮區塊的筆數
+DEFAULT_CHUNK_SIZE = 1000
+
+def _zstandard():
+    """載入 zstandard（選用套件）"""
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstd 壓縮需要 zstandard 套件（pip install zstandard）")
+    return zstandard
+
+def check_compression(compression: str) -> str:
+    """確認壓縮方式有效（zstd 需要已安裝 zstandard）"""
+    if compression not in NDJSON_SUFFIXES:
+        raise ValueError(f"不支援的壓縮方式: {compression}（可用: {', '.join(NDJSON_SUFFIXES)}）")
+    if compression == "zstd":
+        _zstandard()
+    return compression
+
+def compression_of(path: str) -> str:
+    """依副檔名判斷壓縮方式（寫入中的 .tmp 檔案看原本的副檔名）"""
+    if path.endswith(".tmp"):
+        path = path[:-len(".tmp")]
+    if path.endswith(".gz"):
+        return "gzip"
+    if path.endswith(".zst"):
+        return "zstd"
+    return "none"
+
+def dumps_compact(value: Any) -> str:
+    """精簡 JSON（無縮排、無多餘空白）"""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+def compress_bytes(data: bytes, compression: str) -> bytes:
+    """把一段資料壓成獨立的 gzip member / zstd frame"""
+    if compression == "gzip":
+        return gzip.compress(data, compresslevel=6)
+    if compression == "zstd":
+        return _zstandard().ZstdCompressor(level=3).compress(data)
+    return data
+
+def encode_rows(rows: Iterable[Dict], compression: str = "none") -> bytes:
+    """把一批資料編碼成可直接附加到 NDJSON 檔案的位元組"""
+    data = "".join(dumps_compact(row) + "\n" for row in rows).encode("utf-8")
+    return compress_bytes(data, compression)
+
+def open_text(path: str):
+    """以文字模式開啟檔案，依副檔名自動解壓"""
+    compression = compression_of(path)
+    if compression == "gzip":
+        return gzip.open(path, "rt", encoding="utf-8")
+    if compression == "zstd":
+        raw = open(path, "rb")
+        reader = _zstandard().ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+        return io.TextIOWrapper(reader, encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+def is_ndjson(path: str) -> bool:
+    """是否為 NDJSON（含壓縮）檔案"""
+    return ".ndjson" in os.path.basename(path)
+
+def iter_records(path: str) -> Iterator[Dict]:
+    """逐筆讀取匯出檔案（NDJSON 為串流，JSON 陣列會整份載入）"""
+    with open_text(path) as f:
+        if is_ndjson(path):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(f)
+
+def load_document(path: str) -> Any:
+    """載入整份匯出檔案（NDJSON 回傳 list，JSON 回傳原始物件）"""
+    if is_ndjson(path):
+        return list(iter_records(path))
+    with open_text(path) as f:
+        return json.load(f)
+
+def find_snapshot(directory: str, name: str) -> Optional[str]:
+    """找出 <name> 最新的匯出檔案（任何支援的格式），找不到回傳 None"""
+    candidates = [
+        os.path.join(directory, name + suffix)
+        for suffix in list(NDJSON_SUFFIXES.values()) + list(JSON_SUFFIXES.values())
+    ]
+    existing = [path for path in candidates if os.path.exists(path)]
+    if not existing:
+        return None
+    return max(existing, key=os.path.getmtime)
+
+def load_records(directory: str, name: str) -> List[Dict]:
+    """載入 <name> 的匯出資料（自動選擇格式），找不到時拋出 FileNotFoundError"""
+    path = find_snapshot(directory, name)
+    if path is None:
+        raise FileNotFoundError(os.path.join(directory, name + ".json"))
+    return load_document(path)
+
+def write_records(path: str, rows: Iterable[Dict], compression: Optional[str] = None,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """串流寫入 NDJSON（每 chunk_size 筆一個壓縮區塊），回傳筆數"""
+    compression = compression or compression_of(path)
+    count = 0
+    chunk = []
+    with open(path, "wb") as f:
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                f.write(encode_rows(chunk, compression))
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            f.write(encode_rows(chunk, compression))
+            count += len(chunk)
+    return count
+
+def write_document(path: str, value: Any, compression: Optional[str] = None):
+    """寫入整份精簡 JSON（可壓縮）"""
+    compression = compression or compression_of(path)
+    data = dumps_compact(value).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(compress_bytes(data, compression))
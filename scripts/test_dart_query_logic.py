@@ -4,6 +4,9 @@
 測試當前 Dart 查詢方式是否能查到所有動作
 
 模擬 ExerciseServiceSupabase.getExercisesByFilters() 的查詢邏輯
+
+完整的動作清單（測試 1、5 的比對基準）來自動作目錄快取
+database_export/exercises.catalog，只有模擬 Dart 的篩選查詢會送到 Supabase。
 """
 
 import os
@@ -11,6 +14,7 @@ import sys
 from supabase import create_client, Client
 from dotenv import load_dotenv
 from collections import Counter
+from exercise_catalog import load_catalog
 
 # 設定輸出編碼
 sys.stdout.reconfigure(encoding='utf-8')
@@ -31,23 +35,24 @@ def test_dart_query_logic(supabase: Client):
     print("=" * 80)
     print()
     
-    # 測試 1: 查詢所有動作（無條件）
+    catalog = load_catalog(supabase)
+    
+    # 測試 1: 所有動作（動作目錄）
     print("【測試 1】查詢所有動作（無條件）")
     print("-" * 80)
     try:
-        response = supabase.table('exercises').select('*').execute()
-        total_count = len(response.data)
-        print(f"✅ 成功：查詢到 {total_count} 個動作")
+        total_count = len(catalog)
+        print(f"✅ 成功：動作目錄共 {total_count} 個動作")
         
         # 統計 training_type
-        training_types = Counter([ex.get('training_type') for ex in response.data])
+        training_types = Counter([ex.get('training_type') for ex in catalog.rows])
         print(f"\ntraining_type 分佈:")
         for tt, count in training_types.most_common():
             print(f"  {tt}: {count}")
         
         # 統計 body_parts（陣列欄位）
         body_parts_list = []
-        for ex in response.data:
+        for ex in catalog.rows:
             bp = ex.get('body_parts', [])
             if bp:
                 body_parts_list.extend(bp)
@@ -141,9 +146,9 @@ def test_dart_query_logic(supabase: Client):
     print("-" * 80)
     
     try:
-        # 獲取所有阻力訓練動作
-        all_resistance = supabase.table('exercises').select('*').eq('training_type', '阻力訓練').execute()
-        total_resistance = len(all_resistance.data)
+        # 所有阻力訓練動作（動作目錄）
+        all_resistance = [ex for ex in catalog.rows if ex.get('training_type') == '阻力訓練']
+        total_resistance = len(all_resistance)
         
         # 統計各身體部位的動作數
         queried_count = sum(results.values())
@@ -159,22 +164,20 @@ def test_dart_query_logic(supabase: Client):
             
             # 找出無法查詢到的動作
             print(f"\n查找無法查詢到的動作...")
-            all_ids = {ex['id'] for ex in all_resistance.data}
+            all_ids = {ex['id'] for ex in all_resistance}
             
-            queried_ids = set()
-            for body_part in body_parts_to_test:
-                query = supabase.table('exercises').select('id')
-                query = query.eq('training_type', '阻力訓練')
-                query = query.contains('body_parts', [body_part])
-                response = query.execute()
-                queried_ids.update(ex['id'] for ex in response.data)
+            # 與 contains('body_parts', [部位]) 相同的條件，在本機比對
+            queried_ids = {
+                ex['id'] for ex in all_resistance
+                if any(body_part in (ex.get('body_parts') or []) for body_part in body_parts_to_test)
+            }
             
             missing_ids = all_ids - queried_ids
             
             if missing_ids:
                 print(f"\n無法查詢到的動作 ({len(missing_ids)} 個):")
                 for ex_id in list(missing_ids)[:5]:
-                    ex = next((e for e in all_resistance.data if e['id'] == ex_id), None)
+                    ex = catalog.get(ex_id)
                     if ex:
                         print(f"  - {ex['name']}")
                         print(f"    body_parts: {ex.get('body_parts')}")
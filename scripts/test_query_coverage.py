@@ -6,17 +6,16 @@
 模擬 ExerciseServiceSupabase.getExercisesByFilters() 的查詢邏輯
 """
 
-import json
 import sys
 from collections import Counter
+from snapshot_io import load_records
 
 # 設定輸出編碼
 sys.stdout.reconfigure(encoding='utf-8')
 
 def load_exercises():
-    """載入本地 exercises.json"""
-    with open('database_export/exercises.json', 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """載入本地 exercises 匯出檔（JSON / NDJSON / 壓縮格式皆可）"""
+    return load_records('database_export', 'exercises')
 
 def simulate_dart_query(exercises, filters):
     """模擬 Dart 的查詢邏輯"""
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+冪等重新生成（reset_* 腳本的 --upsert 模式共用）
+
+不先刪除再全部重新寫入，而是：
+1. 生成的資料使用由 (表格, 用戶, 日期或標題) 推導出的固定 ID
+2. 下載該用戶目前的資料，逐欄比對
+3. 只 upsert（on_conflict=id）新增或內容不同的資料，
+   只刪除這次沒有生成的舊資料
+
+內容相同的資料完全不會寫入，workout_plans 上的
+trigger_update_daily_summary / trigger_update_pr 也就不會再觸發一次。
+
+使用方式:
+    from upsert_sync import deterministic_id, sync_rows
+
+    record['id'] = deterministic_id('workout_plans', user_id, '2025-01-31')
+    stats = sync_rows(supabase, 'workout_plans', records, 'user_id', user_id)
+"""
+
+import hashlib
+import re
+import string
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Tuple
+
+from bulk_insert import DEFAULT_BATCH_SIZE, insert_batches, iter_batches
+from export_engine import iter_pages
+
+# Firestore 相容 ID：20 個英數字元
+ID_ALPHABET = string.ascii_letters + string.digits
+ID_LENGTH = 20
+
+# 由資料庫維護、不參與比對的欄位
+IGNORED_COLUMNS = ('updated_at',)
+
+# 每次 in_() 刪除的 ID 數量（避免網址過長）
+DELETE_CHUNK_SIZE = 100
+
+TIMESTAMP_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}')
+
+def deterministic_id(*parts: Any) -> str:
+    """由各部分推導出固定的 Firestore 相容 ID（同樣輸入永遠得到同樣 ID）"""
+    digest = int.from_bytes(hashlib.sha256('\x1f'.join(map(str, parts)).encode('utf-8')).digest(), 'big')
+    chars = []
+    for _ in range(ID_LENGTH):
+        digest, index = divmod(digest, len(ID_ALPHABET))
+        chars.append(ID_ALPHABET[index])
+    return ''.join(chars)
+
+def normalize(value: Any) -> Any:
+    """比對用的正規化：數字一律轉 float、時間轉成 UTC，JSON 結構遞迴處理
+
+    沒有時區的時間視為 UTC（與 Supabase 資料庫的預設時區相同）。
+    """
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, dict):
+        return {key: normalize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [normalize(item) for item in value]
+    if isinstance(value, str) and TIMESTAMP_PATTERN.match(value):
+        try:
+            moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return value
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return moment.astimezone(timezone.utc).isoformat()
+    return value
+
+def fetch_existing(client, table: str, scope_column: str, scope_value: str,
+                   columns: List[str]) -> Dict[str, Dict]:
+    """下載 scope_column = scope_value 的現有資料（id → 資料）"""
+    select = ','.join(['id'] + [column for column in columns if column != 'id'])
+    existing = {}
+    make_query = lambda: client.table(table).select(select).eq(scope_column, scope_value)
+    for page in iter_pages(make_query, DEFAULT_BATCH_SIZE):
+        for row in page:
+            existing[row['id']] = row
+    return existing
+
+def diff_rows(records: List[Dict], existing: Dict[str, Dict]) -> Tuple[List[Dict], int, List[str]]:
+    """比對生成資料與現有資料，回傳 (需要寫入的資料, 相同筆數, 要刪除的舊 ID)"""
+    changed = []
+    unchanged = 0
+    generated = set()
+    for record in records:
+        generated.add(record['id'])
+        current = existing.get(record['id'])
+        if current is not None and all(
+            normalize(value) == normalize(current.get(column))
+            for column, value in record.items()
+            if column not in IGNORED_COLUMNS
+        ):
+            unchanged += 1
+        else:
+            changed.append(record)
+    stale = [row_id for row_id in existing if row_id not in generated]
+    return changed, unchanged, stale
+
+def delete_ids(client, table: str, ids: Iterable[str]) -> int:
+    """依 ID 分段刪除，回傳筆數"""
+    deleted = 0
+    for chunk in iter_batches(({'id': row_id} for row_id in ids), DELETE_CHUNK_SIZE):
+        client.table(table).delete().in_('id', [row['id'] for row in chunk]).execute()
+        deleted += len(chunk)
+    return deleted
+
+def sync_rows(client, table: str, records: List[Dict], scope_column: str, scope_value: str,
+              batch_size: int = DEFAULT_BATCH_SIZE, describe=None) -> Dict[str, int]:
+    """讓 table 中 scope_column = scope_value 的資料與 records 一致
+
+    回傳 {"written", "unchanged", "deleted", "failed", "failures"}（failures 為失敗批次清單）。
+    """
+    ids = [record['id'] for record in records]
+    if len(set(ids)) != len(ids):
+        raise ValueError(f"{table} 生成的資料有重複的 ID")
+
+    columns = sorted({column for record in records for column in record} - set(IGNORED_COLUMNS))
+    existing = fetch_existing(client, table, scope_column, scope_value, columns)
+    changed, unchanged, stale = diff_rows(records, existing)
+    print(f"  🔍 {table}: {len(changed)} 筆新增或變更、{unchanged} 筆相同、{len(stale)} 筆舊資料")
+
+    written, failures = 0, []
+    if changed:
+        written, failures = insert_batches(
+            client, table, changed, batch_size, describe=describe, on_conflict='id'
+        )
+    deleted = delete_ids(client, table, stale) if stale else 0
+    return {
+        "written": written,
+        "unchanged": unchanged,
+        "deleted": deleted,
+        "failed": sum(failure['count'] for failure in failures),
+        "failures": failures,
+    }
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+向量化訓練歷史生成（generate_load_dataset.py --vectorized 使用）
+
+一次用 NumPy 陣列產生整個區塊所有用戶的訓練日、動作與每一組的
+重量 / 次數 / 漸進式超負荷，不在迴圈裡逐組呼叫 random；
+worker 只回傳陣列（序列化成本低），要寫入時才由 iter_history_records
+把每筆訓練記錄組成 dict，格式與 generate_load_dataset 的 Python 版本相同。
+
+亂數以 (seed, 區塊編號) 初始化：同樣的 --seed 與 --chunk-size 結果相同。
+
+使用方式:
+    from vectorized_history import generate_history_arrays, iter_history_records
+
+    history = generate_history_arrays(user_ids, programs, exercises, 365, datetime.now(), mix, 42)
+    for record in iter_history_records(history, exercises):
+        ...
+"""
+
+import string
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Tuple
+
+# Firestore 相容 ID 的字元
+ID_ALPHABET = string.ascii_letters + string.digits
+ID_LENGTH = 20
+
+def _numpy():
+    """載入 numpy（選用套件）"""
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("--vectorized 需要 numpy 套件（pip install numpy）")
+    return numpy
+
+def ragged_arange(counts):
+    """[2, 3] → [0, 1, 0, 1, 2]（每段各自從 0 開始編號）"""
+    np = _numpy()
+    total = int(counts.sum())
+    starts = np.repeat(np.cumsum(counts) - counts, counts)
+    return np.arange(total) - starts
+
+def offsets(counts):
+    """每段的起點，多一個結尾：[2, 3] → [0, 2, 5]"""
+    np = _numpy()
+    return np.concatenate(([0], np.cumsum(counts)))
+
+def build_plan_table(programs: Dict[str, List[Tuple[str, List[Tuple[str, int, float, int]]]]],
+                     exercises: Dict[str, Dict], mix: List[Tuple[str, float]]) -> Dict:
+    """把 mix 用到的課表展開成「訓練日 × 動作」的平面表
+
+    找不到動作的項目會略過，沒有任何動作的訓練日不會排入循環。
+    """
+    titles, first_row, row_count = [], [], []
+    row_keys, row_sets, row_weight, row_reps = [], [], [], []
+    program_first, program_length = [], []
+
+    for name, _ in mix:
+        days = 0
+        program_first.append(len(titles))
+        for title, prescription in programs[name]:
+            rows = [row for row in prescription if row[0] in exercises]
+            if not rows:
+                continue
+            titles.append(title)
+            first_row.append(len(row_keys))
+            row_count.append(len(rows))
+            for key, sets, weight, reps in rows:
+                row_keys.append(key)
+                row_sets.append(sets)
+                row_weight.append(weight)
+                row_reps.append(reps)
+            days += 1
+        if not days:
+            raise ValueError(f"課表 {name} 沒有任何可用的動作")
+        program_length.append(days)
+
+    return {
+        "titles": titles,
+        "first_row": first_row,
+        "row_count": row_count,
+        "row_keys": row_keys,
+        "row_sets": row_sets,
+        "row_weight": row_weight,
+        "row_reps": row_reps,
+        "program_first": program_first,
+        "program_length": program_length,
+        "mix_weights": [weight for _, weight in mix],
+    }
+
+def firestore_ids(rng, count: int) -> List[str]:
+    """一次生成 count 個 Firestore 相容 ID"""
+    np = _numpy()
+    alphabet = np.frombuffer(ID_ALPHABET.encode('ascii'), dtype=np.uint8)
+    codes = alphabet[rng.integers(0, len(alphabet), size=(count, ID_LENGTH))]
+    return [value.decode('ascii') for value in codes.view(f'S{ID_LENGTH}').ravel()]
+
+def generate_history_arrays(user_ids: List[str], programs: Dict, exercises: Dict[str, Dict],
+                            days: int, end_date: datetime, mix: List[Tuple[str, float]],
+                            seed: int, chunk_index: int = 0) -> Dict:
+    """生成一個區塊所有用戶的訓練歷史（陣列形式）
+
+    用戶參數（課表、每週次數、力量基礎、進步速度）與 Python 版本的分布相同；
+    每組重量先乘上當週倍率並四捨五入到 0.1 kg，第 3 組起減重 10%、次數加 10%。
+    """
+    np = _numpy()
+    rng = np.random.default_rng([seed, chunk_index])
+    plan = build_plan_table(programs, exercises, mix)
+    users = len(user_ids)
+
+    # 用戶參數
+    mix_weights = np.array(plan["mix_weights"], dtype=float)
+    program = rng.choice(len(mix_weights), size=users, p=mix_weights / mix_weights.sum())
+    sessions_per_week = rng.integers(2, 7, size=users)
+    strength = rng.uniform(0.6, 1.4, size=users)
+    progress_per_week = rng.uniform(0.005, 0.025, size=users)
+
+    # 訓練日：(用戶, 第幾天)，依用戶、日期排序
+    trained = rng.random((users, days)) < (sessions_per_week / 7)[:, None]
+    session_user, session_day = np.nonzero(trained)
+    session_count = len(session_user)
+    cycle = ragged_arange(trained.sum(axis=1))
+    session_program = program[session_user]
+    plan_day = (np.array(plan["program_first"])[session_program]
+                + cycle % np.array(plan["program_length"])[session_program])
+    week = session_day // 7
+    # 進步幅度上限 60%
+    multiplier = strength[session_user] * (1.0 + np.minimum(week * progress_per_week[session_user], 0.6))
+
+    # 日期時間（整點 6~21 時，分鐘 0/15/30/45）
+    start = np.datetime64((end_date - timedelta(days=days)).date(), 'D')
+    hours = rng.integers(6, 22, size=session_count)
+    minutes = rng.choice(np.array([0, 15, 30, 45]), size=session_count)
+    moments = (start + session_day.astype('timedelta64[D]')).astype('datetime64[m]') \
+        + (hours * 60 + minutes).astype('timedelta64[m]')
+    dates = np.datetime_as_string(moments, unit='s')
+
+    # 動作：每個訓練日展開成 row_count 個動作
+    exercise_count = np.array(plan["row_count"])[plan_day]
+    exercise_session = np.repeat(np.arange(session_count), exercise_count)
+    exercise_row = np.repeat(np.array(plan["first_row"])[plan_day], exercise_count) \
+        + ragged_arange(exercise_count)
+
+    # 每一組
+    set_count = np.array(plan["row_sets"])[exercise_row]
+    set_exercise = np.repeat(np.arange(len(exercise_row)), set_count)
+    set_index = ragged_arange(set_count)
+    base_weight = np.round(
+        np.array(plan["row_weight"])[exercise_row] * multiplier[exercise_session], 1
+    )[set_exercise]
+    first_two = set_index < 2
+    weight = np.round(base_weight * np.where(first_two, 1.0, 0.9), 1)
+    reps = (np.array(plan["row_reps"])[exercise_row][set_exercise]
+            * np.where(first_two, 1.0, 1.1)).astype(np.int64)
+
+    set_session = exercise_session[set_exercise]
+    volume = np.bincount(set_session, weights=weight * reps, minlength=session_count)
+    total_sets = np.bincount(set_session, minlength=session_count)
+
+    return {
+        "user_ids": list(user_ids),
+        "plan": plan,
+        "id": firestore_ids(rng, session_count),
+        "session_user": session_user,
+        "plan_day": plan_day,
+        "week": week,
+        "date": dates,
+        "exercise_offsets": offsets(exercise_count),
+        "exercise_row": exercise_row,
+        "set_offsets": offsets(set_count),
+        "weight": weight,
+        "reps": reps,
+        "volume": np.round(volume, 1),
+        "total_sets": total_sets,
+    }
+
+def count_sets(history: Dict) -> int:
+    """區塊內的總組數"""
+    return len(history["weight"])
+
+def iter_history_records(history: Dict, exercises: Dict[str, Dict]) -> Iterator[Dict]:
+    """把陣列組成 workout_plans 記錄（ExerciseRecord / SetRecord 格式）"""
+    plan = history["plan"]
+    titles = plan["titles"]
+    row_keys = plan["row_keys"]
+    user_ids = history["user_ids"]
+
+    # 動作共同欄位只建一次
+    bases = {
+        key: {
+            "exerciseId": exercise['exerciseId'],
+            "exerciseName": exercise['name'],
+            "actionName": exercise.get('actionName', ''),
+            "equipment": exercise.get('equipment', ''),
+            "bodyParts": exercise.get('bodyParts', []),
+            "trainingType": exercise.get('trainingType', '阻力訓練'),
+        }
+        for key, exercise in exercises.items()
+    }
+
+    # 轉成 Python 數值一次完成，迴圈內只做索引
+    session_user = history["session_user"].tolist()
+    plan_day = history["plan_day"].tolist()
+    week = history["week"].tolist()
+    dates = history["date"].tolist()
+    exercise_offsets = history["exercise_offsets"].tolist()
+    exercise_row = history["exercise_row"].tolist()
+    set_offsets = history["set_offsets"].tolist()
+    weight = history["weight"].tolist()
+    reps = history["reps"].tolist()
+    volume = history["volume"].tolist()
+    total_sets = history["total_sets"].tolist()
+
+    for session, record_id in enumerate(history["id"]):
+        workout = []
+        for e in range(exercise_offsets[session], exercise_offsets[session + 1]):
+            first = set_offsets[e]
+            workout.append({
+                **bases[row_keys[exercise_row[e]]],
+                "sets": [
+                    {
+                        "setNumber": s - first + 1,
+                        "reps": reps[s],
+                        "weight": weight[s],
+                        "restTime": 90,
+                        "completed": True,
+                        "note": ""
+                    }
+                    for s in range(first, set_offsets[e + 1])
+                ],
+                "notes": "",
+                "completed": True
+            })
+        user_id = user_ids[session_user[session]]
+        title = f"{titles[plan_day[session]]} - 第{week[session] + 1}週"
+        yield {
+            "id": record_id,
+            "user_id": user_id,
+            "trainee_id": user_id,
+            "creator_id": user_id,
+            "title": title,
+            "description": f"專業訓練計劃 - {title}",
+            "scheduled_date": dates[session],
+            "completed": True,
+            "completed_date": dates[session],
+            "exercises": workout,
+            "plan_type": "personal",
+            "total_exercises": len(workout),
+            "total_sets": total_sets[session],
+            "total_volume": volume[session],
+            "note": ""
+        }
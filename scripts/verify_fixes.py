@@ -6,6 +6,7 @@ import sys
 import os
 from dotenv import load_dotenv
 from supabase import create_client, Client
+from exercise_catalog import load_catalog
 
 # 設置 UTF-8 輸出
 sys.stdout.reconfigure(encoding='utf-8')
@@ -101,6 +102,7 @@ def main():
             .execute()
         
         custom_exercise_count = 0
+        catalog = load_catalog(supabase)
         
         for plan in response.data:
             exercises = plan.get('exercises', [])
@@ -111,13 +113,8 @@ def main():
                 if not ex_id:
                     continue
                 
-                # 檢查是否為系統動作
-                sys_response = supabase.table('exercises')\
-                    .select('id, name, training_type, body_part')\
-                    .eq('id', ex_id)\
-                    .execute()
-                
-                if not sys_response.data:
+                # 檢查是否為系統動作（本機動作目錄）
+                if not catalog.get(ex_id):
                     # 這是自訂動作
                     custom_response = supabase.table('custom_exercises')\
                         .select('id, name, body_part, equipment')\